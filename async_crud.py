@@ -0,0 +1,118 @@
+from typing import Type
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import DeclarativeMeta, selectinload
+
+from entity_cache import cached_entity_async
+from models import User, Tournament, Team
+from schemas import SportEnum, Pagination, ParticipantEnum, TournamentResponse, VisibilityEnum
+
+
+# -------------------------
+# ASYNC READ OPERATIONS
+# -------------------------
+# Non-blocking versions of the crud.py reads behind the busiest GET
+# routes. Relationships are never lazy-loaded on an AsyncSession, so
+# anything a response needs is loaded up front. The by-id lookups share the
+# entity cache with their crud.py counterparts.
+
+async def get_number_of_instances_active(db: AsyncSession, model: Type[DeclarativeMeta]):
+    return await db.scalar(select(func.count(model.id)))
+
+async def get_number_of_instances_all(db: AsyncSession, model: Type[DeclarativeMeta]):
+    return await db.scalar(select(func.count(model.id)).execution_options(include_deleted=True))
+
+# ---- USER ----
+def base_user_query():
+    return select(User)
+
+async def get_active_user(db: AsyncSession, user_id: int):
+    return await cached_entity_async(db, User, user_id, lambda: db.scalar(base_user_query().where(User.id == user_id)))
+
+async def get_user_all_active(db: AsyncSession):
+    return (await db.scalars(base_user_query())).all()
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(base_user_query().where(User.email == email))
+
+async def get_user_by_nickname(db: AsyncSession, nickname: str):
+    return await db.scalar(base_user_query().where(User.nickname == nickname))
+
+# ---- TOURNAMENT ----
+def base_tournament_query():
+    return select(Tournament)
+
+def add_detail_field(tournament: Tournament) -> TournamentResponse:
+    """Async counterpart of crud.add_detail_filed_all_active; details must be loaded with the tournament."""
+    tournament_dict = dict(tournament.__dict__)
+    if tournament.participant_type == ParticipantEnum.team:
+        tournament_dict["team_details"] = tournament.team_tournament
+    else:
+        tournament_dict["solo_details"] = tournament.solo_tournament
+    return TournamentResponse(**tournament_dict)
+
+async def get_tournaments_all_active(db: AsyncSession, pagination: Pagination, order_by, start: int):
+    # both detail tables in one extra query each instead of two per tournament
+    return (await db.scalars(
+        base_tournament_query()
+        .options(selectinload(Tournament.team_tournament), selectinload(Tournament.solo_tournament))
+        .order_by(order_by(Tournament.id))
+        .limit(pagination.perPage)
+        .offset(start)
+    )).all()
+
+async def get_tournament_active(db: AsyncSession, tournament_id: int):
+    """The tournament with its details, cached like crud.get_tournament_active."""
+    return await cached_entity_async(
+        db, Tournament, tournament_id,
+        lambda: db.scalar(
+            base_tournament_query()
+            .options(selectinload(Tournament.team_tournament), selectinload(Tournament.solo_tournament))
+            .where(Tournament.id == tournament_id)
+        ),
+        relationships=("team_tournament", "solo_tournament"),
+    )
+
+async def get_tournament_detail_by_id_active(db: AsyncSession, tournament_id: int):
+    db_tournament = await get_tournament_active(db, tournament_id)
+
+    if not db_tournament:
+        return None
+
+    if db_tournament.participant_type == ParticipantEnum.team:
+        return db_tournament.team_tournament
+
+    if db_tournament.participant_type == ParticipantEnum.solo:
+        return db_tournament.solo_tournament
+    return None
+
+async def get_tournaments_by_sport(db: AsyncSession, sport: SportEnum):
+    return (await db.scalars(base_tournament_query().where(Tournament.sport == sport))).all()
+
+async def get_tournaments_by_location(db: AsyncSession, location: str):
+    return (await db.scalars(base_tournament_query().where(Tournament.location == location))).all()
+
+async def get_tournaments_by_visibility(db: AsyncSession, visibility: VisibilityEnum):
+    return (await db.scalars(base_tournament_query().where(Tournament.visibility == visibility))).all()
+
+async def get_tournaments_by_start_date(db: AsyncSession, start_date):
+    return (await db.scalars(base_tournament_query().where(Tournament.start_date == start_date))).all()
+
+async def get_tournaments_by_min_age(db: AsyncSession, min_age: int):
+    return (await db.scalars(base_tournament_query().where(Tournament.min_age >= min_age))).all()
+
+# ---- TEAM ----
+def base_team_query():
+    return select(Team)
+
+async def get_active_team(db: AsyncSession, team_id: int):
+    return await cached_entity_async(db, Team, team_id, lambda: db.scalar(base_team_query().where(Team.id == team_id)))
+
+async def get_teams_all_active(db: AsyncSession, pagination: Pagination, order_by, start: int):
+    return (await db.scalars(
+        base_team_query()
+        .order_by(order_by(Team.id))
+        .limit(pagination.perPage)
+        .offset(start)
+    )).all()
@@ -3,9 +3,11 @@ from fastapi import Depends, HTTPException, status, APIRouter, Form
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import get_async_db
 from schemas import TokenData
 from models import User
 
@@ -40,6 +42,16 @@ def authenticate_user(db: Session, username: str, password: str) -> User | bool:
         return False
     return user
 
+# async variants for the async def dependencies, which must not block the event loop
+async def get_user_async(db: AsyncSession, username: str) -> User | None:
+    return await db.scalar(select(User).where(User.nickname == username))
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str) -> User | bool:
+    user = await get_user_async(db, username)
+    if not user or not verify_password(password, user.hashed_password):
+        return False
+    return user
+
 # -----------------------------
 # JWT token
 # -----------------------------
@@ -57,9 +69,9 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
 async def login_for_access_token(
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = authenticate_user(db, username, password)
+    user = await authenticate_user_async(db, username, password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -75,7 +87,7 @@ async def login_for_access_token(
 # -----------------------------
 # Dependencies
 # -----------------------------
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -90,7 +102,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except InvalidTokenError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.nickname == token_data.username).first()
+    user = await get_user_async(db, token_data.username)
     if user is None:
         raise credentials_exception
     return user
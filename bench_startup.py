@@ -0,0 +1,79 @@
+"""
+Worker boot time, with and without a reachable database.
+
+    python bench_startup.py [--runs 5] [--unreachable-url postgresql+psycopg2://postgres@127.0.0.1:1/tourne]
+
+Each run starts a fresh interpreter that imports main and runs the app's
+startup (lifespan), as a uvicorn worker does, then reports how long the
+import and the startup took. The reachable case uses DATABASE_URL from the
+environment / .env.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BOOT = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def boot():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+booted = asyncio.run(boot())
+print(json.dumps({"import": imported - started, "startup": booted - imported}))
+"""
+
+
+def boot_once(env: dict) -> dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", BOOT],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    total = time.perf_counter() - started
+    if result.returncode != 0:
+        return {"failed": result.stderr.strip().splitlines()[-1] if result.stderr else "exit %d" % result.returncode}
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["total"] = total
+    return timings
+
+
+def run_case(name: str, env: dict, runs: int):
+    samples = [boot_once(env) for _ in range(runs)]
+    failures = [sample["failed"] for sample in samples if "failed" in sample]
+    if failures:
+        print(f"{name:<12} failed {len(failures)}/{runs}: {failures[0]}")
+        return
+
+    def ms(key):
+        return statistics.median(sample[key] for sample in samples) * 1000
+
+    print(f"{name:<12} import {ms('import'):8.1f} ms   startup {ms('startup'):8.1f} ms   process {ms('total'):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--unreachable-url", default="postgresql+psycopg2://postgres@127.0.0.1:1/tourne")
+    args = parser.parse_args()
+
+    print(f"median of {args.runs} boots")
+    run_case("reachable", dict(os.environ), args.runs)
+    unreachable = {**os.environ, "DATABASE_URL": args.unreachable_url}
+    # derived from DATABASE_URL again
+    unreachable.pop("ASYNC_DATABASE_URL", None)
+    run_case("unreachable", unreachable, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Creates the database schema. Run once per deploy, before starting the
+workers; the app itself never creates tables.
+
+    python bootstrap.py
+
+Safe to re-run: tables that already exist are left alone, and columns and
+indexes declared since a table was created are added to it. New NOT NULL
+columns need a server default for the rows already there. Changes to
+existing columns or indexes still need a manual migration.
+"""
+import sys
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import AddConstraint, CreateColumn
+from sqlalchemy.types import SchemaType
+
+from database import get_engine
+from models import Base
+
+
+def add_missing_columns(connection, table) -> list:
+    """Adds the columns of `table` its database table lacks; returns their names."""
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    missing = [column for column in table.columns if column.name not in existing]
+
+    for column in missing:
+        if not column.nullable and column.server_default is None:
+            raise RuntimeError(
+                f"Cannot add {table.name}.{column.name}: NOT NULL without a server default"
+            )
+    constraints = []
+    for column in missing:
+        if isinstance(column.type, SchemaType):
+            # e.g. the Postgres type of an Enum column
+            column.type.create(connection, checkfirst=True)
+        connection.execute(text("ALTER TABLE %s ADD COLUMN %s" % (
+            connection.dialect.identifier_preparer.format_table(table),
+            CreateColumn(column).compile(dialect=connection.dialect),
+        )))
+        constraints += [
+            foreign_key.constraint for foreign_key in column.foreign_keys
+            if foreign_key.constraint not in constraints
+        ]
+    for constraint in constraints:
+        connection.execute(AddConstraint(constraint))
+
+    return [column.name for column in missing]
+
+
+def bootstrap(engine) -> tuple:
+    """
+    Creates missing tables, columns and indexes; returns the names of the
+    tables it created and the "table.column" names of the columns it added.
+    """
+    existing = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+
+    # create_all skips existing tables, including columns and indexes added to them later
+    added = []
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name in existing:
+                added += [f"{table.name}.{name}" for name in add_missing_columns(connection, table)]
+                for index in table.indexes:
+                    index.create(connection, checkfirst=True)
+
+    created = [table.name for table in Base.metadata.sorted_tables if table.name not in existing]
+    return created, added
+
+
+def main() -> int:
+    engine = get_engine()
+    created, added = bootstrap(engine)
+    if created:
+        print("Created tables: " + ", ".join(created))
+    if added:
+        print("Added columns: " + ", ".join(added))
+    if not created and not added:
+        print("Schema is up to date")
+    engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,12 +2,12 @@ from datetime import datetime, date, timezone
 
 from enum import member
 
-from typing import Type, Union
+from typing import Optional, Type, Union
 
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, DeclarativeMeta
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 from fastapi import HTTPException, Query
 
@@ -16,11 +16,36 @@ from models import User, Tournament, SoloTournament, TeamTournament, Team, TeamM
 from schemas import UserCreate, UserAlter, SportEnum, ParticipantManualCreate, ParticipantManualAlter, ParticipantEnum, \
     TournamentCreate, Pagination, TournamentAlter, TeamUpdate, TournamentResponse, SoloTournamentAlter, \
     TeamTournamentAlter
+from match.bracket_document import invalidate_participant_names
+from database import after_commit
+import entity_cache
+from entity_cache import cached_entity
 
 
 # -------------------------
 # CRUD OPERATIONS
 # -------------------------
+# Writes only flush: the request's unit of work (database.unit_of_work)
+# commits once after the endpoint returns, and cache invalidations are
+# deferred with after_commit until then.
+
+def invalidate_cached(db: Session, model, *entity_ids: int):
+    """
+    Drops the cached rows (see get_active_user) once the request's
+    transaction commits: in this worker and the shared tier right away, in
+    the other workers when the NOTIFY reaches their listeners.
+    """
+    entity_cache.publish_invalidation(db, model, *entity_ids)
+    after_commit(db, lambda: entity_cache.invalidate(model, *entity_ids))
+
+def invalidate_names_cached(db: Session, tournament_id: Optional[int] = None):
+    """
+    Drops the cached participant names of a tournament after a roster
+    change, or of all tournaments after a rename, in every worker once the
+    request's transaction commits.
+    """
+    entity_cache.publish_names_invalidation(db, tournament_id)
+    after_commit(db, lambda: invalidate_participant_names(tournament_id))
 
 # ---- PAGINATION ----
 def pagination_params(
@@ -31,16 +56,21 @@ def pagination_params(
     return Pagination(perPage=perpage, page=page, order=order.value)
 
 def get_number_of_instances_active(db: Session, model: Type[DeclarativeMeta]):
-    return db.query(func.count(model.id)).filter(model.deleted_at.is_(None)).scalar()
+    return db.query(func.count(model.id)).scalar()
 
 def get_number_of_instances_all(db: Session, model: Type[DeclarativeMeta]):
-    return db.query(func.count(model.id)).scalar()
+    return db.query(func.count(model.id)).execution_options(include_deleted=True).scalar()
 
 def get_number_of_instances_by_id_active(db: Session, model: Type[DeclarativeMeta], instance_id: int):
-    return db.query(func.count(model.id)).filter(model.created_by == instance_id, model.deleted_at.is_(None)).scalar()
+    return db.query(func.count(model.id)).filter(model.created_by == instance_id).scalar()
 
 def get_number_of_instances_by_id_all(db: Session, model: Type[DeclarativeMeta], instance_id: int):
-    return db.query(func.count(model.id)).filter(model.created_by == instance_id).scalar()
+    return (
+        db.query(func.count(model.id))
+        .filter(model.created_by == instance_id)
+        .execution_options(include_deleted=True)
+        .scalar()
+    )
 
 # -- -- MANUAL PARTICIPANTS CRUD ----
 
@@ -53,8 +83,7 @@ def create_manual_participant(db: Session, participant: ParticipantManualCreate)
 
     try:
         db.add(db_manual_participant)
-        db.commit()
-        db.refresh(db_manual_participant)
+        db.flush()
         return db_manual_participant
     except IntegrityError:
         db.rollback()
@@ -64,19 +93,22 @@ def create_manual_participant(db: Session, participant: ParticipantManualCreate)
         )
 
 def get_manual_participant_by_id(db: Session, man_id: int):
-    return db.query(ManualParticipant).filter(ManualParticipant.id == man_id, ManualParticipant.deleted_at.is_(None)).first()
+    return db.query(ManualParticipant).filter(ManualParticipant.id == man_id).first()
 
 def get_manual_participant_by_name(db: Session, name: str):
-    return db.query(ManualParticipant).filter(ManualParticipant.name == name, ManualParticipant.deleted_at.is_(None)).first()
+    return db.query(ManualParticipant).filter(ManualParticipant.name == name).first()
 
 def get_manual_participant_by_name_and_creator(db: Session, name: str, created_by: int):
-    return db.query(ManualParticipant).filter(ManualParticipant.name == name, ManualParticipant.created_by == created_by, ManualParticipant.deleted_at.is_(None)).first()
+    return db.query(ManualParticipant).filter(ManualParticipant.name == name, ManualParticipant.created_by == created_by).first()
 
 def get_manual_active_participants(db: Session):
-    return db.query(ManualParticipant).filter(ManualParticipant.deleted_at.is_(None)).all()
+    return db.query(ManualParticipant).all()
+
+def get_manual_active_participants_by_creator(db: Session, created_by: int):
+    return db.query(ManualParticipant).filter(ManualParticipant.created_by == created_by).all()
 
 def get_manual_participants(db: Session):
-    return db.query(ManualParticipant).all()
+    return db.query(ManualParticipant).execution_options(include_deleted=True).all()
 
 def delete_manual_participant(db: Session, manual_participant_id: int):
     manual_participant = get_manual_participant_by_id(db, manual_participant_id)
@@ -88,8 +120,7 @@ def delete_manual_participant(db: Session, manual_participant_id: int):
         manual_participant.deleted_at = datetime.now(timezone.utc)
 
         try:
-            db.commit()
-            db.refresh(manual_participant)
+            db.flush()
         except IntegrityError:
             db.rollback()
             raise HTTPException(
@@ -105,19 +136,18 @@ def delete_all_participants_by_organizator_id(db: Session, created_by: int):
     if not user_db:
         return None
 
-    manual_participants = user_db.manual_participants
+    manual_participants = get_manual_active_participants_by_creator(db, created_by)
 
     for manual_participant in manual_participants:
         manual_participant.deleted_at = datetime.now(timezone.utc)
-        try:
-            db.commit()
-            db.refresh(manual_participant)
-        except IntegrityError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=400,
-                detail="Can't delete the manually entered participant."
-            )
+    try:
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Can't delete the manually entered participant."
+        )
     return 200
 def alter_manual_participant(db: Session, participant_id: int, update_data: ParticipantManualAlter):
     db_manual_participant = get_manual_participant_by_id(db, participant_id)
@@ -129,8 +159,9 @@ def alter_manual_participant(db: Session, participant_id: int, update_data: Part
         db_manual_participant.name = update_data.name
 
     try:
-        db.commit()
-        db.refresh(db_manual_participant)
+        db.flush()
+        if update_data.name is not None:
+            invalidate_names_cached(db)
         return db_manual_participant
     except IntegrityError:
         db.rollback()
@@ -141,7 +172,7 @@ def alter_manual_participant(db: Session, participant_id: int, update_data: Part
 
 # ---- USER CRUD ----
 def base_user_query(db: Session):
-    return db.query(User).filter(User.deleted_at.is_(None))
+    return db.query(User)
 
 def create_user(db: Session, user: UserCreate):
     db_user = User(
@@ -163,8 +194,7 @@ def create_user(db: Session, user: UserCreate):
 
     try:
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        db.flush()
         return db_user
     except IntegrityError:
         db.rollback()
@@ -173,22 +203,43 @@ def create_user(db: Session, user: UserCreate):
             detail="Invalid creator_id or duplicate participant"
         )
 
+# get_active_user, get_active_team and get_tournament_active (with its
+# details) are served from the entity cache; every write to those rows
+# calls invalidate_cached.
 def get_active_user(db: Session, user_id: int):
-    return base_user_query(db).filter(User.id == user_id).first()
+    return cached_entity(db, User, user_id, lambda: base_user_query(db).filter(User.id == user_id).first())
+
+def get_active_user_with_belongings(db: Session, user_id: int):
+    """The user with everything they created or joined loaded in one query per collection, for deleting them."""
+    return (
+        base_user_query(db)
+        .options(
+            selectinload(User.manual_participants),
+            selectinload(User.tournaments_created),
+            selectinload(User.team_created),
+            selectinload(User.team_memberships),
+            selectinload(User.tournament_participations),
+        )
+        .filter(User.id == user_id)
+        .first()
+    )
 
 def get_user_all(db: Session):
-    return db.query(User).all()
+    return db.query(User).execution_options(include_deleted=True).all()
 
 def get_user_all_active(db: Session):
     return base_user_query(db).all()
 
 def alter_user(db: Session, db_user: User, data: UserAlter):
     # Update only fields that were provided
-    for field, value in data.model_dump(exclude_none=True).items():
+    changes = data.model_dump(exclude_none=True)
+    for field, value in changes.items():
         setattr(db_user, field, value)
     try:
-        db.commit()
-        db.refresh(db_user)
+        db.flush()
+        invalidate_cached(db, User, db_user.id)
+        if "nickname" in changes:
+            invalidate_names_cached(db)
         return db_user
     except IntegrityError:
         db.rollback()
@@ -212,8 +263,8 @@ def delete_user(db: Session, user_id: int):
     user.deleted_at = datetime.now(timezone.utc)
 
     try:
-        db.commit()
-        db.refresh(user)
+        db.flush()
+        invalidate_cached(db, User, user_id)
         return user
     except IntegrityError:
         db.rollback()
@@ -224,15 +275,22 @@ def delete_user(db: Session, user_id: int):
 
 # ---- TOURNAMENT CRUD ----
 
+# Loader for the tournament's detail row: joined into the tournament query
+# instead of one more query per tournament in add_detail_filed_all_active
+TOURNAMENT_DETAILS = (joinedload(Tournament.team_tournament), joinedload(Tournament.solo_tournament))
+
 def base_tournament_query(db: Session):
-    return db.query(Tournament).filter(Tournament.deleted_at.is_(None))
+    return db.query(Tournament)
 
 def add_detail_filed_all_active(db, tournament: Tournament, user_id: int = None):
-    tournament_dict = tournament.__dict__
-    detail = get_tournament_detail_by_id_include_deleted(db, tournament.id)
-    
-    tournament_dict["team_details" if tournament.participant_type == ParticipantEnum.team else "solo_details"] = detail
-    
+    """Tournament response with its details; the tournament must be loaded with TOURNAMENT_DETAILS."""
+    tournament_dict = dict(tournament.__dict__)
+
+    if tournament.participant_type == ParticipantEnum.team:
+        tournament_dict["team_details"] = tournament.team_tournament
+    else:
+        tournament_dict["solo_details"] = tournament.solo_tournament
+
     if user_id:
         tournaments_user_participated = get_tournaments_by_participant_id(db, user_id)
         tournament_dict["joined"] = any(t.id == tournament.id for t in tournaments_user_participated)
@@ -259,52 +317,28 @@ def create_tournament(db: Session, data: TournamentCreate):
         location=data.location,
         rules=data.rules,
     )
-    try:
-        db.add(tournament)
-        db.flush()  # get tournament.id
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid creator_id or duplicate participant"
-        )
 
+    # attached through the relationship, so the response reads it without a query
     if data.participant_type == ParticipantEnum.team:
-
-        team = TeamTournament(
-            tournament_id=tournament.id,
+        tournament.team_tournament = TeamTournament(
             max_teams=data.team_details.max_teams,
             players_per_team=data.team_details.players_per_team,
         )
 
-        try:
-            db.add(team)
-            db.commit()
-            db.refresh(team)
-        except IntegrityError:
-            db.rollback()
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid creator_id or duplicate participant"
-            )
-
     if data.participant_type == ParticipantEnum.solo:
-        solo = SoloTournament(
-            tournament_id=tournament.id,
+        tournament.solo_tournament = SoloTournament(
             max_players=data.solo_details.max_players,
         )
-        try:
-            db.add(solo)
-            db.commit()
-            db.refresh(solo)
-        except IntegrityError:
-            db.rollback()
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid creator_id or duplicate participant"
-            )
 
-    db.refresh(tournament)
+    try:
+        db.add(tournament)
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid creator_id or duplicate participant"
+        )
 
     return tournament
 
@@ -324,8 +358,8 @@ def alter_tournament(db: Session, db_tournament: Tournament, data: TournamentAlt
             setattr(db_tournament, field, value)
 
     try:
-        db.commit()
-        db.refresh(db_tournament)
+        db.flush()
+        invalidate_cached(db, Tournament, db_tournament.id)
         return add_detail_filed_all_active(db, db_tournament)
     except IntegrityError:
         db.rollback()
@@ -347,12 +381,10 @@ def get_tournament_detail_by_id_active(db: Session, tournament_id: int):
         return None
 
     if db_tournament.participant_type == ParticipantEnum.team:
-        detail = get_team_tournament_by_tournament_id(db, tournament_id)
-        return detail
+        return db_tournament.team_tournament
 
     if db_tournament.participant_type == ParticipantEnum.solo:
-        detail = get_solo_tournament_by_tournament_id(db, tournament_id)
-        return detail
+        return db_tournament.solo_tournament
     return None
 def get_tournament_detail_by_id_include_deleted(db: Session, tournament_id: int):
     db_tournament = get_tournament_including_deleted(db, tournament_id)
@@ -361,12 +393,10 @@ def get_tournament_detail_by_id_include_deleted(db: Session, tournament_id: int)
         return None
 
     if db_tournament.participant_type == ParticipantEnum.team:
-        detail = get_team_tournament_by_tournament_id(db, tournament_id)
-        return detail
+        return db_tournament.team_tournament
 
     if db_tournament.participant_type == ParticipantEnum.solo:
-        detail = get_solo_tournament_by_tournament_id(db, tournament_id)
-        return detail
+        return db_tournament.solo_tournament
     return None
 def alter_solo_tournament_detail_by_tournament_id(db: Session, tournament_detail: SoloTournament,
                                                   updated_data: SoloTournamentAlter):
@@ -375,8 +405,7 @@ def alter_solo_tournament_detail_by_tournament_id(db: Session, tournament_detail
             setattr(tournament_detail, field, value)
 
     try:
-        db.commit()
-        db.refresh(tournament_detail)
+        db.flush()
     except IntegrityError:
         raise HTTPException(status_code=400, detail="Can't save changes to tournament detail")
 
@@ -387,8 +416,7 @@ def alter_team_tournament_detail_by_tournament_id(db: Session, tournament_detail
             setattr(tournament_detail, field, value)
 
     try:
-        db.commit()
-        db.refresh(tournament_detail)
+        db.flush()
     except IntegrityError:
         raise HTTPException(status_code=400, detail="Can't save changes to tournament detail")
 
@@ -401,6 +429,7 @@ def alter_team_tournament_detail_by_tournament_id(db: Session, tournament_detail
 def get_tournaments_all_active(db: Session, pagination: Pagination, order_by, start: int):
     return (
         base_tournament_query(db)
+        .options(*TOURNAMENT_DETAILS)
         .order_by(order_by(Tournament.id))
         .limit(pagination.perPage)
         .offset(start)
@@ -410,6 +439,8 @@ def get_tournaments_all_active(db: Session, pagination: Pagination, order_by, st
 def get_tournaments_all(db: Session, pagination: Pagination, order_by, start: int):
     return (
         db.query(Tournament)
+        .options(*TOURNAMENT_DETAILS)
+        .execution_options(include_deleted=True)
         .order_by(order_by(Tournament.id))
         .limit(pagination.perPage)
         .offset(start)
@@ -420,6 +451,7 @@ def get_mytournaments_all_active(db: Session, pagination: Pagination, order_by,
     return (
         base_tournament_query(db)
         .filter(Tournament.created_by == created_by)
+        .options(*TOURNAMENT_DETAILS)
         .order_by(order_by(Tournament.id))
         .limit(pagination.perPage)
         .offset(start)
@@ -430,6 +462,8 @@ def get_mytournaments_all(db: Session, pagination: Pagination, order_by, start:
     return (
         db.query(Tournament)
         .filter(Tournament.created_by == created_by)
+        .options(*TOURNAMENT_DETAILS)
+        .execution_options(include_deleted=True)
         .order_by(order_by(Tournament.id))
         .limit(pagination.perPage)
         .offset(start)
@@ -447,6 +481,7 @@ def get_mytournaments_organized_history(db: Session, pagination: Pagination, ord
                 (Tournament.end_date.is_(None)) & (Tournament.start_date < today),
             )
         )
+        .options(*TOURNAMENT_DETAILS)
         .order_by(order_by(Tournament.id))
         .limit(pagination.perPage)
         .offset(start)
@@ -464,17 +499,31 @@ def get_mytournaments_history(db: Session, pagination: Pagination, order_by, sta
                 (Tournament.end_date.is_(None)) & (Tournament.start_date < today),
             )
         )
+        .options(*TOURNAMENT_DETAILS)
         .order_by(order_by(Tournament.id))
         .limit(pagination.perPage)
         .offset(start)
         .all()
     )
 
+# detail relationships cached together with the tournament
+TOURNAMENT_DETAIL_NAMES = ("team_tournament", "solo_tournament")
+
 def get_tournament_active(db: Session, tournament_id: int):
-    return base_tournament_query(db).filter(Tournament.id == tournament_id).first()
+    return cached_entity(
+        db, Tournament, tournament_id,
+        lambda: base_tournament_query(db).options(*TOURNAMENT_DETAILS).filter(Tournament.id == tournament_id).first(),
+        relationships=TOURNAMENT_DETAIL_NAMES,
+    )
 
 def get_tournament_including_deleted(db: Session, tournament_id: int):
-    return db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    return (
+        db.query(Tournament)
+        .options(*TOURNAMENT_DETAILS)
+        .execution_options(include_deleted=True)
+        .filter(Tournament.id == tournament_id)
+        .first()
+    )
 
 def get_tournaments_by_sport(db: Session, sport: SportEnum):
     return base_tournament_query(db).filter(Tournament.sport == sport).all()
@@ -495,25 +544,20 @@ def get_tournaments_by_min_age(db: Session, min_age: int):
     return base_tournament_query(db).filter(Tournament.min_age >= min_age).all()
 
 def get_tournaments_by_participant_id(db: Session, user_id: int):
-    tournaments = []
-
-    solo_participants = db.query(TournamentParticipant).filter(TournamentParticipant.user_id == user_id).all()
-    for sp in solo_participants:
-        t = base_tournament_query(db).filter(Tournament.id == sp.tournament_id).first()
-        if t and t not in tournaments:
-            tournaments.append(t)
-
-    team_members = db.query(TeamMember).filter(TeamMember.user_id == user_id).all()
-    for tm in team_members:
-        ttm_entries = db.query(TournamentTeamMember).filter(TournamentTeamMember.team_id == tm.team_id).all()
-        for ttm in ttm_entries:
-            t = base_tournament_query(db).filter(Tournament.id == ttm.tournament_id).first()
-            if t and t not in tournaments:
-                tournaments.append(t)
-
-    return tournaments
-
-
+    """Tournaments the user entered on their own or with one of their teams, in one query."""
+    solo = select(TournamentParticipant.tournament_id).where(TournamentParticipant.user_id == user_id)
+    with_team = (
+        select(TournamentTeamMember.tournament_id)
+        .join(TeamMember, TeamMember.team_id == TournamentTeamMember.team_id)
+        .where(TeamMember.user_id == user_id)
+    )
+    return (
+        base_tournament_query(db)
+        .options(*TOURNAMENT_DETAILS)
+        .filter(or_(Tournament.id.in_(solo), Tournament.id.in_(with_team)))
+        .order_by(Tournament.id)
+        .all()
+    )
 
 def delete_tournament(db: Session, tournament_id: int):
     db_tournament = get_tournament_active(db, tournament_id)
@@ -524,8 +568,8 @@ def delete_tournament(db: Session, tournament_id: int):
     db_tournament.deleted_at = datetime.now(timezone.utc)
 
     try:
-        db.commit()
-        db.refresh(db_tournament)
+        db.flush()
+        invalidate_cached(db, Tournament, tournament_id)
         return db_tournament
     except IntegrityError:
         db.rollback()
@@ -536,7 +580,7 @@ def delete_tournament(db: Session, tournament_id: int):
 
 # ---- TEAM CRUD ----
 def base_team_query(db: Session):
-    return db.query(Team).filter(Team.deleted_at.is_(None))
+    return db.query(Team)
 
 def create_team(db: Session, data, creator_id: int):
     team_data = {k: v for k, v in data.__dict__.items() if k != "created_by"}
@@ -544,8 +588,7 @@ def create_team(db: Session, data, creator_id: int):
 
     try:
         db.add(team)
-        db.commit()
-        db.refresh(team)
+        db.flush()
         existing_member = db.query(TeamMember).filter(
             TeamMember.team_id == team.id,
             TeamMember.user_id == creator_id
@@ -554,8 +597,7 @@ def create_team(db: Session, data, creator_id: int):
         if not existing_member:
             creator_member = TeamMember(team_id=team.id, user_id=creator_id)
             db.add(creator_member)
-            db.commit()
-            db.refresh(creator_member)
+            db.flush()
 
         return team
     except IntegrityError:
@@ -566,11 +608,12 @@ def create_team(db: Session, data, creator_id: int):
 
 
 def get_active_team(db: Session, team_id: int):
-    return base_team_query(db).filter(Team.id == team_id).first()
+    return cached_entity(db, Team, team_id, lambda: base_team_query(db).filter(Team.id == team_id).first())
 
 def get_teams_all(db: Session, pagination: Pagination, order_by, start: int):
     return (
         db.query(Team)
+        .execution_options(include_deleted=True)
         .order_by(order_by(Team.id))
         .limit(pagination.perPage)
         .offset(start)
@@ -590,6 +633,7 @@ def get_my_all_teams(db: Session, pagination: Pagination, order_by, start: int,
     return (
         db.query(Team)
         .filter(Team.created_by == created_by)
+        .execution_options(include_deleted=True)
         .order_by(order_by(Team.id))
         .limit(pagination.perPage)
         .offset(start)
@@ -624,38 +668,38 @@ def get_teams_by_min_age(db: Session, min_age: int):
 
 def get_teams_by_user_id(db: Session, user: User):
     teams = (
-        db.query(Team)
-        .filter(Team.created_by == user.id, Team.deleted_at.is_(None))
+        base_team_query(db)
+        .filter(Team.created_by == user.id)
         .options(joinedload(Team.members))
         .all()
     )
     for team in teams:
-        team.current_players = len([m for m in team.members if m.deleted_at is None])
+        team.current_players = len(team.members)
 
     return teams
 
 def get_teams_with_members_by_user(db: Session, user_id: int):
-    user = db.query(User).filter(User.id == user_id, User.deleted_at.is_(None)).first()
+    user = get_active_user(db, user_id)
     if not user:
         return []
 
     teams = (
-        db.query(Team)
-        .filter(Team.created_by == user_id, Team.deleted_at.is_(None))
+        base_team_query(db)
+        .filter(Team.created_by == user_id)
         .options(joinedload(Team.members).joinedload(TeamMember.user))
         .all()
     )
 
     result = []
     for team in teams:
-        active_members_count = len([m for m in team.members if m.deleted_at is None])
+        active_members_count = len(team.members)
         result.append({
             "id": team.id,
             "name": team.name,
             "sport": team.sport.value if team.sport else None,
             "max_players": team.max_players,
             "current_players": active_members_count,  # ⚡ Calculado dinamicamente
-            "members": [{"id": m.user.id, "name": m.user.name} for m in team.members if m.deleted_at is None],
+            "members": [{"id": m.user.id, "name": m.user.name} for m in team.members],
             "location": team.location,
             "min_age": team.min_age,
             "visibility": team.visibility.value if team.visibility else None,
@@ -665,12 +709,15 @@ def get_teams_with_members_by_user(db: Session, user_id: int):
 
 
 def alter_team(db: Session, updated_data: TeamUpdate, db_team: Team):
-    for field, value in updated_data.model_dump(exclude_none=True).items():
+    changes = updated_data.model_dump(exclude_none=True)
+    for field, value in changes.items():
         setattr(db_team, field, value)
 
     try:
-        db.commit()
-        db.refresh(db_team)
+        db.flush()
+        invalidate_cached(db, Team, db_team.id)
+        if "name" in changes:
+            invalidate_names_cached(db)
         return db_team
     except IntegrityError:
         db.rollback()
@@ -688,8 +735,8 @@ def delete_team(db: Session, team_id: int):
     db_team.deleted_at = datetime.now(timezone.utc)
 
     try:
-        db.commit()
-        db.refresh(db_team)
+        db.flush()
+        invalidate_cached(db, Team, team_id)
         return db_team
     except IntegrityError:
         db.rollback()
@@ -733,8 +780,8 @@ def delete_tournament_members(db: Session, tournament_id: int, user_id: int):
     db_tournament_participant.deleted_at = datetime.now(timezone.utc)
 
     try:
-        db.commit()
-        db.refresh(db_tournament_participant)
+        db.flush()
+        invalidate_names_cached(db, tournament_id)
         return None
     except IntegrityError:
         db.rollback()
@@ -746,8 +793,7 @@ def delete_tournament_members(db: Session, tournament_id: int, user_id: int):
 def delete_tournament_team_members(db: Session, team_id: int, tournament_id: int):
     db.query(TournamentParticipant).filter(TournamentParticipant.team_id == team_id,
                                             TournamentParticipant.tournament_id == tournament_id).delete()
-    db.commit()
-    db.refresh(TournamentParticipant)
+    invalidate_names_cached(db, tournament_id)
     return None
 
 # ---- TEAM MEMBERS CRUD ----
@@ -782,23 +828,24 @@ def join_team(db: Session, team_id: int, user_id: int, password: str | None):
     # Already member
     existing_member = db.query(TeamMember).filter(
         TeamMember.team_id == team_id,
-        TeamMember.user_id == user_id,
-        TeamMember.deleted_at.is_(None)
+        TeamMember.user_id == user_id
     ).first()
 
     if existing_member:
         return existing_member
 
     # Team full
-    if len(team.members) >= team.max_players:
+    members = db.query(func.count(TeamMember.id)).filter(
+        TeamMember.team_id == team_id
+    ).scalar()
+    if members >= team.max_players:
         raise HTTPException(status_code=403, detail="Team is full")
 
     new_member = TeamMember(team_id=team_id, user_id=user_id)
 
     try:
         db.add(new_member)
-        db.commit()
-        db.refresh(new_member)
+        db.flush()
     except IntegrityError as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
@@ -815,17 +862,18 @@ def leave_team(db: Session, team_id: int, user_id: int):
         raise HTTPException(status_code=404, detail="User not found")
 
     # Already member
-    existing_member = db.query(TeamMember).filter(TeamMember.team_id == team_id, TeamMember.user_id == user_id,
-                                                  TeamMember.deleted_at.is_(None)).first()
+    existing_member = db.query(TeamMember).filter(TeamMember.team_id == team_id, TeamMember.user_id == user_id).first()
 
     if not existing_member:
         raise HTTPException(status_code=404, detail="User is not in this team")
 
     existing_member.deleted_at = datetime.now(timezone.utc)
+    # decremented in SQL: `team` may come from the entity cache
+    team.current_players = Team.current_players - 1
 
     try:
-        db.commit()
-        db.refresh(existing_member)
+        db.flush()
+        invalidate_cached(db, Team, team_id)
     except IntegrityError:
         db.rollback()
         raise HTTPException(
@@ -833,21 +881,12 @@ def leave_team(db: Session, team_id: int, user_id: int):
             detail="Can't delete the instance of TeamMember table."
         )
 
-    team.current_players -= 1
-    try:
-        db.commit()
-        db.refresh(team)
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=400,
-            detail="Can't change the current number of players."
-        )
-
     # if someone leave the team, team is not full and can't take part in tournament
-    if team.tournament_participations:
-        for tournament_participant in team.tournament_participations:
-            tournament_participant.deleted_at = datetime.now(timezone.utc)
+    tournament_participations = db.query(TournamentParticipant).filter(
+        TournamentParticipant.team_id == team_id
+    ).all()
+    for tournament_participant in tournament_participations:
+        tournament_participant.deleted_at = datetime.now(timezone.utc)
 
     return {"message": "Left the team successfully"}
 
@@ -869,8 +908,7 @@ def join_tournament_solo(db: Session, tournament: Tournament, user_id: int):
         db.query(TournamentParticipant)
         .filter(
             TournamentParticipant.tournament_id == tournament.id,
-            TournamentParticipant.user_id == user_id,
-            TournamentParticipant.deleted_at.is_(None)
+            TournamentParticipant.user_id == user_id
         )
         .first()
     )
@@ -879,27 +917,27 @@ def join_tournament_solo(db: Session, tournament: Tournament, user_id: int):
 
     # 5️⃣ Cria o participante
     new_participant = TournamentParticipant(tournament_id=tournament.id, user_id=user_id)
+    # incremented in SQL: `tournament` may come from the entity cache, and
+    # concurrent joins must not overwrite each other's count
+    tournament.solo_tournament.current_players = SoloTournament.current_players + 1
     try:
         db.add(new_participant)
-        db.commit()
-        db.refresh(new_participant)
-    except:
+        db.flush()
+    except IntegrityError:
         db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Can't add new participant."
         )
-    tournament_detail = get_tournament_detail_by_id_active(db, tournament.id)
-    tournament_detail.current_players += 1
-    try:
-        db.commit()
-        db.refresh(tournament_detail)
-    except:
-        db.rollback()
+    # the check above read a possibly stale count; this one reads the row
+    # after the locking UPDATE, so the unit of work rolls back a join past the limit
+    if tournament.solo_tournament.current_players > tournament.solo_tournament.max_players:
         raise HTTPException(
             status_code=400,
-            detail="Can't update current number of participants."
+            detail="Tournament is full."
         )
+    invalidate_cached(db, Tournament, tournament.id)
+    invalidate_names_cached(db, tournament.id)
 
     return new_participant
 
@@ -915,18 +953,21 @@ def join_tournament_team(db: Session, tournament: Tournament, team_id: int, user
         raise HTTPException(status_code=400, detail="Your team is not full.")
     existing_team = db.query(TournamentParticipant).filter(
         TournamentParticipant.tournament_id == tournament.id,
-        TournamentParticipant.team_id == team_id,
-        TournamentParticipant.deleted_at.is_(None)
+        TournamentParticipant.team_id == team_id
     ).first()
     if existing_team:
         raise HTTPException(status_code=409, detail="Already joined the tournament")
     tournament_team = TournamentParticipant(tournament_id=tournament.id, team_id=team_id)
     db.add(tournament_team)
-    tournament.team_tournament.current_teams += 1
+    # incremented in SQL, like current_players in join_tournament_solo
+    tournament.team_tournament.current_teams = TeamTournament.current_teams + 1
 
     try:
         db.flush() 
-        for member in team.members:
+        members = db.query(TeamMember).filter(
+            TeamMember.team_id == team_id
+        ).all()
+        for member in members:
             if not member.user_id:
                 print(f"⚠️ Skipping member with invalid user_id: {member.id}")
                 continue
@@ -938,9 +979,11 @@ def join_tournament_team(db: Session, tournament: Tournament, team_id: int, user
             db.add(snapshot)
             print(f"Added snapshot for user {member.user_id}")
 
-        db.commit()
-        db.refresh(tournament_team)
-        db.refresh(tournament.team_tournament)
+        db.flush()
+        if tournament.team_tournament.current_teams > tournament.team_tournament.max_teams:
+            raise HTTPException(status_code=400, detail="Tournament is full.")
+        invalidate_cached(db, Tournament, tournament.id)
+        invalidate_names_cached(db, tournament.id)
         print("✅ Tournament team joined successfully")
 
     except IntegrityError as e:
@@ -951,21 +994,22 @@ def join_tournament_team(db: Session, tournament: Tournament, team_id: int, user
     return tournament_team
 
 def leave_tournament(db: Session, tournament_id: int, user_id: int):
-    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    tournament = get_tournament_including_deleted(db, tournament_id)
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
     if tournament.participant_type == 'solo':
         existing_member = db.query(TournamentParticipant).filter(
             TournamentParticipant.tournament_id == tournament.id,
-            TournamentParticipant.user_id == user_id, TournamentParticipant.deleted_at.is_(None)
+            TournamentParticipant.user_id == user_id
         ).first()
         if existing_member:
             db.delete(existing_member)
             if tournament.solo_tournament.current_players > 0:
                 tournament.solo_tournament.current_players -= 1
             db.add(tournament)
-            db.commit()
-            db.refresh(tournament)
+            db.flush()
+            invalidate_cached(db, Tournament, tournament.id)
+            invalidate_names_cached(db, tournament.id)
             return tournament
         return None
     elif tournament.participant_type == 'team':
@@ -983,8 +1027,9 @@ def leave_tournament(db: Session, tournament_id: int, user_id: int):
         if tournament.team_tournament.current_teams > 0:
             tournament.team_tournament.current_teams -= 1
         db.add(tournament)
-        db.commit()
-        db.refresh(tournament)
+        db.flush()
+        invalidate_cached(db, Tournament, tournament.id)
+        invalidate_names_cached(db, tournament.id)
         return tournament
     else:
         return None
@@ -996,19 +1041,19 @@ def leave_tournament_solo(db: Session, tournament_id: int, user_id: int):
 
     existing_member = db.query(TournamentParticipant).filter(
         TournamentParticipant.tournament_id == tournament_id,
-        TournamentParticipant.user_id == user_id, TournamentParticipant.deleted_at.is_(None)
+        TournamentParticipant.user_id == user_id
     ).first()
 
     if existing_member:
         existing_member.deleted_at = datetime.now(timezone.utc)
 
-        tournament_detail = get_tournament_detail_by_id_active(db, tournament_id)
-        tournament_detail.current_players -= 1
+        # decremented in SQL: `tournament` may come from the entity cache
+        tournament.solo_tournament.current_players = SoloTournament.current_players - 1
 
         try:
-            db.commit()
-            db.refresh(tournament_detail)
-            db.refresh(existing_member)
+            db.flush()
+            invalidate_cached(db, Tournament, tournament_id)
+            invalidate_names_cached(db, tournament_id)
         except IntegrityError:
             db.rollback()
             raise HTTPException(status_code=400, detail='Something went wrong during leaving tournament.')
@@ -1023,18 +1068,18 @@ def leave_tournament_team(db: Session, tournament_id: int, team_id: int):
 
     existing_team = db.query(TournamentParticipant).filter(
         TournamentParticipant.tournament_id == tournament_id,
-        TournamentParticipant.team_id == team_id, TournamentParticipant.deleted_at.is_(None)
+        TournamentParticipant.team_id == team_id
     ).first()
 
     if existing_team:
         existing_team.deleted_at = datetime.now(timezone.utc)
 
-        tournament_detail = get_tournament_detail_by_id_active(db, tournament_id)
-        tournament_detail.current_teams -= 1
+        # decremented in SQL: `tournament` may come from the entity cache
+        tournament.team_tournament.current_teams = TeamTournament.current_teams - 1
         try:
-            db.commit()
-            db.refresh(tournament_detail)
-            db.refresh(existing_team)
+            db.flush()
+            invalidate_cached(db, Tournament, tournament_id)
+            invalidate_names_cached(db, tournament_id)
         except IntegrityError:
             db.rollback()
             raise HTTPException(status_code=400, detail='Something went wrong during leaving tournament.')
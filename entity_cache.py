@@ -0,0 +1,469 @@
+import enum
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as time_of_day
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, Enum, Time, inspect, text
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from match.bracket_document import invalidate_participant_names
+
+logger = logging.getLogger(__name__)
+
+# (table name, primary key)
+CacheKey = Tuple[str, int]
+
+# Postgres channel every worker LISTENs on for rows changed by the others
+INVALIDATION_CHANNEL = "entity_invalidations"
+
+# NOTIFY payloads are capped at 8000 bytes; past this many ids the receiving
+# workers drop their whole in-process tier instead
+MAX_INVALIDATION_IDS = 500
+
+
+class CacheStats:
+    """Lookups answered by each tier, misses, and what was dropped and why."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, amount: int = 1):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            counts = dict(self.counts)
+        lookups = counts.get("local_hits", 0) + counts.get("shared_hits", 0) + counts.get("misses", 0)
+        hits = counts.get("local_hits", 0) + counts.get("shared_hits", 0)
+        return {**counts, "hit_ratio": round(hits / lookups, 4) if lookups else 0.0}
+
+
+class LRUCache:
+    """
+    In-process tier: at most `max_entries` values, each dropped `ttl`
+    seconds after it was stored. `generation` counts deletions; a value read
+    from the database before a deletion is refused, since the row may have
+    changed in between.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, stats: CacheStats):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = stats
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[CacheKey, Tuple[float, dict]]" = OrderedDict()
+        self.generation = 0
+
+    def get(self, key: CacheKey) -> Optional[dict]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                self.stats.add("expirations")
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: CacheKey, value: dict, generation: Optional[int] = None) -> bool:
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats.add("evictions")
+            return True
+
+    def delete(self, keys: Iterable[CacheKey]):
+        with self.lock:
+            self.generation += 1
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class LocalSharedBackend:
+    """
+    Stand-in for the shared tier in development and single-worker setups:
+    same interface and serialization as RedisBackend, kept in this process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Tuple[float, bytes]] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.entries.pop(key, None)
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, keys: Iterable[str]):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+
+class RedisBackend:
+    """Shared tier in Redis, so every worker fills and reads the same entries."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("ENTITY_CACHE_SHARED_URL points to Redis, but the redis package is not installed")
+        # connects on first use, not here
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(key, value, px=int(ttl * 1000))
+
+    def delete(self, keys: Iterable[str]):
+        keys = list(keys)
+        if keys:
+            self.client.delete(*keys)
+
+
+def shared_backend(url: Optional[str]):
+    if not url:
+        return None
+    if url == "local":
+        return LocalSharedBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported ENTITY_CACHE_SHARED_URL: {url}")
+
+
+class EntityCache:
+    """
+    Two tiers of row snapshots: the in-process LRU first, then the optional
+    shared backend, whose hits are copied into the LRU. A failing shared
+    backend is logged and skipped; the database answers instead.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, shared=None):
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self.local = LRUCache(max_entries, ttl, self.stats)
+        self.shared = shared
+
+    @staticmethod
+    def shared_key(key: CacheKey) -> str:
+        return "entity:%s:%d" % key
+
+    def get(self, key: CacheKey) -> Optional[dict]:
+        value = self.local.get(key)
+        if value is not None:
+            self.stats.add("local_hits")
+            return value
+        if self.shared is not None:
+            try:
+                stored = self.shared.get(self.shared_key(key))
+            except Exception:
+                logger.warning("Shared entity cache read failed", exc_info=True)
+                self.stats.add("shared_errors")
+                stored = None
+            if stored is not None:
+                value = json.loads(stored)
+                self.local.set(key, value)
+                self.stats.add("shared_hits")
+                return value
+        self.stats.add("misses")
+        return None
+
+    @property
+    def generation(self) -> int:
+        return self.local.generation
+
+    def set(self, key: CacheKey, value: dict, generation: int):
+        """Stores a row read while the cache was at `generation`, unless something was invalidated since."""
+        if not self.local.set(key, value, generation):
+            return
+        self.stats.add("fills")
+        if self.shared is not None:
+            try:
+                self.shared.set(self.shared_key(key), json.dumps(shareable(value)).encode(), self.ttl)
+            except Exception:
+                logger.warning("Shared entity cache write failed", exc_info=True)
+                self.stats.add("shared_errors")
+
+    def invalidate(self, keys: Iterable[CacheKey], counter: str = "invalidations"):
+        keys = list(keys)
+        self.local.delete(keys)
+        self.stats.add(counter, len(keys))
+        if self.shared is not None:
+            try:
+                self.shared.delete(self.shared_key(key) for key in keys)
+            except Exception:
+                logger.warning("Shared entity cache delete failed", exc_info=True)
+                self.stats.add("shared_errors")
+
+    def clear_local(self):
+        self.local.clear()
+        self.stats.add("local_clears")
+
+    def status(self) -> dict:
+        return {
+            "entries": len(self.local),
+            "max_entries": self.local.max_entries,
+            "ttl_seconds": self.ttl,
+            "shared": type(self.shared).__name__ if self.shared is not None else None,
+            **self.stats.snapshot(),
+        }
+
+
+# replaced from the environment by database.py
+_cache = EntityCache(max_entries=10000, ttl=30)
+
+
+def configure_entity_cache(max_entries: int, ttl: float, shared_url: Optional[str] = None):
+    global _cache
+    _cache = EntityCache(max_entries, ttl, shared_backend(shared_url))
+
+
+def cache_status() -> dict:
+    return _cache.status()
+
+
+def cache_key(model, entity_id: int) -> CacheKey:
+    return model.__tablename__, int(entity_id)
+
+
+def invalidate(model, *entity_ids: int):
+    """Drops the cached rows of this worker and of the shared tier."""
+    _cache.invalidate(cache_key(model, entity_id) for entity_id in entity_ids)
+
+
+# ------------------------------------------------------------------
+# Invalidation across workers
+# ------------------------------------------------------------------
+# Every worker has its own in-process tier. The worker that wrote a row
+# drops it from its own tier and the shared one after commit (invalidate);
+# the others hear about it through NOTIFY and drop it from theirs and from
+# the shared tier again: a worker that read the row before the commit may
+# have stored the old value there after the writer's delete, since its
+# generation only changes once the NOTIFY arrives. The participant names
+# shown in brackets travel the same way.
+
+def _origin() -> str:
+    # read on every call: workers forked from a preloaded app share module state
+    return "%s:%d" % (socket.gethostname(), os.getpid())
+
+
+def _notify(db: Session, event: dict):
+    payload = json.dumps({**event, "origin": _origin()})
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": INVALIDATION_CHANNEL, "payload": payload})
+
+
+def publish_invalidation(db: Session, model, *entity_ids: int):
+    """
+    Tells the other workers to drop these rows. The NOTIFY runs inside the
+    caller's transaction, so it is only delivered if that transaction
+    commits, once the new values are visible to them.
+    """
+    if not entity_ids:
+        return
+    ids = [int(entity_id) for entity_id in entity_ids]
+    _notify(db, {
+        "table": model.__tablename__,
+        "ids": ids if len(ids) <= MAX_INVALIDATION_IDS else None,
+    })
+
+
+def publish_names_invalidation(db: Session, tournament_id: Optional[int] = None):
+    """publish_invalidation for the participant names of one tournament, or of all of them after a rename."""
+    _notify(db, {"names": True, "tournament_id": tournament_id})
+
+
+def dispatch_invalidation(payload: str):
+    """Drops the rows or names of a received invalidation from this worker's in-process caches."""
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        logger.warning("Dropping malformed entity invalidation: %r", payload)
+        return
+
+    if event.get("origin") == _origin():
+        # already dropped after the commit
+        return
+    if event.get("names"):
+        invalidate_participant_names(event.get("tournament_id"))
+        return
+    if event.get("ids") is None:
+        _cache.clear_local()
+        return
+    _cache.invalidate(
+        ((event["table"], int(entity_id)) for entity_id in event["ids"]),
+        "remote_invalidations",
+    )
+
+
+def clear_local():
+    """
+    Empties this worker's in-process tier, e.g. after its listener
+    reconnected and may have missed invalidations while it was down.
+    """
+    _cache.clear_local()
+
+
+# ------------------------------------------------------------------
+# Row snapshots
+# ------------------------------------------------------------------
+# The cache holds plain column values, never ORM instances: each session
+# gets its own instance, as if it had loaded the row itself. Snapshots are
+# JSON, since they travel to the shared tier: dates, times and enums are
+# stored as strings and turned back by their column's type on restore.
+# Secrets never leave the process: the shared tier gets snapshots without
+# them, and instances restored from those load them on first access.
+
+UNSHARED_COLUMNS = frozenset({"hashed_password"})
+
+
+def encode_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, time_of_day)):
+        # datetimes included
+        return value.isoformat()
+    return value
+
+
+def decode_value(column_type, value):
+    if value is None:
+        return None
+    if isinstance(column_type, Enum) and column_type.enum_class is not None:
+        return column_type.enum_class(value)
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column_type, Date):
+        return date.fromisoformat(value)
+    if isinstance(column_type, Time):
+        return time_of_day.fromisoformat(value)
+    return value
+
+
+def snapshot(obj, relationships: Tuple[str, ...] = ()) -> dict:
+    mapper = inspect(obj).mapper
+    return {
+        "columns": {attr.key: encode_value(getattr(obj, attr.key)) for attr in mapper.column_attrs},
+        # one-to-one relationships loaded with the row, e.g. tournament details
+        "relationships": {
+            name: snapshot(getattr(obj, name)) if getattr(obj, name) is not None else None
+            for name in relationships
+        },
+    }
+
+
+def shareable(data: dict) -> dict:
+    """The snapshot without UNSHARED_COLUMNS, for the shared tier."""
+    return {
+        "columns": {key: value for key, value in data["columns"].items() if key not in UNSHARED_COLUMNS},
+        "relationships": {
+            name: shareable(related) if related is not None else None
+            for name, related in data["relationships"].items()
+        },
+    }
+
+
+def restore(db: Session, model, data: dict):
+    """Puts a snapshot into the session as a persistent, unmodified instance; no query is issued."""
+    mapper = inspect(model)
+    columns = data["columns"]
+    primary_key = [columns[mapper.get_property_by_column(column).key] for column in mapper.primary_key]
+    existing = db.identity_map.get(mapper.identity_key_from_primary_key(primary_key))
+    if existing is not None:
+        return existing
+
+    obj = mapper.class_manager.new_instance()
+    for key, value in columns.items():
+        set_committed_value(obj, key, decode_value(mapper.column_attrs[key].columns[0].type, value))
+    for name, related in data["relationships"].items():
+        related_model = mapper.relationships[name].mapper.class_
+        set_committed_value(obj, name, restore(db, related_model, related) if related is not None else None)
+    make_transient_to_detached(obj)
+    db.add(obj)
+    return obj
+
+
+# ------------------------------------------------------------------
+# Cached lookups
+# ------------------------------------------------------------------
+
+def _cached(db: Session, model, entity_id: int, relationships: Tuple[str, ...]):
+    """The row from the session or the cache, or None when it has to be loaded."""
+    if db.info.get("wrote"):
+        # the transaction may have changed the row; only the database has that state
+        return None
+    existing = db.identity_map.get(db.identity_key(model, entity_id))
+    if existing is not None and all(name in inspect(existing).dict for name in relationships):
+        return existing
+    data = _cache.get(cache_key(model, entity_id))
+    if data is None:
+        return None
+    return restore(db, model, data)
+
+
+def _fill(db: Session, model, entity_id: int, obj, relationships: Tuple[str, ...], generation: int):
+    # a lagging replica or this transaction's own writes must not end up in the cache
+    if obj is None or db.info.get("replica") or db.info.get("wrote"):
+        return
+    _cache.set(cache_key(model, entity_id), snapshot(obj, relationships), generation)
+
+
+def cached_entity(db: Session, model, entity_id: int, load: Callable, relationships: Tuple[str, ...] = ()):
+    """
+    Active row `entity_id` of `model` from the cache, or `load()` on a miss.
+    `relationships` are one-to-one relationships `load()` fills in, cached
+    together with the row.
+    """
+    obj = _cached(db, model, entity_id, relationships)
+    if obj is not None:
+        return obj
+    generation = _cache.generation
+    obj = load()
+    _fill(db, model, entity_id, obj, relationships, generation)
+    return obj
+
+
+async def cached_entity_async(db, model, entity_id: int, load: Callable, relationships: Tuple[str, ...] = ()):
+    """cached_entity for an AsyncSession; `load` is a coroutine function."""
+    obj = _cached(db.sync_session, model, entity_id, relationships)
+    if obj is not None:
+        # restored from the shared tier: secrets cannot be lazy-loaded here
+        missing = [key for key in inspect(obj).unloaded if key in UNSHARED_COLUMNS]
+        if missing:
+            await db.refresh(obj, missing)
+        return obj
+    generation = _cache.generation
+    obj = await load()
+    _fill(db.sync_session, model, entity_id, obj, relationships, generation)
+    return obj
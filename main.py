@@ -1,9 +1,16 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from models import Base
-# Import database to create tables
-from database import engine
+from database import DATABASE_URL, mark_write
+from entity_cache import INVALIDATION_CHANNEL, clear_local, dispatch_invalidation
+from match import live
+from match.bracket_document import invalidate_bracket, invalidate_participant_names
+from pg_listener import PostgresListener
+from query_metrics import start_request, log_request
 from routers.bracket import bracket_router
+from routers.rating import rating_router
+from routers.metrics import metrics_router
 # Import routers
 from routers.manual_user import manual_participant_router
 from routers.user import user_router
@@ -11,13 +18,35 @@ from routers.team import team_router
 from routers.tournament import tournament_router
 from routers.auth import auth_router
 from routers import tournament
-# Create all database tables
-Base.metadata.create_all(bind=engine)
+# The schema is created by `python bootstrap.py`, not on import
+
+def clear_worker_caches():
+    """Empties the in-process caches other workers' NOTIFYs keep coherent."""
+    clear_local()
+    invalidate_bracket()
+    invalidate_participant_names()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # each worker listens for match events, which feed its own live streams
+    # and drop its cached brackets, and for rows other workers changed, which
+    # it drops from its entity cache; NOTIFYs missed while disconnected are
+    # covered by emptying those caches on every (re)connect
+    listener = PostgresListener(
+        DATABASE_URL,
+        {live.CHANNEL: live.dispatch, INVALIDATION_CHANNEL: dispatch_invalidation},
+        on_connect=clear_worker_caches,
+    )
+    # does not block the boot on the database; retries in the background while it is down
+    await listener.open()
+    yield
+    await listener.stop()
 
 app = FastAPI(
     title="Tournament API",
     version="1.0.0",
-    description="Backend for Tournament Management System"
+    description="Backend for Tournament Management System",
+    lifespan=lifespan,
 )
 
 # CORS settings
@@ -35,6 +64,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    # clients that just wrote keep reading from the primary until the replica catches up
+    response = await call_next(request)
+    mark_write(request, response)
+    return response
+
+@app.middleware("http")
+async def query_timing(request: Request, call_next):
+    # statements and database time of the request, for browser devtools and the logs
+    stats = start_request()
+    started = time.perf_counter()
+    response = await call_next(request)
+    duration = time.perf_counter() - started
+    response.headers.append("Server-Timing", stats.server_timing())
+    response.headers.append("Server-Timing", f"app;dur={round(duration * 1000, 3)}")
+    log_request(request, response, stats, duration)
+    return response
+
 # Root endpoint
 @app.get("/")
 def root():
@@ -48,3 +96,5 @@ app.include_router(tournament.tournament_router, prefix="/tournaments")
 app.include_router(team_router, prefix="/teams", tags=["Teams"])
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(bracket_router, prefix="/matches", tags=["Matches"])
+app.include_router(rating_router, prefix="/ratings", tags=["Ratings"])
+app.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
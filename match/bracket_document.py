@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+
+from models import Tournament, Match, MatchStageEnum
+from match.participant_names import get_tournament_names, invalidate_names
+from match.entrants import slot_entrant
+from match.projection import invalidate_projection
+from match.tournament_cache import TournamentCache
+
+STAGE_ORDER = [
+    MatchStageEnum.winners.value,
+    MatchStageEnum.losers.value,
+    MatchStageEnum.grand_final.value,
+    MatchStageEnum.group.value,
+]
+
+# tournament_id -> assembled bracket document
+_bracket_cache = TournamentCache()
+
+
+def invalidate_bracket(tournament_id: Optional[int] = None):
+    """
+    Drops the cached document and projection; call after committing any
+    match change. Without a tournament, drops those of every tournament.
+    """
+    _bracket_cache.invalidate(tournament_id)
+    invalidate_projection(tournament_id)
+
+
+def invalidate_participant_names(tournament_id: Optional[int] = None):
+    """
+    Call after a roster change (with the tournament) or a team / user
+    rename (without): drops the cached names and the brackets showing them.
+    """
+    invalidate_names(tournament_id)
+    _bracket_cache.invalidate(tournament_id)
+
+
+def build_bracket_document(db: Session, tournament: Tournament) -> dict:
+    """
+    Assembles the whole bracket of a tournament: matches grouped into
+    rounds per stage, both slots with display names, winners and the
+    winner/loser edges. One query for the matches; names come from the
+    per-tournament name cache.
+    """
+    matches: List[Match] = (
+        db.query(Match)
+        .filter(Match.tournament_id == tournament.id)
+        .order_by(Match.id)
+        .all()
+    )
+
+    ptype = tournament.participant_type
+    ptype = ptype.value if hasattr(ptype, "value") else ptype
+
+    names = get_tournament_names(
+        db, tournament.id, ptype,
+        [slot_entrant(m, slot) for m in matches for slot in (1, 2)],
+    )
+
+    rounds: Dict[tuple, list] = {}
+    for m in matches:
+        stage = m.stage or MatchStageEnum.winners.value
+        rounds.setdefault((stage, m.round or 0), []).append({
+            "id": m.id,
+            "slots": [
+                {
+                    "participant_type": entrant and entrant[0],
+                    "participant_id": entrant and entrant[1],
+                    "name": names.get(entrant),
+                }
+                for entrant in (slot_entrant(m, 1), slot_entrant(m, 2))
+            ],
+            "winner_type": m.winner_type,
+            "winner_id": m.winner_id,
+            "score1": m.score1,
+            "score2": m.score2,
+            "is_draw": m.is_draw,
+            "winner_to_match_id": m.winner_to_match_id,
+            "winner_to_slot": m.winner_to_slot,
+            "loser_to_match_id": m.loser_to_match_id,
+            "loser_to_slot": m.loser_to_slot,
+            "date": m.date,
+            "time": m.time,
+            "court": m.court,
+        })
+
+    ordered = sorted(
+        rounds.items(),
+        key=lambda item: (
+            STAGE_ORDER.index(item[0][0]) if item[0][0] in STAGE_ORDER else len(STAGE_ORDER),
+            item[0][1],
+        ),
+    )
+
+    return {
+        "tournament_id": tournament.id,
+        "participant_type": ptype,
+        "rounds": [
+            {"stage": stage, "round": round_no, "matches": round_matches}
+            for (stage, round_no), round_matches in ordered
+        ],
+    }
+
+
+def get_bracket_document(db: Session, tournament: Tournament) -> dict:
+    document = _bracket_cache.get(tournament.id)
+    if document is None:
+        generation = _bracket_cache.generation()
+        document = build_bracket_document(db, tournament)
+        _bracket_cache.set(tournament.id, document, generation)
+    return document
@@ -0,0 +1,32 @@
+from typing import Optional, Tuple
+
+from models import Match
+
+# A bracket entrant is referenced as (participant type, id): ids of users,
+# teams and manual participants overlap, so the id alone is ambiguous.
+Entrant = Tuple[str, int]
+
+
+def slot_entrant(match: Match, slot: int) -> Optional[Entrant]:
+    participant_id = getattr(match, f"participant{slot}_id")
+    if participant_id is None:
+        return None
+    # rows written before slots were typed use the tournament-wide type
+    return getattr(match, f"participant{slot}_type") or match.participant_type, participant_id
+
+
+def set_slot(match: Match, slot: int, entrant: Optional[Entrant]):
+    participant_type, participant_id = entrant or (None, None)
+    setattr(match, f"participant{slot}_type", participant_type)
+    setattr(match, f"participant{slot}_id", participant_id)
+
+
+def winner_slot(match: Match) -> Optional[int]:
+    """1 or 2 for the side that won, None for a draw or an open match."""
+    if match.winner_id is None:
+        return None
+    for slot in (1, 2):
+        entrant = slot_entrant(match, slot)
+        if entrant is not None and entrant == ((match.winner_type or entrant[0]), match.winner_id):
+            return slot
+    return None
@@ -0,0 +1,95 @@
+from typing import Dict, Set, Optional, List
+import asyncio
+import json
+import logging
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from match.bracket_document import invalidate_bracket
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel every worker LISTENs on (see pg_listener.PostgresListener)
+CHANNEL = "match_updates"
+
+# NOTIFY payloads are capped at 8000 bytes; past this many ids viewers just reload
+MAX_EVENT_MATCH_IDS = 200
+
+# events waiting per viewer; a viewer this far behind gets one "resync"
+# event instead of its backlog and reloads the whole bracket
+LIVE_QUEUE_SIZE = 100
+RESYNC = "resync"
+
+# tournament_id -> queues of the viewers connected to this worker
+_subscribers: Dict[int, Set[asyncio.Queue]] = {}
+
+
+# ------------------------------------------------------------------
+# Publishing
+# ------------------------------------------------------------------
+
+def notify_matches_changed(db: Session, tournament_id: int, kind: str, match_ids: Optional[List[int]] = None):
+    """
+    Queues a match-change event for the tournament's viewers on every
+    worker. The NOTIFY runs inside the caller's transaction, so it is only
+    delivered if that transaction commits, and in commit order.
+    """
+    if match_ids is not None and len(match_ids) > MAX_EVENT_MATCH_IDS:
+        match_ids = None
+
+    payload = json.dumps({
+        "tournament_id": tournament_id,
+        "type": kind,
+        "match_ids": match_ids,
+    })
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+
+
+def dispatch(payload: str):
+    """
+    Drops this worker's cached bracket and projection of the event's
+    tournament, which only the writing worker invalidated itself, then
+    hands the event to the local viewers, who re-fetch them. Events sent
+    while the worker's listener was down are lost; viewers catch up on the
+    next one.
+    """
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        logger.warning("Dropping malformed match event: %r", payload)
+        return
+
+    if event.get("tournament_id") is not None:
+        invalidate_bracket(event["tournament_id"])
+    for queue in _subscribers.get(event.get("tournament_id"), ()):
+        deliver(queue, event)
+
+
+def deliver(queue: asyncio.Queue, event: dict):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # a stalled viewer must not hold events without bound; the match ids
+        # it missed no longer matter once it reloads everything
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({"tournament_id": event.get("tournament_id"), "type": RESYNC, "match_ids": None})
+
+
+# ------------------------------------------------------------------
+# Subscriptions
+# ------------------------------------------------------------------
+
+def subscribe(tournament_id: int) -> asyncio.Queue:
+    queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+    _subscribers.setdefault(tournament_id, set()).add(queue)
+    return queue
+
+
+def unsubscribe(tournament_id: int, queue: asyncio.Queue):
+    queues = _subscribers.get(tournament_id)
+    if queues is None:
+        return
+    queues.discard(queue)
+    if not queues:
+        del _subscribers[tournament_id]
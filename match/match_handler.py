@@ -1,12 +1,19 @@
 from typing import List, Optional
+from collections import defaultdict
 import math
 import random
-from datetime import date, time
+from datetime import date, time, datetime, timezone
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, or_, and_, func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from models import Tournament, TournamentParticipant, Match
+from models import Tournament, TournamentParticipant, Match, MatchSet, MatchStageEnum, SportEnum, Standing, \
+    EntrantTypeEnum
 from schemas import ParticipantEnum
+from match.entrants import Entrant, slot_entrant, set_slot, winner_slot
+from match.standings import apply_result, revert_result, seed_standings, StandingChanges
+from match.ratings import apply_rating, revert_rating, revert_tournament_ratings, RatingChanges, sport_of
 
 
 # ------------------------------------------------------------------
@@ -16,7 +23,7 @@ from schemas import ParticipantEnum
 def get_participants(db: Session, tournament_id: int) -> List[dict]:
     """
     Returns participants as:
-         { "type": "team" | "solo", "id": <id> }
+         { "type": "team" | "solo" | "manual", "id": <id> }
     Reads TournamentParticipant table.
     """
     rows = db.query(TournamentParticipant).filter(
@@ -29,26 +36,85 @@ def get_participants(db: Session, tournament_id: int) -> List[dict]:
             parts.append({"type": "team", "id": r.team_id})
         elif getattr(r, "user_id", None):
             parts.append({"type": "solo", "id": r.user_id})
+        elif getattr(r, "manual_participant_id", None):
+            parts.append({"type": EntrantTypeEnum.manual.value, "id": r.manual_participant_id})
     return parts
 
 
+def get_entrants(tournament: Tournament, participants: List[dict]) -> List[Entrant]:
+    """
+    Bracket entrants of a tournament: registered teams or players matching
+    its participant type, plus manually entered participants.
+    """
+    ptype = tournament_participant_type(tournament)
+    return [
+        (p["type"], p["id"])
+        for p in participants
+        if p["type"] in (ptype, EntrantTypeEnum.manual.value)
+    ]
+
+
+def tournament_participant_type(tournament: Tournament) -> str:
+    return "team" if tournament.participant_type == ParticipantEnum.team.value else "solo"
+
+
+# namespace for pg_advisory_xact_lock(namespace, tournament_id)
+MATCH_GENERATION_LOCK = 1
+
+
+def lock_tournament_matches(db: Session, tournament_id: int):
+    """
+    Serializes bracket generation and result reporting for one tournament.
+    The advisory lock is held until the current transaction commits or
+    rolls back.
+    """
+    db.execute(select(func.pg_advisory_xact_lock(MATCH_GENERATION_LOCK, tournament_id)))
+
+
+def count_active_matches(db: Session, tournament_id: int) -> int:
+    return db.query(func.count(Match.id)).filter(
+        Match.tournament_id == tournament_id
+    ).scalar()
+
+
+def retire_matches(db: Session, tournament_id: int) -> int:
+    """
+    Soft-deletes the current set of matches with one UPDATE and drops the
+    standings built from them. Returns the number of retired matches.
+    """
+    revert_tournament_ratings(db, tournament_id)
+
+    retired = db.query(Match).filter(
+        Match.tournament_id == tournament_id,
+        Match.deleted_at.is_(None)
+    ).update({Match.deleted_at: datetime.now(timezone.utc)}, synchronize_session=False)
+
+    db.query(Standing).filter(Standing.tournament_id == tournament_id).delete(synchronize_session=False)
+
+    return retired
+
+
 def create_match_record(
     db: Session,
     tournament: Tournament,
     participant_type: str,
-    part1_id: Optional[int],
-    part2_id: Optional[int],
+    part1: Optional[Entrant],
+    part2: Optional[Entrant],
     match_date: Optional[date] = None,
-    match_time: Optional[time] = None
+    match_time: Optional[time] = None,
+    match_round: Optional[int] = None,
+    stage: Optional[str] = None
 ) -> Match:
     m = Match(
         tournament_id=tournament.id,
         participant_type=participant_type,
-        participant1_id=part1_id,
-        participant2_id=part2_id,
         date=match_date,
-        time=match_time
+        time=match_time,
+        round=match_round,
+        stage=stage
     )
+    set_slot(m, 1, part1)
+    set_slot(m, 2, part2)
     db.add(m)
     db.flush()
     return m
@@ -61,94 +127,201 @@ def next_power_of_two(n: int) -> int:
     return 2 ** math.ceil(math.log2(n))
 
 
+def seed_positions(size: int) -> List[int]:
+    """
+    Standard bracket order for `size` slots (a power of two), e.g.
+    8 -> [1, 8, 4, 5, 2, 7, 3, 6]. Seeds above the number of entrants
+    are byes, so byes always face a real entrant and are spread evenly.
+    """
+    order = [1]
+    while len(order) < size:
+        mirror = len(order) * 2 + 1
+        order = [s for seed in order for s in (seed, mirror - seed)]
+    return order
+
+
 # ------------------------------------------------------------------
-# Generators
+# In-memory bracket graph
 # ------------------------------------------------------------------
-def generate_single_elimination(
-    db: Session,
-    tournament: Tournament,
-    participants: List[dict],
-) -> List[Match]:
 
-    ptype = (
-        "team"
-        if tournament.participant_type == ParticipantEnum.team.value
-        else "solo"
-    )
+class BracketNode:
+    """
+    A match while the bracket is being laid out, before it is persisted.
 
-    ids = [p["id"] for p in participants if p["type"] == ptype]
+    `entrants` holds participants seeded straight into a slot, `winner_to`
+    and `loser_to` are (node, slot) edges. `feeds` is filled in by
+    `resolve_byes` and says what will arrive in each slot.
+    """
+    __slots__ = ("stage", "round", "entrants", "winner_to", "loser_to", "feeds", "match")
 
-    if len(ids) < 2:
-        raise HTTPException(400, "Not enough participants")
+    def __init__(self, stage: str, round_no: int, p1: Optional[Entrant] = None, p2: Optional[Entrant] = None):
+        self.stage = stage
+        self.round = round_no
+        self.entrants = [p1, p2]
+        self.winner_to = None
+        self.loser_to = None
+        self.feeds = [None, None]
+        self.match = None
 
-    random.shuffle(ids)
 
-    def next_power_of_two_single(n: int) -> int:
-        return 1 << (n - 1).bit_length()
+def link(source: BracketNode, kind: str, dest: BracketNode, slot: int):
+    setattr(source, f"{kind}_to", (dest, slot))
 
-    target = next_power_of_two_single(len(ids))
-    ids.extend([None] * (target - len(ids)))
 
-    all_matches: List[Match] = []
+def resolve_byes(nodes: List[BracketNode]) -> List[BracketNode]:
+    """
+    Collapses every node that will never be played and returns the ones
+    that will. `nodes` must be in dependency order (feeders first).
+
+    A slot feed is ("entrant", entrant), ("match", node, "winner" | "loser")
+    or None when nobody can ever arrive. A node with one empty slot is a
+    bye: whatever arrives in the other slot goes straight to its winner
+    edge and its loser edge carries nobody. A node with two empty slots
+    is dropped together with both of its edges.
+    """
+    for node in nodes:
+        for i, entrant in enumerate(node.entrants):
+            if entrant is not None:
+                node.feeds[i] = ("entrant", entrant)
+
+    live = []
+    for node in nodes:
+        present = [f for f in node.feeds if f is not None]
+
+        if len(present) == 2:
+            live.append(node)
+            for kind in ("winner", "loser"):
+                target = getattr(node, f"{kind}_to")
+                if target:
+                    dest, slot = target
+                    dest.feeds[slot - 1] = ("match", node, kind)
+            continue
 
-    # -----------------------------
-    # ROUND 1
-    # -----------------------------
-    round_matches: List[Match] = []
+        passed = present[0] if present else None
+        if node.winner_to:
+            dest, slot = node.winner_to
+            dest.feeds[slot - 1] = passed
+            if passed and passed[0] == "match":
+                # the upstream match skips this node entirely
+                setattr(passed[1], f"{passed[2]}_to", node.winner_to)
+        elif passed and passed[0] == "match":
+            setattr(passed[1], f"{passed[2]}_to", None)
 
-    for i in range(0, len(ids), 2):
-        p1, p2 = ids[i], ids[i + 1]
+    return live
 
-        if p1 is None and p2 is None:
-            continue
 
-        m = create_match_record(
-            db=db,
-            tournament=tournament,
-            participant_type=ptype,
-            part1_id=p1,
-            part2_id=p2,
+def persist_bracket(
+    db: Session,
+    tournament: Tournament,
+    participant_type: str,
+    nodes: List[BracketNode],
+) -> List[Match]:
+    """
+    Resolves byes and writes only the playable matches: one bulk INSERT
+    returning the new rows in order, then one bulk UPDATE by primary key
+    for the winner/loser edges.
+    """
+    live = resolve_byes(nodes)
+    if not live:
+        return []
+
+    rows = []
+    for node in live:
+        (type1, p1), (type2, p2) = (
+            feed[1] if feed[0] == "entrant" else (None, None)
+            for feed in node.feeds
         )
+        rows.append({
+            "tournament_id": tournament.id,
+            "participant_type": participant_type,
+            "participant1_type": type1,
+            "participant1_id": p1,
+            "participant2_type": type2,
+            "participant2_id": p2,
+            "round": node.round,
+            "stage": node.stage,
+        })
+
+    matches = db.scalars(
+        insert(Match).returning(Match, sort_by_parameter_order=True),
+        rows
+    ).all()
+    for node, match in zip(live, matches):
+        node.match = match
+
+    edges = []
+    for node in live:
+        edge = {}
+        for kind in ("winner", "loser"):
+            target = getattr(node, f"{kind}_to")
+            if target:
+                dest, slot = target
+                edge[f"{kind}_to_match_id"] = dest.match.id
+                edge[f"{kind}_to_slot"] = slot
+        if edge:
+            # keep the returned objects in sync without marking them dirty
+            for key, value in edge.items():
+                set_committed_value(node.match, key, value)
+            edges.append({"id": node.match.id, "winner_to_match_id": None, "winner_to_slot": None,
+                          "loser_to_match_id": None, "loser_to_slot": None, **edge})
+
+    if edges:
+        db.execute(update(Match), edges)
 
-        round_matches.append(m)
-        all_matches.append(m)
+    return matches
+
+
+def build_winners_bracket(entrants: List[Entrant]) -> List[List[BracketNode]]:
+    """
+    Lays out a full power-of-two winners bracket. Missing entrants are
+    left as empty slots so `resolve_byes` can skip them.
+    """
+    size = next_power_of_two(len(entrants))
+    slots = [
+        entrants[seed - 1] if seed <= len(entrants) else None
+        for seed in seed_positions(size)
+    ]
+
+    winners = MatchStageEnum.winners.value
+    rounds = [[
+        BracketNode(winners, 1, slots[i], slots[i + 1])
+        for i in range(0, size, 2)
+    ]]
+
+    while len(rounds[-1]) > 1:
+        prev = rounds[-1]
+        curr = []
+        for i in range(0, len(prev), 2):
+            parent = BracketNode(winners, len(rounds) + 1)
+            link(prev[i], "winner", parent, 1)
+            link(prev[i + 1], "winner", parent, 2)
+            curr.append(parent)
+        rounds.append(curr)
 
-    # -----------------------------
-    # NEXT ROUNDS
-    # -----------------------------
-    while len(round_matches) > 1:
-        next_round: List[Match] = []
-        i = 0
+    return rounds
 
-        while i < len(round_matches):
-            if i + 1 < len(round_matches):
-                parent = create_match_record(
-                    db=db,
-                    tournament=tournament,
-                    participant_type=ptype,
-                    part1_id=None,
-                    part2_id=None,
-                )
 
-                m1 = round_matches[i]
-                m2 = round_matches[i + 1]
+# ------------------------------------------------------------------
+# Generators
+# ------------------------------------------------------------------
+def generate_single_elimination(
+    db: Session,
+    tournament: Tournament,
+    participants: List[dict],
+) -> List[Match]:
 
-                m1.winner_to_match_id = parent.id
-                m1.winner_to_slot = 1
+    ptype = tournament_participant_type(tournament)
+    entrants = get_entrants(tournament, participants)
 
-                m2.winner_to_match_id = parent.id
-                m2.winner_to_slot = 2
+    if len(entrants) < 2:
+        raise HTTPException(400, "Not enough participants")
 
-                next_round.append(parent)
-                all_matches.append(parent)
-                i += 2
-            else:
-                next_round.append(round_matches[i])
-                i += 1
+    random.shuffle(entrants)
 
-        round_matches = next_round
+    rounds = build_winners_bracket(entrants)
+    nodes = [node for rnd in rounds for node in rnd]
 
-    return all_matches
+    return persist_bracket(db, tournament, ptype, nodes)
 
 
 def generate_round_robin(
@@ -157,182 +330,453 @@ def generate_round_robin(
     participants: List[dict],
 ) -> List[Match]:
 
-    ptype = (
-        "team"
-        if tournament.participant_type == ParticipantEnum.team.value
-        else "solo"
-    )
-
-    ids = [p["id"] for p in participants if p["type"] == ptype]
+    ptype = tournament_participant_type(tournament)
+    entrants = get_entrants(tournament, participants)
 
-    if len(ids) < 2:
+    if len(entrants) < 2:
         raise HTTPException(400, "Not enough participants")
 
-    random.shuffle(ids)
+    random.shuffle(entrants)
 
     all_matches: List[Match] = []
 
-    n = len(ids)
+    # circle method: every entrant plays once per round, one sits out
+    # each round when the field is odd
+    slots = entrants + [None] if len(entrants) % 2 else list(entrants)
+    n = len(slots)
 
-    for i in range(n):
-        for j in range(i + 1, n):
+    for r in range(n - 1):
+        for i in range(n // 2):
+            p1, p2 = slots[i], slots[n - 1 - i]
+            if p1 is None or p2 is None:
+                continue
             m = create_match_record(
                 db=db,
                 tournament=tournament,
                 participant_type=ptype,
-                part1_id=ids[i],
-                part2_id=ids[j],
+                part1=p1,
+                part2=p2,
+                match_round=r + 1,
+                stage=MatchStageEnum.group.value,
             )
             all_matches.append(m)
 
+        slots = [slots[0], slots[-1]] + slots[1:-1]
+
+    seed_standings(db, tournament.id, entrants)
+
     return all_matches
 
 
 
+def drop_order(losers: List[BracketNode], wb_round: int) -> List[BracketNode]:
+    """
+    Order in which the losers of a winners-bracket round drop into the
+    losers bracket. Alternating reversed and half-swapped order sends each
+    loser to the far side of the losers bracket, away from the entrants
+    they already met.
+    """
+    if wb_round % 2 == 0:
+        return losers[::-1]
+    half = len(losers) // 2
+    return losers[half:] + losers[:half]
+
+
+def build_double_elimination(entrants: List[Entrant], grand_final_reset: bool = True) -> List[BracketNode]:
+    """
+    Lays out a full double-elimination bracket in dependency order.
+
+    For 2^k slots the losers bracket has 2(k-1) rounds: a minor round
+    where losers-bracket survivors play each other, then a major round
+    where they meet the entrants dropping from the next winners round.
+    The grand final puts the winners champion in slot 1; the optional
+    reset match is only played if the losers champion wins it.
+    """
+    losers = MatchStageEnum.losers.value
+
+    winners_rounds = build_winners_bracket(entrants)
+    wb_final = winners_rounds[-1][0]
+
+    losers_rounds: List[List[BracketNode]] = []
+
+    if len(winners_rounds) > 1:
+        # LB Round 1: losers of neighbouring WB R1 matches
+        wb_r1 = winners_rounds[0]
+        first = []
+        for i in range(0, len(wb_r1), 2):
+            node = BracketNode(losers, 1)
+            link(wb_r1[i], "loser", node, 1)
+            link(wb_r1[i + 1], "loser", node, 2)
+            first.append(node)
+        losers_rounds.append(first)
+
+        for r in range(1, len(winners_rounds)):
+            # major round: survivors meet the losers of WB round r + 1
+            dropping = drop_order(winners_rounds[r], r + 1)
+            major = []
+            for survivor, dropped in zip(losers_rounds[-1], dropping):
+                node = BracketNode(losers, len(losers_rounds) + 1)
+                link(survivor, "winner", node, 1)
+                link(dropped, "loser", node, 2)
+                major.append(node)
+            losers_rounds.append(major)
+
+            if len(major) > 1:
+                # minor round: survivors play each other
+                minor = []
+                for i in range(0, len(major), 2):
+                    node = BracketNode(losers, len(losers_rounds) + 1)
+                    link(major[i], "winner", node, 1)
+                    link(major[i + 1], "winner", node, 2)
+                    minor.append(node)
+                losers_rounds.append(minor)
+
+        lb_champion = (losers_rounds[-1][0], "winner")
+    else:
+        # two entrants: the loser of the only match goes straight to the final
+        lb_champion = (wb_final, "loser")
+
+    grand_final = BracketNode(MatchStageEnum.grand_final.value, 1)
+    link(wb_final, "winner", grand_final, 1)
+    link(lb_champion[0], lb_champion[1], grand_final, 2)
+
+    nodes = [node for rnd in winners_rounds + losers_rounds for node in rnd]
+    nodes.append(grand_final)
+
+    if grand_final_reset:
+        reset = BracketNode(MatchStageEnum.grand_final.value, 2)
+        link(grand_final, "winner", reset, 1)
+        link(grand_final, "loser", reset, 2)
+        nodes.append(reset)
+
+    return nodes
+
+
 def generate_double_elimination(
     db: Session,
     tournament: Tournament,
-    participants: List[dict]
+    participants: List[dict],
+    grand_final_reset: bool = True
 ) -> List[Match]:
 
-    ptype = "team" if tournament.participant_type == ParticipantEnum.team.value else "solo"
-    ids = [p["id"] for p in participants if p["type"] == ptype]
+    ptype = tournament_participant_type(tournament)
+    entrants = get_entrants(tournament, participants)
 
-    if len(ids) < 2:
+    if len(entrants) < 2:
         raise HTTPException(400, "Not enough participants")
 
-    random.shuffle(ids)
+    random.shuffle(entrants)
 
-    size = next_power_of_two(len(ids))
-    ids.extend([None] * (size - len(ids)))
+    nodes = build_double_elimination(entrants, grand_final_reset)
 
-    all_matches: List[Match] = []
+    return persist_bracket(db, tournament, ptype, nodes)
 
-    # ======================
-    # WINNERS BRACKET
-    # ======================
-    winners_rounds: List[List[Match]] = []
 
-    # Round 1
-    round1 = []
-    for i in range(0, size, 2):
-        m = create_match_record(db, tournament, ptype, ids[i], ids[i + 1])
-        round1.append(m)
-        all_matches.append(m)
+def forwarded_participants(match: Match, winning_slot: int) -> tuple:
+    """
+    Returns the entrants moving along the winner edge and along the loser
+    edge once the side in `winning_slot` has won `match`.
+    """
+    if match.stage == MatchStageEnum.grand_final.value and winning_slot == 1:
+        # the winners champion took the grand final: the reset is not played
+        return None, None
 
-    winners_rounds.append(round1)
+    return slot_entrant(match, winning_slot), slot_entrant(match, 3 - winning_slot)
 
-    # Next rounds
-    while len(winners_rounds[-1]) > 1:
-        prev = winners_rounds[-1]
-        curr = []
 
-        for i in range(0, len(prev), 2):
-            m = create_match_record(db, tournament, ptype, None, None)
+# Loaders for matches whose result is (re)reported: the sets are replaced
+# and the sport is read from the tournament
+RESULT_LOADERS = (selectinload(Match.sets), joinedload(Match.tournament))
 
-            prev[i].winner_to_match_id = m.id
-            prev[i].winner_to_slot = 1
 
-            prev[i + 1].winner_to_match_id = m.id
-            prev[i + 1].winner_to_slot = 2
+def get_match_for_result(db: Session, match_id: int) -> Optional[Match]:
+    """
+    The match to (re)report or correct, loaded after taking its
+    tournament's lock: reports and corrections of one tournament run one
+    after another, each on the rows the previous one committed.
+    """
+    tournament_id = db.query(Match.tournament_id).filter(Match.id == match_id).scalar()
+    if tournament_id is None:
+        return None
+    lock_tournament_matches(db, tournament_id)
+    return db.query(Match).options(*RESULT_LOADERS).filter(Match.id == match_id).first()
 
-            curr.append(m)
-            all_matches.append(m)
 
-        winners_rounds.append(curr)
+def set_score(match: Match, score1: Optional[int] = None, score2: Optional[int] = None, sets: Optional[List[tuple]] = None):
+    match.score1 = score1
+    match.score2 = score2
+    # rows are reused by set number: inserting fresh ones would run before
+    # the old ones are deleted and clash on uq_match_set_number
+    existing = {s.set_number: s for s in match.sets}
+    rows = []
+    for number, (games1, games2) in enumerate(sets or [], start=1):
+        row = existing.get(number) or MatchSet(set_number=number)
+        row.games1, row.games2 = games1, games2
+        rows.append(row)
+    match.sets = rows
 
-    wb_final = winners_rounds[-1][0]
 
-    # ======================
-    # LOSERS BRACKET
-    # ======================
-    losers_rounds: List[List[Match]] = []
+def set_winner(match: Match, winning_slot: Optional[int]):
+    winner = slot_entrant(match, winning_slot) if winning_slot else None
+    match.winner_type, match.winner_id = winner or (None, None)
+    match.is_draw = winning_slot is None
 
-    # LB Round 1 (losers from WB R1)
-    lb_round1 = []
-    wb_r1 = winners_rounds[0]
 
-    for i in range(0, len(wb_r1), 2):
-        m = create_match_record(db, tournament, ptype, None, None)
+def report_match_winner(
+    db: Session,
+    match: Match,
+    winning_slot: Optional[int],
+    score1: Optional[int] = None,
+    score2: Optional[int] = None,
+    sets: Optional[List[tuple]] = None,
+    standings: Optional[StandingChanges] = None,
+    ratings: Optional[RatingChanges] = None,
+):
+    """
+    Records the result of a match and moves its participants along the
+    bracket. `winning_slot` is 1 or 2; None records a draw, which sends
+    no one forward. A batch passes its own `standings` and `ratings`
+    changes and saves them once at the end.
+    """
+    save = standings is None
+    if save:
+        standings, ratings = StandingChanges(), RatingChanges()
 
-        wb_r1[i].loser_to_match_id = m.id
-        wb_r1[i].loser_to_slot = 1
+    # a re-report replaces the previous result in the standings and ratings
+    revert_result(match, standings)
+    revert_rating(match, ratings)
+    set_winner(match, winning_slot)
+    set_score(match, score1, score2, sets)
+    apply_result(match, standings)
+    apply_rating(db, match, ratings)
 
-        wb_r1[i + 1].loser_to_match_id = m.id
-        wb_r1[i + 1].loser_to_slot = 2
+    if save:
+        standings.save(db)
+        ratings.save(db)
 
-        lb_round1.append(m)
-        all_matches.append(m)
+    if match.is_draw:
+        return
 
-    losers_rounds.append(lb_round1)
+    winner_next, loser_next = forwarded_participants(match, winning_slot)
 
-    # LB subsequent rounds
-    for r in range(1, len(winners_rounds) - 1):
-        prev_lb = losers_rounds[-1]
-        wb_round = winners_rounds[r]
+    # winner goes forward
+    if match.winner_to_match_id:
+        next_match = db.get(Match, match.winner_to_match_id)
+        set_slot(next_match, match.winner_to_slot, winner_next)
 
-        curr_lb = []
+    # loser goes forward (double elimination)
+    if match.loser_to_match_id:
+        loser_match = db.get(Match, match.loser_to_match_id)
+        set_slot(loser_match, match.loser_to_slot, loser_next)
 
-        for i in range(len(wb_round)):
-            m = create_match_record(db, tournament, ptype, None, None)
 
-            prev_lb[i].winner_to_match_id = m.id
-            prev_lb[i].winner_to_slot = 1
+def affected_match_ids(match: Match) -> List[int]:
+    """The reported match and the matches its result was pushed into."""
+    return [
+        match_id
+        for match_id in (match.id, match.winner_to_match_id, match.loser_to_match_id)
+        if match_id is not None
+    ]
 
-            wb_round[i].loser_to_match_id = m.id
-            wb_round[i].loser_to_slot = 2
 
-            curr_lb.append(m)
-            all_matches.append(m)
-
-        losers_rounds.append(curr_lb)
+def report_match_score(
+    db: Session,
+    match: Match,
+    score1: Optional[int],
+    score2: Optional[int],
+    sets: Optional[List[tuple]] = None,
+):
+    """
+    Records a scored result and derives the winner from it.
 
-    lb_final = losers_rounds[-1][0]
+    Football and basketball take the final score. Tennis takes the games
+    of each set as (games1, games2) pairs and the score becomes the sets
+    won. Only football group matches may end in a draw.
+    """
+    if match.participant1_id is None or match.participant2_id is None:
+        raise HTTPException(400, "Match slot is empty")
+
+    sport = match.tournament.sport
+    sport = sport.value if hasattr(sport, "value") else sport
+
+    if sport == SportEnum.tennis.value:
+        if not sets:
+            raise HTTPException(400, "Tennis results need set scores")
+        if any(games1 == games2 for games1, games2 in sets):
+            raise HTTPException(400, "A set cannot end level")
+        score1 = sum(1 for games1, games2 in sets if games1 > games2)
+        score2 = len(sets) - score1
+    else:
+        if sets:
+            raise HTTPException(400, "Set scores are only used in tennis")
+        if score1 is None or score2 is None:
+            raise HTTPException(400, "Both scores are required")
+
+    if score1 == score2:
+        if sport != SportEnum.football.value or match.stage != MatchStageEnum.group.value:
+            raise HTTPException(400, "Draws are only allowed in football group matches")
+        winning_slot = None
+    else:
+        winning_slot = 1 if score1 > score2 else 2
+
+    report_match_winner(db, match, winning_slot, score1, score2, sets)
+
+
+def report_match_winners(db: Session, results: List[tuple]) -> List[dict]:
+    """
+    Reports many results at once. `results` is a list of
+    (match_id, winner_slot) pairs; returns one outcome per pair, in order.
+
+    The tournaments of the batch are locked as for a single report. The
+    requested matches and the matches they feed are loaded with one
+    query, the ratings of everyone in them are locked with one more per
+    sport, and the standing and rating changes are saved together at the
+    end; results are applied feeders first, so a batch may hold a match
+    together with the match its winner moves on to.
+    """
+    ids = [match_id for match_id, _ in results]
 
-    # ======================
-    # GRAND FINAL
-    # ======================
-    grand_final = create_match_record(db, tournament, ptype, None, None)
+    # in id order, so batches spanning the same tournaments cannot deadlock
+    tournament_ids = db.query(Match.tournament_id).filter(Match.id.in_(ids)).distinct().all()
+    for (tournament_id,) in sorted(tournament_ids):
+        lock_tournament_matches(db, tournament_id)
 
-    wb_final.winner_to_match_id = grand_final.id
-    wb_final.winner_to_slot = 1
+    targets = (
+        select(Match.winner_to_match_id).where(Match.id.in_(ids))
+        .union(select(Match.loser_to_match_id).where(Match.id.in_(ids)))
+    )
+    loaded = {
+        m.id: m
+        for m in db.query(Match).options(*RESULT_LOADERS).filter(
+            or_(Match.id.in_(ids), Match.id.in_(targets))
+        ).all()
+    }
+
+    outcomes = {}
+    requested = {}
+    for index, (match_id, slot) in enumerate(results):
+        if match_id in requested:
+            outcomes[index] = {"match_id": match_id, "status": "error", "detail": "Duplicate match in batch"}
+        elif match_id not in loaded:
+            outcomes[index] = {"match_id": match_id, "status": "error", "detail": "Match not found"}
+        else:
+            requested[match_id] = (index, slot)
+
+    # results only move entrants between the loaded matches, so their
+    # entrants are everyone whose rating the batch can touch: lock them all
+    # up front, in one statement per sport, like a single report does
+    by_sport = defaultdict(set)
+    for m in loaded.values():
+        by_sport[sport_of(m)] |= {slot_entrant(m, 1), slot_entrant(m, 2)} - {None}
+    standings, ratings = StandingChanges(), RatingChanges()
+    for sport in sorted(by_sport):
+        ratings.lock(db, sport, by_sport[sport])
+
+    # feeders before the matches they feed
+    indegree = {match_id: 0 for match_id in requested}
+    for match_id in requested:
+        m = loaded[match_id]
+        for target in {m.winner_to_match_id, m.loser_to_match_id}:
+            if target in indegree:
+                indegree[target] += 1
+
+    ready = [match_id for match_id in requested if indegree[match_id] == 0]
+    while ready:
+        match_id = ready.pop(0)
+        index, slot = requested[match_id]
+        m = loaded[match_id]
+
+        if slot not in (1, 2):
+            outcomes[index] = {"match_id": match_id, "status": "error", "detail": "Invalid winner"}
+        elif slot_entrant(m, slot) is None:
+            outcomes[index] = {"match_id": match_id, "status": "error", "detail": "Match slot is empty"}
+        else:
+            report_match_winner(db, m, slot, standings=standings, ratings=ratings)
+            outcomes[index] = {"match_id": match_id, "status": "ok", "detail": None}
 
-    lb_final.winner_to_match_id = grand_final.id
-    lb_final.winner_to_slot = 2
+        for target in {m.winner_to_match_id, m.loser_to_match_id}:
+            if target in indegree:
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    ready.append(target)
 
-    all_matches.append(grand_final)
+    standings.save(db)
+    ratings.save(db)
+    return [outcomes[index] for index in range(len(results))]
 
-    return all_matches
 
 
-def report_match_winner(
+def correct_match_winner(
     db: Session,
     match: Match,
-    winner_id: int
-):
-    match.winner_id = winner_id
+    winning_slot: int
+) -> List[Match]:
+    """
+    Changes the result of an already played match and fixes the bracket
+    downstream of it. Returns every match whose participants or result
+    changed, the corrected match included.
 
-    # winner goes forward
+    The new winner and loser are pushed along the winner/loser edges. Any
+    downstream match whose slot changed loses its result, and whatever it
+    had pushed forward is taken back, so each match is cleared at most once.
+    """
+    if winner_slot(match) == winning_slot:
+        return []
+
+    matches = {
+        m.id: m
+        for m in db.query(Match).options(*RESULT_LOADERS).filter(
+            Match.tournament_id == match.tournament_id
+        ).all()
+    }
+
+    winner_next, loser_next = forwarded_participants(match, winning_slot)
+
+    standings, ratings = StandingChanges(), RatingChanges()
+    revert_result(match, standings)
+    revert_rating(match, ratings)
+    set_winner(match, winning_slot)
+    # the old score no longer matches the result
+    set_score(match)
+    apply_result(match, standings)
+    apply_rating(db, match, ratings)
+    changed = {match.id: match}
+
+    pending = []
     if match.winner_to_match_id:
-        next_match = db.get(Match, match.winner_to_match_id)
-        if match.winner_to_slot == 1:
-            next_match.participant1_id = winner_id
-        else:
-            next_match.participant2_id = winner_id
+        pending.append((match.winner_to_match_id, match.winner_to_slot, winner_next))
+    if match.loser_to_match_id:
+        pending.append((match.loser_to_match_id, match.loser_to_slot, loser_next))
+
+    while pending:
+        match_id, slot, entrant = pending.pop()
+        target = matches.get(match_id)
+        if target is None:
+            continue
 
-    # loser goes forward (double elimination)
-    loser_id = (
-        match.participant2_id
-        if winner_id == match.participant1_id
-        else match.participant1_id
-    )
+        if slot_entrant(target, slot) == entrant:
+            continue
 
-    if match.loser_to_match_id and loser_id is not None:
-        loser_match = db.get(Match, match.loser_to_match_id)
-        if match.loser_to_slot == 1:
-            loser_match.participant1_id = loser_id
-        else:
-            loser_match.participant2_id = loser_id
+        changed[target.id] = target
+
+        if target.winner_id is not None or target.is_draw:
+            # the result was played by someone who no longer holds the slot
+            revert_result(target, standings)
+            revert_rating(target, ratings)
+            target.winner_type = None
+            target.winner_id = None
+            target.is_draw = False
+            set_score(target)
+            if target.winner_to_match_id:
+                pending.append((target.winner_to_match_id, target.winner_to_slot, None))
+            if target.loser_to_match_id:
+                pending.append((target.loser_to_match_id, target.loser_to_slot, None))
+
+        set_slot(target, slot, entrant)
+
+    standings.save(db)
+    ratings.save(db)
+    return list(changed.values())
 
 
 
@@ -340,5 +784,17 @@ def get_all_matches(
     db: Session,
     tournament_id: int,
 ):
-    matches = db.query(Match).filter(Match.tournament_id == tournament_id).all()
+    matches = db.query(Match).filter(
+        Match.tournament_id == tournament_id
+    ).all()
     return matches
+
+
+def get_participant_matches(db: Session, participant_type: str, participant_id: int) -> List[Match]:
+    """Every active match of one entrant, served by the per-slot participant indexes."""
+    return db.query(Match).filter(
+        or_(
+            and_(Match.participant1_type == participant_type, Match.participant1_id == participant_id),
+            and_(Match.participant2_type == participant_type, Match.participant2_id == participant_id),
+        )
+    ).order_by(Match.date, Match.time, Match.id).all()
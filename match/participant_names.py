@@ -0,0 +1,143 @@
+from typing import Dict, List, Optional
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from models import Match, Team, User, ManualParticipant, TournamentParticipant, EntrantTypeEnum
+from schemas import ParticipantEnum
+from match.entrants import Entrant, slot_entrant
+from match.tournament_cache import TournamentCache
+
+# tournament_id -> { (participant type, id): display name }; cached dicts
+# are shared by concurrent requests, so they are replaced, never updated
+_name_cache = TournamentCache()
+
+
+def invalidate_names(tournament_id: Optional[int] = None):
+    """Drops the cached names of one tournament, or of all of them after a rename."""
+    _name_cache.invalidate(tournament_id)
+
+
+def get_participant_names(db: Session, participant_type: str, ids: List[int]) -> dict:
+    """
+    Returns { <id>: <display name> } for the given entrants with a single
+    query: team name, user nickname or manual participant name. Deleted
+    entrants keep their names in the brackets they played in.
+    """
+    ids = {pid for pid in ids if pid is not None}
+    if not ids:
+        return {}
+
+    if participant_type == EntrantTypeEnum.team.value:
+        query = db.query(Team.id, Team.name).filter(Team.id.in_(ids))
+    elif participant_type == EntrantTypeEnum.manual.value:
+        query = db.query(ManualParticipant.id, ManualParticipant.name).filter(ManualParticipant.id.in_(ids))
+    else:
+        query = db.query(User.id, User.nickname).filter(User.id.in_(ids))
+    rows = query.execution_options(include_deleted=True).all()
+
+    return {pid: name for pid, name in rows}
+
+
+def get_entrant_names(db: Session, entrants: List[Optional[Entrant]]) -> Dict[Entrant, str]:
+    """Display names of entrants from any tournaments, one query per participant type."""
+    by_type: Dict[str, List[int]] = {}
+    for entrant in entrants:
+        if entrant is not None:
+            by_type.setdefault(entrant[0], []).append(entrant[1])
+    return {
+        (entrant_type, pid): name
+        for entrant_type, ids in by_type.items()
+        for pid, name in get_participant_names(db, entrant_type, ids).items()
+    }
+
+
+def load_roster_names(db: Session, tournament_id: int, participant_type: str) -> Dict[Entrant, str]:
+    """
+    Names of everyone registered in a tournament: one query for the teams
+    or players, one for the manual participants.
+    """
+    registered = TournamentParticipant.tournament_id == tournament_id
+
+    if participant_type == ParticipantEnum.team.value:
+        rows = (
+            db.query(Team.id, Team.name)
+            .join(TournamentParticipant, TournamentParticipant.team_id == Team.id)
+            .filter(registered)
+            .all()
+        )
+    else:
+        rows = (
+            db.query(User.id, User.nickname)
+            .join(TournamentParticipant, TournamentParticipant.user_id == User.id)
+            .filter(registered)
+            .all()
+        )
+    names = {(participant_type, pid): name for pid, name in rows}
+
+    manual = (
+        db.query(ManualParticipant.id, ManualParticipant.name)
+        .join(TournamentParticipant, TournamentParticipant.manual_participant_id == ManualParticipant.id)
+        .filter(registered)
+        .all()
+    )
+    names.update(((EntrantTypeEnum.manual.value, pid), name) for pid, name in manual)
+
+    return names
+
+
+def get_tournament_names(
+    db: Session,
+    tournament_id: int,
+    participant_type: str,
+    entrants: List[Optional[Entrant]],
+) -> Dict[Entrant, str]:
+    """
+    Returns the display names of a tournament's entrants keyed by
+    (participant type, id), cached per tournament until its roster or a
+    name changes. Entrants that left the roster but still sit in a match
+    are looked up once per type and cached too.
+    """
+    generation = _name_cache.generation()
+    names: Optional[Dict[Entrant, str]] = _name_cache.get(tournament_id)
+    if names is None:
+        names = load_roster_names(db, tournament_id, participant_type)
+        _name_cache.set(tournament_id, names, generation)
+
+    missing: Dict[str, List[int]] = {}
+    for entrant in entrants:
+        if entrant is not None and entrant not in names:
+            missing.setdefault(entrant[0], []).append(entrant[1])
+    if missing:
+        names = dict(names)
+        for entrant_type, ids in missing.items():
+            names.update(
+                ((entrant_type, pid), name)
+                for pid, name in get_participant_names(db, entrant_type, ids).items()
+            )
+        _name_cache.set(tournament_id, names, generation)
+
+    return names
+
+
+def matches_with_names(db: Session, matches: List[Match]) -> List[dict]:
+    """Serializes matches with participant1_name / participant2_name filled in."""
+    by_tournament: Dict[tuple, List[Entrant]] = {}
+    for m in matches:
+        by_tournament.setdefault((m.tournament_id, m.participant_type), []).extend(
+            (slot_entrant(m, 1), slot_entrant(m, 2))
+        )
+
+    names = {
+        tournament_id: get_tournament_names(db, tournament_id, participant_type, entrants)
+        for (tournament_id, participant_type), entrants in by_tournament.items()
+    }
+
+    columns = [attr.key for attr in inspect(Match).column_attrs]
+    return [
+        {
+            **{key: getattr(m, key) for key in columns},
+            "participant1_name": names[m.tournament_id].get(slot_entrant(m, 1)),
+            "participant2_name": names[m.tournament_id].get(slot_entrant(m, 2)),
+        }
+        for m in matches
+    ]
@@ -0,0 +1,188 @@
+from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from models import Tournament, Match, Rating, MatchStageEnum
+from match.entrants import Entrant, slot_entrant, winner_slot
+from match.ratings import INITIAL_RATING
+from match.participant_names import get_tournament_names
+from match.tournament_cache import TournamentCache
+
+DEFAULT_SIMULATIONS = 20000
+
+# tournament_id -> projection with DEFAULT_SIMULATIONS; other counts come
+# from the query string and are computed per call, so clients cannot fill
+# the cache with one entry per count
+_projection_cache = TournamentCache()
+
+
+def invalidate_projection(tournament_id: Optional[int] = None):
+    """Drops the cached projection of one tournament, or of all of them."""
+    _projection_cache.invalidate(tournament_id)
+
+
+def entrant_ratings(db: Session, sport: str, entrants: List[Entrant]) -> np.ndarray:
+    """Current ratings of `entrants` in order; unrated entrants start at INITIAL_RATING."""
+    wanted = set(entrants)
+    known = {
+        (row.participant_type, row.participant_id): row.rating
+        for row in db.query(Rating).filter(
+            Rating.sport == sport,
+            Rating.participant_type.in_({ptype for ptype, _ in wanted}),
+            Rating.participant_id.in_({pid for _, pid in wanted}),
+        ).all()
+    }
+    return np.array([known.get(entrant, INITIAL_RATING) for entrant in entrants])
+
+
+def simulate_bracket(matches: List[Match], ratings: np.ndarray, index: Dict[Entrant, int], simulations: int,
+                     rng: np.random.Generator) -> tuple:
+    """
+    Plays the rest of the bracket `simulations` times at once.
+
+    Every slot is an array holding one entrant index per simulation (-1
+    when nobody arrives). Matches are visited feeders first; played
+    matches keep their result, open ones are decided by Elo win
+    probability. Returns the per-(stage, round) appearance counts and the
+    title counts, both indexed by entrant.
+    """
+    by_id = {m.id: m for m in matches}
+    indegree = {m.id: 0 for m in matches}
+    for m in matches:
+        for target in (m.winner_to_match_id, m.loser_to_match_id):
+            if target in indegree:
+                indegree[target] += 1
+
+    # slots written by a feeder; the rest hold the entrant stored on the match
+    arriving: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def slot_array(m: Match, slot: int) -> np.ndarray:
+        fed = arriving.pop((m.id, slot), None)
+        if fed is not None:
+            return fed
+        entrant = slot_entrant(m, slot)
+        return np.full(simulations, index[entrant] if entrant is not None else -1, dtype=np.int32)
+
+    # Elo win chance as strength ratio: p = s1 / (s1 + s2) with s = 10^(rating / 400)
+    strength = 10 ** (ratings / 400.0)
+
+    # counts are taken on index + 1 so empty slots (-1) land in bin 0
+    reached: Dict[tuple, np.ndarray] = defaultdict(lambda: np.zeros(len(index) + 1, dtype=np.int64))
+    titles = np.zeros(len(index) + 1, dtype=np.int64)
+
+    ready = [m.id for m in matches if indegree[m.id] == 0]
+    while ready:
+        m = by_id[ready.pop()]
+        first, second = slot_array(m, 1), slot_array(m, 2)
+
+        stage_round = (m.stage or MatchStageEnum.winners.value, m.round or 0)
+        for side in (first, second):
+            reached[stage_round] += np.bincount(side + 1, minlength=len(index) + 1)
+
+        played = (first >= 0) & (second >= 0)
+        won = winner_slot(m)
+        if won is not None:
+            first_wins = np.full(simulations, won == 1)
+        else:
+            s1, s2 = strength[first], strength[second]
+            first_wins = rng.random(simulations) * (s1 + s2) < s1
+
+        winner = np.where(played, np.where(first_wins, first, second), -1)
+        loser = np.where(played, np.where(first_wins, second, first), -1)
+
+        if m.stage == MatchStageEnum.grand_final.value and m.round == 1:
+            # the winners champion taking the grand final skips the reset
+            forwarded = played & ~first_wins
+        else:
+            forwarded = played
+
+        if m.winner_to_match_id in by_id:
+            arriving[(m.winner_to_match_id, m.winner_to_slot)] = np.where(forwarded, winner, -1)
+        if m.loser_to_match_id in by_id:
+            arriving[(m.loser_to_match_id, m.loser_to_slot)] = np.where(forwarded, loser, -1)
+
+        if m.winner_to_match_id in by_id:
+            champion = played & ~forwarded
+        else:
+            champion = played
+        if champion.any():
+            titles += np.bincount(winner[champion] + 1, minlength=len(index) + 1)
+
+        for target in (m.winner_to_match_id, m.loser_to_match_id):
+            if target in indegree:
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    ready.append(target)
+
+    return {key: counts[1:] for key, counts in reached.items()}, titles[1:]
+
+
+def build_projection(db: Session, tournament: Tournament, simulations: int) -> dict:
+    matches = db.query(Match).filter(
+        Match.tournament_id == tournament.id
+    ).all()
+    if not matches:
+        raise HTTPException(404, "No matches found")
+    if any(m.stage == MatchStageEnum.group.value for m in matches):
+        raise HTTPException(400, "Projection is only available for elimination brackets")
+
+    entrants = sorted({e for m in matches for e in (slot_entrant(m, 1), slot_entrant(m, 2)) if e is not None})
+    index = {entrant: i for i, entrant in enumerate(entrants)}
+
+    sport = tournament.sport.value if hasattr(tournament.sport, "value") else tournament.sport
+    ratings = entrant_ratings(db, sport, entrants)
+
+    reached, titles = simulate_bracket(matches, ratings, index, simulations, np.random.default_rng())
+
+    stage_order = [stage.value for stage in MatchStageEnum]
+    stages = sorted(reached, key=lambda key: (stage_order.index(key[0]), key[1]))
+
+    projection = [
+        {
+            "participant_type": entrant[0],
+            "participant_id": entrant[1],
+            "rating": float(ratings[i]),
+            "win_probability": float(titles[i] / simulations),
+            "rounds": [
+                {"stage": stage, "round": round_no, "probability": float(reached[(stage, round_no)][i] / simulations)}
+                for stage, round_no in stages
+            ],
+        }
+        for entrant, i in index.items()
+    ]
+    projection.sort(key=lambda row: row["win_probability"], reverse=True)
+
+    return {"tournament_id": tournament.id, "simulations": simulations, "entrants": projection}
+
+
+def get_projection(db: Session, tournament: Tournament, simulations: int = DEFAULT_SIMULATIONS) -> dict:
+    """
+    Monte Carlo projection of an elimination bracket: each entrant's
+    chance of reaching every round and of winning the tournament. With
+    DEFAULT_SIMULATIONS it is cached until the tournament's matches change;
+    names are filled in per call.
+    """
+    if simulations != DEFAULT_SIMULATIONS:
+        projection = build_projection(db, tournament, simulations)
+    else:
+        projection = _projection_cache.get(tournament.id)
+        if projection is None:
+            generation = _projection_cache.generation()
+            projection = build_projection(db, tournament, simulations)
+            _projection_cache.set(tournament.id, projection, generation)
+
+    ptype = tournament.participant_type
+    ptype = ptype.value if hasattr(ptype, "value") else ptype
+    names = get_tournament_names(
+        db, tournament.id, ptype,
+        [(row["participant_type"], row["participant_id"]) for row in projection["entrants"]],
+    )
+    return {
+        **projection,
+        "entrants": [
+            {**row, "name": names.get((row["participant_type"], row["participant_id"]))}
+            for row in projection["entrants"]
+        ],
+    }
@@ -0,0 +1,296 @@
+from typing import List, Optional, Dict, Iterable, Tuple
+from collections import defaultdict
+import numpy as np
+from sqlalchemy import insert, update, select, tuple_, bindparam
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, joinedload
+
+from models import Tournament, Match, Rating
+from match.entrants import Entrant, slot_entrant, winner_slot
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+
+
+# ------------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------------
+
+def sport_of(match: Match) -> str:
+    sport = match.tournament.sport
+    return sport.value if hasattr(sport, "value") else sport
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    return 1.0 / (1.0 + 10 ** ((opponent_rating - rating) / 400.0))
+
+
+class RatingChanges:
+    """
+    Ratings moved by the results of one request. lock() creates missing
+    rows (INSERT ... ON CONFLICT DO NOTHING) and reads the current ratings
+    with SELECT ... FOR UPDATE in id order, so a concurrent report of the
+    same players, in any tournament, waits instead of computing its
+    expected score from the same values. save() writes the moved points as
+    SQL increments (rating = rating + delta).
+    """
+
+    def __init__(self):
+        # (sport, entrant) -> rating, for the locked rows, unsaved changes included
+        self.ratings: Dict[Tuple[str, Entrant], float] = {}
+        # (sport, entrant) -> [rating delta, games delta]
+        self.deltas: Dict[Tuple[str, Entrant], list] = {}
+
+    def lock(self, db: Session, sport: str, entrants: Iterable[Entrant]):
+        wanted = sorted({entrant for entrant in entrants if (sport, entrant) not in self.ratings})
+        if not wanted:
+            return
+
+        db.execute(
+            postgresql.insert(Rating.__table__).on_conflict_do_nothing(
+                index_elements=["sport", "participant_type", "participant_id"]
+            ),
+            [
+                {"sport": sport, "participant_type": ptype, "participant_id": pid, "rating": INITIAL_RATING, "games": 0}
+                for ptype, pid in wanted
+            ],
+        )
+        table = Rating.__table__
+        rows = db.execute(
+            select(table.c.participant_type, table.c.participant_id, table.c.rating)
+            .where(
+                table.c.sport == sport,
+                tuple_(table.c.participant_type, table.c.participant_id).in_(wanted),
+            )
+            .order_by(table.c.id)
+            .with_for_update()
+        ).all()
+        for participant_type, participant_id, rating in rows:
+            key = (sport, (participant_type, participant_id))
+            # a revert recorded before the lock is not saved yet
+            self.ratings[key] = rating + self.deltas.get(key, [0.0, 0])[0]
+
+    def rating(self, sport: str, entrant: Entrant) -> float:
+        return self.ratings[(sport, entrant)]
+
+    def add(self, sport: str, entrant: Entrant, delta: float, games: int):
+        key = (sport, entrant)
+        moved = self.deltas.setdefault(key, [0.0, 0])
+        moved[0] += delta
+        moved[1] += games
+        if key in self.ratings:
+            self.ratings[key] += delta
+
+    def save(self, db: Session):
+        deltas, self.deltas = self.deltas, {}
+        self.ratings = {}
+        changed = sorted(key for key, (delta, games) in deltas.items() if delta or games)
+        if not changed:
+            return
+
+        # rows are updated in key order, so concurrent saves lock them in the same order
+        table = Rating.__table__
+        db.execute(
+            update(table)
+            .where(
+                table.c.sport == bindparam("row_sport"),
+                table.c.participant_type == bindparam("row_participant_type"),
+                table.c.participant_id == bindparam("row_participant_id"),
+            )
+            .values(
+                rating=table.c.rating + bindparam("delta_rating"),
+                games=table.c.games + bindparam("delta_games"),
+            ),
+            [
+                {
+                    "row_sport": sport,
+                    "row_participant_type": participant_type,
+                    "row_participant_id": participant_id,
+                    "delta_rating": deltas[(sport, (participant_type, participant_id))][0],
+                    "delta_games": deltas[(sport, (participant_type, participant_id))][1],
+                }
+                for sport, (participant_type, participant_id) in changed
+            ],
+        )
+
+
+# ------------------------------------------------------------------
+# Incremental updates
+# ------------------------------------------------------------------
+
+def apply_rating(db: Session, match: Match, changes: RatingChanges):
+    """
+    Moves Elo points between the two sides of a finished match and keeps
+    the amount on the match, so the update can be taken back exactly.
+    """
+    entrants = [slot_entrant(match, 1), slot_entrant(match, 2)]
+    if None in entrants:
+        return
+    if match.winner_id is None and not match.is_draw:
+        return
+
+    sport = sport_of(match)
+    changes.lock(db, sport, entrants)
+
+    if match.is_draw:
+        actual = 0.5
+    else:
+        actual = 1.0 if winner_slot(match) == 1 else 0.0
+
+    delta = K_FACTOR * (actual - expected_score(changes.rating(sport, entrants[0]), changes.rating(sport, entrants[1])))
+
+    changes.add(sport, entrants[0], delta, 1)
+    changes.add(sport, entrants[1], -delta, 1)
+    match.rating_delta = delta
+
+
+def revert_rating(match: Match, changes: RatingChanges):
+    if match.rating_delta is None:
+        return
+    entrants = [slot_entrant(match, 1), slot_entrant(match, 2)]
+    if None in entrants:
+        return
+
+    sport = sport_of(match)
+    changes.add(sport, entrants[0], -match.rating_delta, -1)
+    changes.add(sport, entrants[1], match.rating_delta, -1)
+    match.rating_delta = None
+
+
+def revert_tournament_ratings(db: Session, tournament_id: int):
+    """Takes back every rated result of a tournament, e.g. before its matches are retired."""
+    rated = db.query(Match).options(joinedload(Match.tournament)).filter(
+        Match.tournament_id == tournament_id,
+        Match.rating_delta.isnot(None)
+    ).all()
+    changes = RatingChanges()
+    for m in rated:
+        revert_rating(m, changes)
+    changes.save(db)
+
+
+# ------------------------------------------------------------------
+# Batch recompute
+# ------------------------------------------------------------------
+
+def recompute_ratings(db: Session, sport: Optional[str] = None) -> int:
+    """
+    Replays the whole match history in chronological order and rewrites
+    the ratings (of one sport, or all) and every match's rating delta.
+    Returns the number of rated matches.
+
+    Matches are split into waves in which nobody plays twice; a match
+    goes in the wave after the last one of either side, so every wave
+    only depends on earlier ones and can be updated as whole NumPy arrays
+    with the same result as replaying matches one by one.
+    """
+    query = (
+        db.query(
+            Match.id, Match.participant_type,
+            Match.participant1_type, Match.participant1_id, Match.participant2_type, Match.participant2_id,
+            Match.winner_type, Match.winner_id, Match.is_draw, Tournament.sport,
+        )
+        .join(Tournament, Tournament.id == Match.tournament_id)
+        .filter(
+            Match.deleted_at.is_(None),
+            Match.participant1_id.isnot(None),
+            Match.participant2_id.isnot(None),
+        )
+        .order_by(Match.date, Match.time, Match.round, Match.id)
+        # results of tournaments deleted later stay rated, as they did
+        # incrementally; only retired matches are left out
+        .execution_options(include_deleted=True)
+    )
+    if sport is not None:
+        query = query.filter(Tournament.sport == sport)
+    # rows expose columns as attributes, so the entrant helpers read them like matches
+    history = [m for m in query.all() if m.winner_id is not None or m.is_draw]
+
+    index: Dict[tuple, int] = {}
+    first = np.empty(len(history), dtype=np.int64)
+    second = np.empty(len(history), dtype=np.int64)
+    actual = np.empty(len(history), dtype=np.float64)
+    wave = np.empty(len(history), dtype=np.int64)
+    last_wave: Dict[int, int] = defaultdict(lambda: -1)
+
+    for i, m in enumerate(history):
+        sport_value = m.sport.value if hasattr(m.sport, "value") else m.sport
+        a = index.setdefault((sport_value, *slot_entrant(m, 1)), len(index))
+        b = index.setdefault((sport_value, *slot_entrant(m, 2)), len(index))
+        first[i], second[i] = a, b
+        actual[i] = 0.5 if m.is_draw else (1.0 if winner_slot(m) == 1 else 0.0)
+        wave[i] = max(last_wave[a], last_wave[b]) + 1
+        last_wave[a] = last_wave[b] = wave[i]
+
+    ratings = np.full(len(index), INITIAL_RATING)
+    games = np.zeros(len(index), dtype=np.int64)
+    deltas = np.empty(len(history))
+
+    order = np.argsort(wave, kind="stable")
+    bounds = np.flatnonzero(np.diff(wave[order])) + 1
+    for rows in np.split(order, bounds):
+        if rows.size == 0:
+            continue
+        a, b = first[rows], second[rows]
+        expected = 1.0 / (1.0 + 10 ** ((ratings[b] - ratings[a]) / 400.0))
+        delta = K_FACTOR * (actual[rows] - expected)
+        ratings[a] += delta
+        ratings[b] -= delta
+        games[a] += 1
+        games[b] += 1
+        deltas[rows] = delta
+
+    stale = db.query(Rating)
+    rated = db.query(Match).filter(Match.rating_delta.isnot(None))
+    if sport is not None:
+        stale = stale.filter(Rating.sport == sport)
+        rated = rated.filter(
+            Match.tournament_id.in_(db.query(Tournament.id).filter(Tournament.sport == sport))
+        )
+    stale.delete(synchronize_session=False)
+    rated.update({Match.rating_delta: None}, synchronize_session=False)
+
+    if index:
+        db.execute(insert(Rating), [
+            {
+                "sport": sport_value,
+                "participant_type": ptype,
+                "participant_id": pid,
+                "rating": float(ratings[i]),
+                "games": int(games[i]),
+            }
+            for (sport_value, ptype, pid), i in index.items()
+        ])
+    if history:
+        db.execute(update(Match), [
+            {"id": m.id, "rating_delta": float(deltas[i])}
+            for i, m in enumerate(history)
+        ])
+
+    db.expire_all()
+    return len(history)
+
+
+# ------------------------------------------------------------------
+# Leaderboard
+# ------------------------------------------------------------------
+
+def get_leaderboard(db: Session, sport: str, participant_type: str, limit: int = 10) -> List[dict]:
+    """Top `limit` ratings of a sport, read straight off the leaderboard index."""
+    rows = (
+        db.query(Rating)
+        .filter(Rating.sport == sport, Rating.participant_type == participant_type)
+        .order_by(Rating.rating.desc(), Rating.participant_id)
+        .limit(limit)
+        .all()
+    )
+    return [
+        {
+            "position": pos,
+            "participant_type": row.participant_type,
+            "participant_id": row.participant_id,
+            "rating": row.rating,
+            "games": row.games,
+        }
+        for pos, row in enumerate(rows, start=1)
+    ]
@@ -0,0 +1,129 @@
+from typing import List, Optional, Dict
+import heapq
+import math
+from collections import defaultdict
+from datetime import datetime, date, time, timedelta
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from models import Tournament, Match
+from match.entrants import Entrant, slot_entrant
+
+DEFAULT_DAY_START = time(9, 0)
+DEFAULT_DAY_END = time(21, 0)
+
+
+def minutes_of(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+def schedule_matches(
+    db: Session,
+    tournament: Tournament,
+    courts: int = 1,
+    match_duration: int = 60,
+    min_rest: int = 30,
+    day_start: Optional[time] = None,
+    day_end: Optional[time] = None,
+) -> List[dict]:
+    """
+    Assigns a date, start time and court to every match of a tournament,
+    starting at `Tournament.start_date` / `start_time`, and writes them
+    with one bulk UPDATE. Returns the assignments.
+
+    The day is split into slots of `match_duration` minutes between
+    `day_start` and `day_end`, each with `courts` places. Matches are
+    placed greedily in dependency order (a match never starts before the
+    matches that feed it) and take the first slot with a free court where
+    both sides have had `min_rest` minutes since their previous match.
+    Full slots are skipped through a path-compressed "next free slot" map,
+    so placing each match is close to O(1).
+    """
+    day_start = day_start or tournament.start_time or DEFAULT_DAY_START
+    day_end = day_end or DEFAULT_DAY_END
+
+    slots_per_day = (minutes_of(day_end) - minutes_of(day_start)) // match_duration
+    if slots_per_day < 1:
+        raise HTTPException(400, "Playing day is shorter than one match")
+
+    rest_slots = math.ceil(min_rest / match_duration)
+
+    matches = db.query(Match).filter(
+        Match.tournament_id == tournament.id
+    ).all()
+    by_id = {m.id: m for m in matches}
+
+    feeders: Dict[int, List[int]] = defaultdict(list)
+    indegree = {m.id: 0 for m in matches}
+    for m in matches:
+        for target in {m.winner_to_match_id, m.loser_to_match_id}:
+            if target in by_id:
+                feeders[target].append(m.id)
+                indegree[target] += 1
+
+    # ready matches come out by round, then by id
+    ready = [(m.round or 0, m.id) for m in matches if indegree[m.id] == 0]
+    heapq.heapify(ready)
+
+    slot_of: Dict[int, int] = {}
+    participant_free: Dict[Entrant, int] = {}
+    used: Dict[int, int] = defaultdict(int)
+    next_slot: Dict[int, int] = {}
+
+    def first_free(slot: int) -> int:
+        root = slot
+        while root in next_slot:
+            root = next_slot[root]
+        while slot in next_slot and next_slot[slot] != root:
+            next_slot[slot], slot = root, next_slot[slot]
+        return root
+
+    start = datetime.combine(tournament.start_date, day_start)
+    assignments = []
+
+    while ready:
+        _, match_id = heapq.heappop(ready)
+        m = by_id[match_id]
+
+        earliest = 0
+        for feeder_id in feeders[match_id]:
+            earliest = max(earliest, slot_of[feeder_id] + 1 + rest_slots)
+        for entrant in (slot_entrant(m, 1), slot_entrant(m, 2)):
+            if entrant is not None:
+                earliest = max(earliest, participant_free.get(entrant, 0))
+
+        slot = first_free(earliest)
+        used[slot] += 1
+        if used[slot] == courts:
+            next_slot[slot] = slot + 1
+
+        slot_of[match_id] = slot
+        for entrant in (slot_entrant(m, 1), slot_entrant(m, 2)):
+            if entrant is not None:
+                participant_free[entrant] = slot + 1 + rest_slots
+
+        kickoff = start + timedelta(
+            days=slot // slots_per_day,
+            minutes=(slot % slots_per_day) * match_duration,
+        )
+        assignments.append({
+            "id": match_id,
+            "date": kickoff.date(),
+            "time": kickoff.time(),
+            "court": used[slot],
+        })
+
+        for target in {m.winner_to_match_id, m.loser_to_match_id}:
+            if target in indegree:
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    heapq.heappush(ready, (by_id[target].round or 0, target))
+
+    if len(assignments) != len(matches):
+        raise HTTPException(400, "Match graph has a cycle")
+
+    if assignments:
+        db.execute(update(Match), assignments)
+
+    return assignments
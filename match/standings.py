@@ -0,0 +1,368 @@
+from typing import List, Optional, Dict, Iterable, Tuple
+from collections import defaultdict
+from sqlalchemy import or_, func, update, bindparam
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, selectinload
+
+from models import Tournament, Match, Standing, TiebreakerEnum
+from match.entrants import Entrant, slot_entrant, winner_slot
+
+POINTS_WIN = 3
+POINTS_DRAW = 1
+POINTS_LOSS = 0
+
+
+# ------------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------------
+
+# counters of a standing row, moved by every result
+TOTALS = (
+    "played", "wins", "draws", "losses", "points",
+    "score_for", "score_against", "games_for", "games_against",
+)
+
+
+def new_standing(tournament_id: int, participant_type: str, participant_id: int) -> Standing:
+    return Standing(
+        tournament_id=tournament_id,
+        participant_type=participant_type,
+        participant_id=participant_id,
+        **dict.fromkeys(TOTALS, 0),
+    )
+
+
+def insert_standings(db: Session, tournament_id: int, entrants: Iterable[Entrant]):
+    """Creates the missing rows of `entrants`; rows another request created first are left alone."""
+    rows = [
+        {"tournament_id": tournament_id, "participant_type": ptype, "participant_id": pid, **dict.fromkeys(TOTALS, 0)}
+        for ptype, pid in sorted(set(entrants))
+    ]
+    if rows:
+        db.execute(
+            insert(Standing.__table__).on_conflict_do_nothing(
+                index_elements=["tournament_id", "participant_type", "participant_id"]
+            ),
+            rows,
+        )
+
+
+def result_lines(match: Match) -> List[tuple]:
+    """
+    Splits a finished match into one line per side:
+    (entrant, outcome, scored, conceded, games_won, games_lost).
+    Matches without a result or without both participants give no lines.
+    """
+    first, second = slot_entrant(match, 1), slot_entrant(match, 2)
+    if first is None or second is None:
+        return []
+    won = winner_slot(match)
+    if won is None and not match.is_draw:
+        return []
+
+    score1, score2 = match.score1 or 0, match.score2 or 0
+    games1 = sum(s.games1 for s in match.sets)
+    games2 = sum(s.games2 for s in match.sets)
+
+    def outcome(slot: int) -> str:
+        if match.is_draw:
+            return "draw"
+        return "win" if slot == won else "loss"
+
+    return [
+        (first, outcome(1), score1, score2, games1, games2),
+        (second, outcome(2), score2, score1, games2, games1),
+    ]
+
+
+def line_totals(line: tuple, sign: int = 1) -> Dict[str, int]:
+    """How much one side's line moves each of the TOTALS."""
+    _, outcome, scored, conceded, games_won, games_lost = line
+    return {
+        "played": sign,
+        "wins": sign if outcome == "win" else 0,
+        "draws": sign if outcome == "draw" else 0,
+        "losses": sign if outcome == "loss" else 0,
+        "points": sign * {"win": POINTS_WIN, "draw": POINTS_DRAW}.get(outcome, POINTS_LOSS),
+        "score_for": sign * scored,
+        "score_against": sign * conceded,
+        "games_for": sign * games_won,
+        "games_against": sign * games_lost,
+    }
+
+
+def add_line(row: Standing, line: tuple, sign: int = 1):
+    for name, amount in line_totals(line, sign).items():
+        setattr(row, name, getattr(row, name) + amount)
+
+
+class StandingChanges:
+    """
+    What the results of one request move in the standings, summed per row
+    and written by save() as SQL increments (points = points + 3, ...):
+    concurrent reports in a tournament add up instead of overwriting each
+    other's totals.
+    """
+
+    def __init__(self):
+        # (tournament id, entrant) -> amount per total
+        self.deltas: Dict[Tuple[int, Entrant], Dict[str, int]] = {}
+
+    def add(self, tournament_id: int, line: tuple, sign: int = 1):
+        totals = self.deltas.setdefault((tournament_id, line[0]), dict.fromkeys(TOTALS, 0))
+        for name, amount in line_totals(line, sign).items():
+            totals[name] += amount
+
+    def save(self, db: Session):
+        deltas, self.deltas = self.deltas, {}
+        changed = sorted(key for key, totals in deltas.items() if any(totals.values()))
+        if not changed:
+            return
+
+        by_tournament = defaultdict(list)
+        for tournament_id, entrant in changed:
+            by_tournament[tournament_id].append(entrant)
+        for tournament_id, entrants in by_tournament.items():
+            insert_standings(db, tournament_id, entrants)
+
+        # one row per statement, in key order, so concurrent saves lock rows in the same order
+        table = Standing.__table__
+        db.execute(
+            update(table)
+            .where(
+                table.c.tournament_id == bindparam("row_tournament_id"),
+                table.c.participant_type == bindparam("row_participant_type"),
+                table.c.participant_id == bindparam("row_participant_id"),
+            )
+            .values({name: table.c[name] + bindparam(f"delta_{name}") for name in TOTALS}),
+            [
+                {
+                    "row_tournament_id": tournament_id,
+                    "row_participant_type": participant_type,
+                    "row_participant_id": participant_id,
+                    **{f"delta_{name}": amount for name, amount in deltas[(tournament_id, (participant_type, participant_id))].items()},
+                }
+                for tournament_id, (participant_type, participant_id) in changed
+            ],
+        )
+
+
+def apply_result(match: Match, changes: StandingChanges, sign: int = 1):
+    """
+    Adds the result of `match` to `changes` (sign=1) or takes it back out
+    (sign=-1). Matches without a result or without both participants do
+    not count.
+    """
+    for line in result_lines(match):
+        changes.add(match.tournament_id, line, sign)
+
+
+def revert_result(match: Match, changes: StandingChanges):
+    apply_result(match, changes, sign=-1)
+
+
+def seed_standings(db: Session, tournament_id: int, entrants: List[Entrant]):
+    """Creates empty rows so entrants show up before their first result."""
+    insert_standings(db, tournament_id, entrants)
+
+
+# ------------------------------------------------------------------
+# Bulk recompute
+# ------------------------------------------------------------------
+
+def recompute_standings(db: Session, tournament_id: int) -> List[Standing]:
+    """
+    Rebuilds the standings of a tournament from its matches. Used to repair
+    the table; the incremental path in `report_match_winner` keeps it up
+    to date otherwise.
+    """
+    matches = (
+        db.query(Match)
+        .options(selectinload(Match.sets))
+        .filter(Match.tournament_id == tournament_id)
+        .all()
+    )
+
+    db.query(Standing).filter(Standing.tournament_id == tournament_id).delete(synchronize_session=False)
+
+    rows: Dict[Entrant, Standing] = {}
+
+    def row_for(entrant: Entrant) -> Standing:
+        if entrant not in rows:
+            rows[entrant] = new_standing(tournament_id, *entrant)
+        return rows[entrant]
+
+    for m in matches:
+        for slot in (1, 2):
+            entrant = slot_entrant(m, slot)
+            if entrant is not None:
+                row_for(entrant)
+
+        for line in result_lines(m):
+            add_line(row_for(line[0]), line)
+
+    db.add_all(rows.values())
+    db.flush()
+    return list(rows.values())
+
+
+# ------------------------------------------------------------------
+# League table
+# ------------------------------------------------------------------
+
+def head_to_head_points(matches: List[Match], group: set) -> Dict[Entrant, int]:
+    """Points earned only in matches played between members of `group`."""
+    points = defaultdict(int)
+    for m in matches:
+        first, second = slot_entrant(m, 1), slot_entrant(m, 2)
+        if first not in group or second not in group:
+            continue
+        if m.is_draw:
+            points[first] += POINTS_DRAW
+            points[second] += POINTS_DRAW
+            continue
+        won = winner_slot(m)
+        if won is None:
+            continue
+        winner, loser = (first, second) if won == 1 else (second, first)
+        points[winner] += POINTS_WIN
+        points[loser] += POINTS_LOSS
+    return points
+
+
+def get_standings(
+    db: Session,
+    tournament_id: int,
+    tiebreakers: Optional[List[TiebreakerEnum]] = None,
+) -> List[dict]:
+    """
+    Returns the league table ordered by points, with ties broken by
+    `tiebreakers` in the given order.
+    """
+    tiebreakers = tiebreakers or [TiebreakerEnum.head_to_head, TiebreakerEnum.wins]
+
+    rows = (
+        db.query(Standing)
+        .filter(Standing.tournament_id == tournament_id)
+        .order_by(Standing.points.desc(), Standing.participant_id)
+        .all()
+    )
+
+    matches = None
+    if TiebreakerEnum.head_to_head in tiebreakers:
+        matches = (
+            db.query(Match)
+            .filter(
+                Match.tournament_id == tournament_id,
+                or_(Match.winner_id.isnot(None), Match.is_draw.is_(True))
+            )
+            .all()
+        )
+
+    ordered = []
+    i = 0
+    while i < len(rows):
+        j = i
+        while j < len(rows) and rows[j].points == rows[i].points:
+            j += 1
+        tied = rows[i:j]
+
+        if len(tied) > 1:
+            h2h = {}
+            if matches is not None:
+                h2h = head_to_head_points(matches, {(r.participant_type, r.participant_id) for r in tied})
+
+            def key(row: Standing):
+                values = []
+                for tb in tiebreakers:
+                    if tb == TiebreakerEnum.head_to_head:
+                        values.append(h2h.get((row.participant_type, row.participant_id), 0))
+                    elif tb == TiebreakerEnum.wins:
+                        values.append(row.wins)
+                    elif tb == TiebreakerEnum.fewest_losses:
+                        values.append(-row.losses)
+                    elif tb == TiebreakerEnum.score_difference:
+                        values.append(row.score_for - row.score_against)
+                    elif tb == TiebreakerEnum.score_for:
+                        values.append(row.score_for)
+                return tuple(values)
+
+            tied = sorted(tied, key=key, reverse=True)
+
+        ordered.extend(tied)
+        i = j
+
+    return [
+        {
+            "position": pos,
+            "participant_type": row.participant_type,
+            "participant_id": row.participant_id,
+            "played": row.played,
+            "wins": row.wins,
+            "draws": row.draws,
+            "losses": row.losses,
+            "points": row.points,
+            "score_for": row.score_for,
+            "score_against": row.score_against,
+            "score_difference": row.score_for - row.score_against,
+            "games_for": row.games_for,
+            "games_against": row.games_against,
+        }
+        for pos, row in enumerate(ordered, start=1)
+    ]
+
+
+# ------------------------------------------------------------------
+# Participant stats
+# ------------------------------------------------------------------
+
+def get_participant_stats(
+    db: Session,
+    participant_type: str,
+    participant_id: int,
+    sport: Optional[str] = None,
+) -> dict:
+    """
+    Career totals of a team or player summed from their standing rows,
+    optionally limited to one sport. Reads the precomputed aggregates
+    instead of scanning matches.
+    """
+    query = db.query(
+        func.count(Standing.id),
+        func.coalesce(func.sum(Standing.played), 0),
+        func.coalesce(func.sum(Standing.wins), 0),
+        func.coalesce(func.sum(Standing.draws), 0),
+        func.coalesce(func.sum(Standing.losses), 0),
+        func.coalesce(func.sum(Standing.score_for), 0),
+        func.coalesce(func.sum(Standing.score_against), 0),
+        func.coalesce(func.sum(Standing.games_for), 0),
+        func.coalesce(func.sum(Standing.games_against), 0),
+    ).filter(
+        Standing.participant_type == participant_type,
+        Standing.participant_id == participant_id,
+    )
+    if sport is not None:
+        # deleted tournaments count towards the totals with or without a sport
+        query = (
+            query.join(Tournament, Tournament.id == Standing.tournament_id)
+            .filter(Tournament.sport == sport)
+            .execution_options(include_deleted=True)
+        )
+
+    (tournaments, played, wins, draws, losses,
+     score_for, score_against, games_for, games_against) = query.one()
+
+    return {
+        "participant_type": participant_type,
+        "participant_id": participant_id,
+        "sport": sport,
+        "tournaments": tournaments,
+        "played": played,
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "score_for": score_for,
+        "score_against": score_against,
+        "games_for": games_for,
+        "games_against": games_against,
+    }
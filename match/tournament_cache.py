@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+# Per-tournament caches of this worker (bracket documents, projections,
+# names): at most TOURNAMENT_CACHE_SIZE tournaments each, every entry
+# dropped TOURNAMENT_CACHE_TTL seconds after it was stored
+TOURNAMENT_CACHE_SIZE = int(os.getenv("TOURNAMENT_CACHE_SIZE", "1000"))
+TOURNAMENT_CACHE_TTL = float(os.getenv("TOURNAMENT_CACHE_TTL", "300"))
+
+
+class TournamentCache:
+    """
+    LRU of values built per tournament. A value built from the database is
+    stored with the generation taken before building it, and refused if
+    the tournament was invalidated in between: the rows it was built from
+    may have changed, and the invalidation would be lost.
+    """
+
+    def __init__(self, max_entries: int = TOURNAMENT_CACHE_SIZE, ttl: float = TOURNAMENT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[int, Tuple[float, Any]]" = OrderedDict()
+        # counts invalidations; tournament_id -> count at its last one
+        self.counter = 0
+        self.invalidated: "OrderedDict[int, int]" = OrderedDict()
+        # the latest count forgotten from `invalidated` (or set by clearing
+        # everything): tournaments not listed may have been invalidated then
+        self.floor = 0
+
+    def generation(self) -> int:
+        """Take before reading what the value is built from; pass to set()."""
+        with self.lock:
+            return self.counter
+
+    def get(self, tournament_id: int) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(tournament_id)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self.entries[tournament_id]
+                return None
+            self.entries.move_to_end(tournament_id)
+            return value
+
+    def set(self, tournament_id: int, value: Any, generation: int) -> bool:
+        with self.lock:
+            if self.invalidated.get(tournament_id, self.floor) > generation:
+                return False
+            self.entries[tournament_id] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(tournament_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            return True
+
+    def invalidate(self, tournament_id: Optional[int] = None):
+        """Drops one tournament, or every tournament, and refuses values built before."""
+        with self.lock:
+            self.counter += 1
+            if tournament_id is None:
+                self.entries.clear()
+                self.invalidated.clear()
+                self.floor = self.counter
+                return
+            self.entries.pop(tournament_id, None)
+            self.invalidated[tournament_id] = self.counter
+            self.invalidated.move_to_end(tournament_id)
+            while len(self.invalidated) > self.max_entries:
+                _, forgotten = self.invalidated.popitem(last=False)
+                self.floor = max(self.floor, forgotten)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,111 @@
+from typing import List, Optional, Tuple
+from datetime import date, time
+import base64
+from fastapi import HTTPException
+from sqlalchemy import or_, tuple_
+from sqlalchemy.orm import Session
+
+from models import Match, Tournament, Team, TeamMember, EntrantTypeEnum
+from match.entrants import Entrant, slot_entrant
+from match.participant_names import get_entrant_names
+
+DEFAULT_PAGE_SIZE = 20
+
+Cursor = Tuple[date, time, int]
+
+
+# ------------------------------------------------------------------
+# Cursor
+# ------------------------------------------------------------------
+
+def encode_cursor(match: Match) -> str:
+    raw = f"{match.date.isoformat()}|{match.time.isoformat()}|{match.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        day, kickoff, match_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return date.fromisoformat(day), time.fromisoformat(kickoff), int(match_id)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+
+
+# ------------------------------------------------------------------
+# Feed
+# ------------------------------------------------------------------
+
+def user_entrants(db: Session, user_id: int) -> List[Entrant]:
+    """The player on their own plus every team they are an active member of."""
+    team_ids = (
+        db.query(TeamMember.team_id)
+        .join(Team, Team.id == TeamMember.team_id)
+        .filter(
+            TeamMember.user_id == user_id
+        )
+        .all()
+    )
+    return [(EntrantTypeEnum.solo.value, user_id)] + [(EntrantTypeEnum.team.value, tid) for tid, in team_ids]
+
+
+def get_upcoming_matches(
+    db: Session,
+    entrants: List[Entrant],
+    after: Optional[Cursor] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> List[Match]:
+    """
+    Scheduled, undecided matches of any of `entrants` from today on,
+    ordered by kickoff. Each slot is matched through its (type, id)
+    index; `after` continues from the last match of the previous page.
+    """
+    query = db.query(Match).filter(
+        or_(
+            tuple_(Match.participant1_type, Match.participant1_id).in_(entrants),
+            tuple_(Match.participant2_type, Match.participant2_id).in_(entrants),
+        ),
+        Match.winner_id.is_(None),
+        Match.is_draw.is_(False),
+        Match.date >= date.today(),
+        Match.time.isnot(None)
+    )
+    if after is not None:
+        query = query.filter(tuple_(Match.date, Match.time, Match.id) > tuple_(*after))
+
+    return query.order_by(Match.date, Match.time, Match.id).limit(limit).all()
+
+
+def upcoming_page(db: Session, entrants: List[Entrant], cursor: Optional[str], limit: int) -> dict:
+    """
+    One page of the feed with participant and tournament names resolved
+    in bulk: one query per participant type and one for the tournaments.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    # one extra row tells whether another page follows
+    matches = get_upcoming_matches(db, entrants, after, limit + 1)
+    has_more = len(matches) > limit
+    matches = matches[:limit]
+
+    names = get_entrant_names(db, [slot_entrant(m, slot) for m in matches for slot in (1, 2)])
+    tournament_names = dict(
+        db.query(Tournament.id, Tournament.name)
+        .filter(Tournament.id.in_({m.tournament_id for m in matches}))
+        .all()
+    ) if matches else {}
+
+    return {
+        "matches": [
+            {
+                **{key: getattr(m, key) for key in (
+                    "id", "tournament_id", "participant_type",
+                    "participant1_type", "participant1_id", "participant2_type", "participant2_id",
+                    "stage", "round", "date", "time", "court",
+                )},
+                "participant1_name": names.get(slot_entrant(m, 1)),
+                "participant2_name": names.get(slot_entrant(m, 2)),
+                "tournament_name": tournament_names.get(m.tournament_id),
+            }
+            for m in matches
+        ],
+        "next_cursor": encode_cursor(matches[-1]) if has_more else None,
+    }
@@ -1,14 +1,29 @@
 import enum
+import os
 from datetime import datetime, time , timezone
 from enum import unique
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, false
 from sqlalchemy import (
-    Column, Integer, String, Enum, Date, Time, Boolean, ForeignKey,
+    Column, Integer, Float, String, Enum, Date, Time, Boolean, ForeignKey,
     DateTime, UniqueConstraint, Index, CheckConstraint
 )
 from sqlalchemy.orm import relationship, declarative_base
 Base = declarative_base()
 
+# DB_STRICT_LOADING=true (tests, benchmarks): relationships raise instead of
+# lazy-loading, so a per-row load inside a loop fails loudly. Code that
+# needs a relationship loads it with an explicit loader option.
+STRICT_LOADING = os.getenv("DB_STRICT_LOADING", "false").lower() in ("1", "true", "yes")
+LAZY = "raise_on_sql" if STRICT_LOADING else "select"
+
+class SoftDelete:
+    """
+    Models deleted by setting deleted_at. Every ORM SELECT leaves their
+    deleted rows out, relationship loads included (see database.py); pass
+    execution_options(include_deleted=True) to a query to see them.
+    """
+    deleted_at = Column(DateTime, nullable=True)
+
 # ===================== ENUMS =====================
 
 class VisibilityEnum(str, enum.Enum):
@@ -24,6 +39,11 @@ class ParticipantEnum(str, enum.Enum):
     team = "team"
     solo = "solo"
 
+class EntrantTypeEnum(str, enum.Enum):
+    team = "team"
+    solo = "solo"
+    manual = "manual"
+
 class TournamentTypeEnum(str, enum.Enum):
     singleElimination = "Single Elimination"
     group = "Group"
@@ -40,8 +60,21 @@ class SortEnum(str, enum.Enum):
     asc = 'asc'
     desc = 'desc'
 
+class MatchStageEnum(str, enum.Enum):
+    winners = "winners"
+    losers = "losers"
+    grand_final = "grand_final"
+    group = "group"
+
+class TiebreakerEnum(str, enum.Enum):
+    head_to_head = "head_to_head"
+    wins = "wins"
+    fewest_losses = "fewest_losses"
+    score_difference = "score_difference"
+    score_for = "score_for"
+
 # ===================== USER =====================
-class User(Base):
+class User(SoftDelete, Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False)
@@ -70,24 +103,23 @@ class User(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False
     )
-    deleted_at = Column(DateTime, nullable=True)
 
     # relationships
     tournaments_created = relationship("Tournament",
-                    primaryjoin="and_(Tournament.created_by == User.id, Tournament.deleted_at.is_(None))",
-                    back_populates="organizer")
+                    back_populates="organizer",
+                    lazy=LAZY)
     team_created = relationship("Team",
-                                primaryjoin="and_(Team.created_by == User.id, Team.deleted_at.is_(None))",
-                                back_populates="organizer")
+                                back_populates="organizer",
+                                lazy=LAZY)
     team_memberships = relationship("TeamMember",
-                                    primaryjoin="and_(TeamMember.user_id == User.id, TeamMember.deleted_at.is_(None))",
-                                    back_populates="user")
+                                    back_populates="user",
+                                    lazy=LAZY)
     tournament_participations = relationship("TournamentParticipant",
-                                             primaryjoin="and_(TournamentParticipant.user_id == User.id, TournamentParticipant.deleted_at.is_(None))",
-                                             back_populates="user")
+                                             back_populates="user",
+                                             lazy=LAZY)
     manual_participants = relationship("ManualParticipant",
-                                       primaryjoin="and_(ManualParticipant.created_by == User.id, ManualParticipant.deleted_at.is_(None))",
-                                       back_populates="creator")
+                                       back_populates="creator",
+                                       lazy=LAZY)
 
     __table_args__ = (
         # For user search by name (case-insensitive)
@@ -117,7 +149,7 @@ class User(Base):
     )
 
 # ===================== MANUAL PARTICIPANT =====================
-class ManualParticipant(Base):
+class ManualParticipant(SoftDelete, Base):
     __tablename__ = "manual_participants"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -141,7 +173,6 @@ class ManualParticipant(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False
     )
-    deleted_at = Column(DateTime, nullable=True)
 
     __table_args__ = (
         Index("ix_manual_participant_name", "name", "created_by", unique=True, postgresql_where=Column("deleted_at").is_(None)),
@@ -149,11 +180,11 @@ class ManualParticipant(Base):
     )
 
     # relationships
-    creator = relationship("User", back_populates="manual_participants")
-    tournament_participations = relationship("TournamentParticipant", back_populates="manual_participant")
+    creator = relationship("User", back_populates="manual_participants", lazy=LAZY)
+    tournament_participations = relationship("TournamentParticipant", back_populates="manual_participant", lazy=LAZY)
 
 # ===================== TOURNAMENT =====================
-class Tournament(Base):
+class Tournament(SoftDelete, Base):
     __tablename__ = "tournaments"
     id = Column(Integer, primary_key=True)#, autoincrement=True)
     created_by = Column(
@@ -172,7 +203,7 @@ class Tournament(Base):
     hashed_password = Column(String(255), nullable=True)
 
     participant_type = Column(Enum(ParticipantEnum), nullable=False)
-    team_tournament = relationship("TournamentParticipant", back_populates="tournament")
+    team_tournament = relationship("TournamentParticipant", back_populates="tournament", lazy=LAZY)
 
     min_age = Column(Integer, nullable=True)
     start_date = Column(Date, nullable=False)
@@ -195,18 +226,17 @@ class Tournament(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False
     )
-    deleted_at = Column(DateTime, nullable=True)
 
     # relationship
     organizer = relationship("User",
-                             primaryjoin="and_(Tournament.created_by == User.id, User.deleted_at.is_(None))",
-                             back_populates="tournaments_created")
-    matches = relationship("Match", back_populates="tournament")
-    team_tournament = relationship("TeamTournament", uselist=False, cascade="all, delete-orphan", back_populates="tournament")
-    solo_tournament = relationship("SoloTournament", uselist=False, cascade="all, delete-orphan", back_populates="tournament")
+                             back_populates="tournaments_created",
+                             lazy=LAZY)
+    matches = relationship("Match", back_populates="tournament", lazy=LAZY)
+    team_tournament = relationship("TeamTournament", uselist=False, cascade="all, delete-orphan", back_populates="tournament", lazy=LAZY)
+    solo_tournament = relationship("SoloTournament", uselist=False, cascade="all, delete-orphan", back_populates="tournament", lazy=LAZY)
     participants = relationship("TournamentParticipant",
-                                primaryjoin="and_(TournamentParticipant.tournament_id == Tournament.id, TournamentParticipant.deleted_at.is_(None))",
-                                back_populates="tournament")
+                                back_populates="tournament",
+                                lazy=LAZY)
 
     __table_args__ = (
         # Most common: "Find upcoming football tournaments in Stryi"
@@ -246,7 +276,7 @@ class TeamTournament(Base):
     current_teams = Column(Integer, default=0, nullable=False)
     players_per_team = Column(Integer, nullable=False)
 
-    tournament = relationship("Tournament", back_populates="team_tournament")
+    tournament = relationship("Tournament", back_populates="team_tournament", lazy=LAZY)
 
 # ===================== SOLO TOURNAMENT =====================
 class SoloTournament(Base):
@@ -260,10 +290,10 @@ class SoloTournament(Base):
     max_players = Column(Integer, nullable=False)
     current_players = Column(Integer, default=0, nullable=False)
 
-    tournament = relationship("Tournament", back_populates="solo_tournament")
+    tournament = relationship("Tournament", back_populates="solo_tournament", lazy=LAZY)
 
 # ===================== TEAMS =====================
-class Team(Base):
+class Team(SoftDelete, Base):
     __tablename__ = "teams"
     id = Column(Integer, primary_key=True, autoincrement=True)
     created_by = Column(
@@ -296,22 +326,21 @@ class Team(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False
     )
-    deleted_at = Column(DateTime, nullable=True)
 
     members = relationship(
         "TeamMember",
-        primaryjoin="and_(TeamMember.team_id == Team.id, TeamMember.deleted_at.is_(None))",
-        back_populates="team"
+        back_populates="team",
+        lazy=LAZY
     )
     organizer = relationship(
         "User",
-        primaryjoin="and_(Team.created_by == User.id, User.deleted_at.is_(None))",
-        back_populates="team_created"
+        back_populates="team_created",
+        lazy=LAZY
     )
     tournament_participations = relationship(
         "TournamentParticipant",
-        primaryjoin="and_(TournamentParticipant.team_id == Team.id, TournamentParticipant.deleted_at.is_(None))",
-        back_populates="team"
+        back_populates="team",
+        lazy=LAZY
     )
 
     __table_args__ = (
@@ -322,7 +351,7 @@ class Team(Base):
     )
 
 
-class TeamMember(Base):
+class TeamMember(SoftDelete, Base):
     __tablename__ = "team_members"
     id = Column(Integer, primary_key=True, autoincrement=True)
 
@@ -341,14 +370,13 @@ class TeamMember(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False
     )
-    deleted_at = Column(DateTime, nullable=True)
 
     team = relationship("Team",
-                        primaryjoin="and_(TeamMember.team_id == Team.id, Team.deleted_at.is_(None))",
-                        back_populates="members")
+                        back_populates="members",
+                        lazy=LAZY)
     user = relationship("User",
-                        primaryjoin="and_(TeamMember.user_id == User.id, User.deleted_at.is_(None))",
-                        back_populates="team_memberships")
+                        back_populates="team_memberships",
+                        lazy=LAZY)
 
     __table_args__ = (
         # Enforce ONE active membership
@@ -357,12 +385,12 @@ class TeamMember(Base):
             "team_id",
             "user_id",
             unique=True,
-            postgresql_where=deleted_at.is_(None),
+            postgresql_where=Column("deleted_at").is_(None),
         ),
     )
 
 # ===================== TOURNAMENT PARTICIPANT =====================
-class TournamentParticipant(Base):
+class TournamentParticipant(SoftDelete, Base):
     __tablename__ = "tournament_participants"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -389,21 +417,20 @@ class TournamentParticipant(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False
     )
-    deleted_at = Column(DateTime, nullable=True)
 
     # relationships
     user = relationship("User",
-                        primaryjoin="and_(TournamentParticipant.user_id == User.id, User.deleted_at.is_(None))",
-                        back_populates="tournament_participations")
+                        back_populates="tournament_participations",
+                        lazy=LAZY)
     team = relationship("Team",
-                        primaryjoin="and_(TournamentParticipant.team_id == Team.id, Team.deleted_at.is_(None))",
-                        back_populates="tournament_participations")
+                        back_populates="tournament_participations",
+                        lazy=LAZY)
     manual_participant = relationship("ManualParticipant",
-                                      primaryjoin="and_(TournamentParticipant.manual_participant_id == ManualParticipant.id, ManualParticipant.deleted_at.is_(None))",
-                                      back_populates="tournament_participations")
+                                      back_populates="tournament_participations",
+                                      lazy=LAZY)
     tournament = relationship("Tournament",
-                              primaryjoin="and_(TournamentParticipant.tournament_id == Tournament.id, Tournament.deleted_at.is_(None))",
-                              back_populates="participants")
+                              back_populates="participants",
+                              lazy=LAZY)
     __table_args__ = (
         # Exactly ONE participant reference must be present
         CheckConstraint(
@@ -422,21 +449,21 @@ class TournamentParticipant(Base):
             "tournament_id",
             "user_id",
             unique=True,
-            postgresql_where=and_(user_id.isnot(None), deleted_at.is_(None)),
+            postgresql_where=and_(user_id.isnot(None), Column("deleted_at").is_(None)),
         ),
         Index(
             "idx_tp_tournament_team",
             "tournament_id",
             "team_id",
             unique=True,
-            postgresql_where=and_(team_id.isnot(None), deleted_at.is_(None))
+            postgresql_where=and_(team_id.isnot(None), Column("deleted_at").is_(None))
         ),
         Index(
             "idx_tp_tournament_manual",
             "tournament_id",
             "manual_participant_id",
             unique=True,
-            postgresql_where=and_(user_id.isnot(None),  deleted_at.is_(None)),
+            postgresql_where=and_(user_id.isnot(None), Column("deleted_at").is_(None)),
         ),
     )
 
@@ -456,7 +483,7 @@ class TournamentTeamMember(Base):
         nullable=False
     )
 
-class Request(Base):
+class Request(SoftDelete, Base):
     __tablename__ = "requests"
     id = Column(Integer, primary_key=True, autoincrement=True)
     teams_id = Column(Integer, ForeignKey("teams.id"), nullable=False, index=True)
@@ -474,9 +501,8 @@ class Request(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False
     )
-    deleted_at = Column(DateTime, nullable=True)
 
-class Invite(Base):
+class Invite(SoftDelete, Base):
     __tablename__ = "invites"
     id = Column(Integer, primary_key=True, autoincrement=True)
     teams_id = Column(Integer, ForeignKey("teams.id"), nullable=False, index=True)
@@ -494,22 +520,35 @@ class Invite(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False
     )
-    deleted_at = Column(DateTime, nullable=True)
 
-class Match(Base):
+class Match(SoftDelete, Base):
     __tablename__ = "matches"
     id = Column(Integer, primary_key=True)
     tournament_id = Column(Integer, ForeignKey("tournaments.id"))
     participant_type = Column(String, nullable=False)
+    # per-slot EntrantTypeEnum values: manual participants can play in solo and team tournaments
+    participant1_type = Column(String(10), nullable=True)
     participant1_id = Column(Integer, nullable=True)
+    participant2_type = Column(String(10), nullable=True)
     participant2_id = Column(Integer, nullable=True)
+    winner_type = Column(String(10), nullable=True)
     winner_id = Column(Integer, nullable=True)
+    # goals / points / sets won; games per set live in match_sets
+    score1 = Column(Integer, nullable=True)
+    score2 = Column(Integer, nullable=True)
+    # server default too, so bootstrap can add the column to existing rows
+    is_draw = Column(Boolean, default=False, server_default=false(), nullable=False)
+    # rating points moved to participant1 (participant2 lost the same amount)
+    rating_delta = Column(Float, nullable=True)
     winner_to_match_id = Column(Integer, ForeignKey("matches.id"), nullable=True)
     winner_to_slot = Column(Integer, nullable=True)
     loser_to_match_id = Column(Integer, ForeignKey("matches.id"), nullable=True)
     loser_to_slot = Column(Integer, nullable=True)
+    stage = Column(String(20), nullable=True)
+    round = Column(Integer, nullable=True)
     date = Column(Date, nullable=True)
     time = Column(Time, nullable=True)
+    court = Column(Integer, nullable=True)
 
     created_at = Column(
         DateTime(timezone=True),
@@ -523,7 +562,128 @@ class Match(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False
     )
-    deleted_at = Column(DateTime, nullable=True)
 
-    tournament = relationship("Tournament", back_populates="matches")
+    tournament = relationship("Tournament", back_populates="matches", lazy=LAZY)
+    sets = relationship("MatchSet", order_by="MatchSet.set_number",
+                        cascade="all, delete-orphan", back_populates="match",
+                        lazy=LAZY)
+
+    __table_args__ = (
+        # For: "Current bracket of a tournament" (retired sets are soft-deleted)
+        Index('ix_match_tournament_active', 'tournament_id', postgresql_where=(Column('deleted_at').is_(None))),
+
+        # For: "All / upcoming matches of participant X" (one index per slot, combined with OR;
+        # keyed by type too since user, team and manual ids overlap)
+        Index('ix_match_participant1', 'participant1_type', 'participant1_id', 'date', 'time'),
+        Index('ix_match_participant2', 'participant2_type', 'participant2_id', 'date', 'time'),
+
+        # For: "Schedule of a tournament" in kickoff order
+        Index('ix_match_tournament_schedule', 'tournament_id', 'date', 'time'),
+    )
+
+class MatchSet(Base):
+    __tablename__ = "match_sets"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    match_id = Column(Integer, ForeignKey("matches.id", ondelete="CASCADE"), nullable=False)
+    set_number = Column(Integer, nullable=False)
+    games1 = Column(Integer, nullable=False)
+    games2 = Column(Integer, nullable=False)
+
+    match = relationship("Match", back_populates="sets", lazy=LAZY)
+
+    __table_args__ = (
+        Index("uq_match_set_number", "match_id", "set_number", unique=True),
+    )
+
+# ===================== STANDINGS =====================
+class Standing(Base):
+    __tablename__ = "standings"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tournament_id = Column(
+        Integer,
+        ForeignKey("tournaments.id", ondelete="RESTRICT"),
+        nullable=False
+    )
+    participant_type = Column(String, nullable=False)
+    participant_id = Column(Integer, nullable=False)
+
+    played = Column(Integer, default=0, nullable=False)
+    wins = Column(Integer, default=0, nullable=False)
+    draws = Column(Integer, default=0, nullable=False)
+    losses = Column(Integer, default=0, nullable=False)
+    points = Column(Integer, default=0, nullable=False)
+
+    # goals / points / sets, and tennis games
+    score_for = Column(Integer, default=0, nullable=False)
+    score_against = Column(Integer, default=0, nullable=False)
+    games_for = Column(Integer, default=0, nullable=False)
+    games_against = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    __table_args__ = (
+        # One row per entrant, updated in place on every report
+        Index(
+            "uq_standing_participant",
+            "tournament_id",
+            "participant_type",
+            "participant_id",
+            unique=True,
+        ),
+
+        # For: "League table ordered by points"
+        Index('ix_standing_table', 'tournament_id', 'points'),
+
+        # For: "Career stats of a player or team"
+        Index('ix_standing_participant', 'participant_type', 'participant_id'),
+    )
+
+
+# ===================== RATINGS =====================
+class Rating(Base):
+    __tablename__ = "ratings"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sport = Column(String(20), nullable=False)
+    participant_type = Column(String, nullable=False)
+    participant_id = Column(Integer, nullable=False)
+
+    rating = Column(Float, default=1500.0, nullable=False)
+    games = Column(Integer, default=0, nullable=False)
 
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    __table_args__ = (
+        # One rating per entrant and sport, updated in place on every report
+        Index(
+            "uq_rating_participant",
+            "sport",
+            "participant_type",
+            "participant_id",
+            unique=True,
+        ),
+
+        # For: "Top N players of a sport"
+        Index('ix_rating_leaderboard', 'sport', 'participant_type', 'rating'),
+    )
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Callable, Dict, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_MAX_DELAY = 30
+
+# seconds to wait for the listener connection before retrying in the background
+CONNECT_TIMEOUT = 10
+
+
+class PostgresListener:
+    """
+    Holds one dedicated asyncpg connection per worker that LISTENs on the
+    channels in `handlers` and passes each payload to its channel's handler.
+    NOTIFYs sent while the connection is down are lost: `on_connect` runs
+    after every (re)connect, so in-process state fed by them can be reset.
+    """
+
+    def __init__(
+            self,
+            dsn: str,
+            handlers: Dict[str, Callable[[str], None]],
+            on_connect: Optional[Callable[[], None]] = None,
+    ):
+        # asyncpg takes plain postgresql:// URLs, without a SQLAlchemy driver suffix
+        self.dsn = dsn.replace("postgresql+psycopg2://", "postgresql://", 1)
+        self.handlers = handlers
+        self.on_connect = on_connect
+        self.connection = None
+        self.stopping = False
+        self.retrying = None
+
+    async def start(self):
+        self.connection = await asyncpg.connect(self.dsn, timeout=CONNECT_TIMEOUT)
+        self.connection.add_termination_listener(self.on_terminate)
+        for channel in self.handlers:
+            await self.connection.add_listener(channel, self.on_notify)
+        if self.on_connect is not None:
+            self.on_connect()
+
+    async def open(self):
+        """start() for worker boot: if the database is unreachable, keeps retrying in the background instead of failing."""
+        try:
+            await self.start()
+        except (OSError, asyncpg.PostgresError):
+            logger.warning("Postgres listener could not connect, retrying in the background")
+            self.retrying = asyncio.get_running_loop().create_task(self.reconnect())
+
+    async def stop(self):
+        self.stopping = True
+        if self.retrying is not None:
+            self.retrying.cancel()
+            self.retrying = None
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+
+    def on_notify(self, connection, pid, channel, payload):
+        try:
+            self.handlers[channel](payload)
+        except Exception:
+            # one bad event must not stop the others on this connection
+            logger.exception("Handling a NOTIFY on %s failed", channel)
+
+    def on_terminate(self, connection):
+        if not self.stopping:
+            self.retrying = asyncio.get_running_loop().create_task(self.reconnect())
+
+    async def reconnect(self):
+        """Retries until LISTEN is back."""
+        delay = 1
+        while not self.stopping:
+            try:
+                await self.start()
+                logger.info("Postgres listener reconnected")
+                return
+            except (OSError, asyncpg.PostgresError):
+                logger.warning("Postgres listener reconnect failed, retrying in %ss", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional, Sequence
+
+from sqlalchemy import Engine, event
+
+logger = logging.getLogger(__name__)
+
+# statements that can be EXPLAINed without running them
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+# longest parameter repr written to the slow-query log
+MAX_LOGGED_PARAMETERS = 2000
+
+# named parameters whose values are never logged
+SECRET_PARAMETERS = ("password", "token", "code")
+
+
+class QueryStats:
+    """SQL statements one request issued and the time spent waiting on them."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.duration = 0.0
+
+    def record(self, duration: float):
+        with self.lock:
+            self.count += 1
+            self.duration += duration
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 3)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration_ms};desc="{self.count} queries"'
+
+
+# set by the request middleware; sync endpoints run in a copy of the
+# request's context, so they record into the same QueryStats
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request() -> QueryStats:
+    stats = QueryStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def route_template(request) -> str:
+    """
+    The path template of the matched route, e.g. /users/{user_id}; the raw
+    path when nothing matched. Routes of included routers carry their path
+    without the router's prefix, which is put back from the request path
+    (prefixes here have no parameters).
+    """
+    route = request.scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return request.url.path
+    path = [segment for segment in request.url.path.split("/") if segment]
+    template_segments = [segment for segment in template.split("/") if segment]
+    prefix = path[:len(path) - len(template_segments)]
+    return "/" + "/".join(prefix + template_segments)
+
+
+def log_request(request, response, stats: QueryStats, duration: float):
+    """One line per request with its query count and database time, also passed as log record fields."""
+    path = route_template(request)
+    logger.info(
+        "%s %s %d: %d queries, %.1f ms in db, %.1f ms total",
+        request.method, path, response.status_code, stats.count, stats.duration_ms, duration * 1000,
+        extra={
+            "method": request.method,
+            "route": path,
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_ms": stats.duration_ms,
+            "duration_ms": round(duration * 1000, 3),
+        },
+    )
+
+
+def is_secret(name: str) -> bool:
+    return any(secret in name for secret in SECRET_PARAMETERS)
+
+
+def masked_parameters(parameters, names: Optional[Sequence[str]] = None, executemany: bool = False):
+    """
+    `parameters` with the values of secret parameters replaced. Positional
+    parameters (asyncpg passes a tuple) are matched to the statement's
+    parameter `names`; when those are unknown, none of the values is shown.
+    """
+    if executemany:
+        return [masked_parameters(row, names) for row in parameters]
+    if isinstance(parameters, dict):
+        return {key: "***" if is_secret(key) else value for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if names is None or len(names) != len(parameters):
+            return "<%d positional parameters>" % len(parameters)
+        return tuple("***" if is_secret(name) else value for name, value in zip(names, parameters))
+    return parameters
+
+
+def loggable_parameters(parameters, names: Optional[Sequence[str]] = None, executemany: bool = False) -> str:
+    return repr(masked_parameters(parameters, names, executemany))[:MAX_LOGGED_PARAMETERS]
+
+
+def explain(connection, statement: str, parameters) -> Optional[str]:
+    """
+    Plan of a statement that just ran, fetched on the same connection and
+    inside the same transaction. Goes through the raw driver cursor, so it is not counted,
+    and inside a savepoint, so a failing EXPLAIN cannot abort the request's
+    transaction.
+    """
+    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT explain_slow_query")
+        try:
+            cursor.execute("EXPLAIN " + statement, parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as exc:
+            cursor.execute("ROLLBACK TO SAVEPOINT explain_slow_query")
+            return f"EXPLAIN failed: {exc}"
+        cursor.execute("RELEASE SAVEPOINT explain_slow_query")
+        return plan
+    finally:
+        cursor.close()
+
+
+def install_query_hooks(slow_query_ms: float, explain_slow: bool = True):
+    """
+    Times every statement on every engine, including the async ones and
+    engines created later: adds it to the current request's QueryStats and
+    logs it with its parameters (and EXPLAIN plan) when it took longer than
+    `slow_query_ms`.
+    """
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_started"].pop()
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.record(duration)
+
+        if duration * 1000 < slow_query_ms:
+            return
+        plan = None
+        if explain_slow and not executemany:
+            plan = explain(conn, statement, parameters)
+        # names of positional parameters, in order, when SQLAlchemy compiled the statement
+        compiled = getattr(context, "compiled", None)
+        names = getattr(compiled, "positiontup", None)
+        logger.warning(
+            "Slow query (%.1f ms): %s\nparameters: %s%s",
+            duration * 1000, statement, loggable_parameters(parameters, names, executemany),
+            f"\n{plan}" if plan else "",
+            extra={"duration_ms": round(duration * 1000, 3), "statement": statement, "plan": plan},
+        )
+
+    @event.listens_for(Engine, "handle_error")
+    def drop_timer(exception_context):
+        # a failed statement never reaches after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
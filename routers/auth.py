@@ -2,14 +2,15 @@ from datetime import timedelta
 from fastapi import Depends, HTTPException, status, APIRouter, Query
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from auth.auth_handler import (
-    authenticate_user,
+    authenticate_user_async,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     create_access_token,
     get_user,
     get_password_hash,
 )
-from database import get_db
+from database import UNIT_OF_WORK, get_db, get_async_db
 from schemas import Token, UserCreate, UserResponse
 from models import User
 import random
@@ -18,7 +19,7 @@ from pydantic import BaseModel
 auth_router = APIRouter(prefix="", tags=["auth"])
 verification_codes = {}  
 
-@auth_router.post("/register", response_model=UserResponse)
+@auth_router.post("/register", response_model=UserResponse, dependencies=[UNIT_OF_WORK])
 def register_user(user: UserCreate, db: Session = Depends(get_db)):
     if get_user(db, user.nickname):
         raise HTTPException(status_code=400, detail="Nickname already registered.")
@@ -39,11 +40,10 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         is_verified=False,  
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    db.flush()
     return db_user
 
-@auth_router.post("/send-verification-code")
+@auth_router.post("/send-verification-code", dependencies=[UNIT_OF_WORK])
 def send_verification_code(email: str = Query(...), db: Session = Depends(get_db)):
     user = get_user(db, email)
     if not user:
@@ -63,11 +63,11 @@ class TokenWithUserId(BaseModel):
     user_id: int
 
 @auth_router.post("/token", response_model=TokenWithUserId)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -89,14 +89,13 @@ def login_for_access_token(
 class VerificationCode(BaseModel):
     email: str
     code: str
-@auth_router.post("/verify-code")
+@auth_router.post("/verify-code", dependencies=[UNIT_OF_WORK])
 def verify_code(data: VerificationCode, db: Session = Depends(get_db)):
     user = get_user(db, data.email)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
     user.email_verified = True
-    db.commit()
 
     return {"message": "Email verified successfully."}
 
@@ -1,22 +1,44 @@
 from typing import Optional, List
+from collections import defaultdict
+from functools import partial
 from datetime import time
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import UNIT_OF_WORK, get_db, get_read_db, get_engine, SessionLocal, after_commit
 
 from models import Tournament, Match
-from schemas import TournamentTypeEnum, ParticipantEnum, MatchResponse, ReportWinnerRequest
+from schemas import TournamentTypeEnum, ParticipantEnum, MatchResponse, ReportWinnerRequest, MatchBase, \
+    StandingResponse, TiebreakerEnum, BracketResponse, ReportWinnersRequest, ReportWinnerOutcome, \
+    ScheduleRequest, ScheduleResponse, ReportScoreRequest, ParticipantStatsResponse, SportEnum, EntrantTypeEnum, \
+    ProjectionResponse, UpcomingMatchesResponse
 from match.match_handler import get_participants, generate_single_elimination, \
-    generate_double_elimination, get_all_matches, report_match_winner, generate_round_robin
+    generate_double_elimination, get_all_matches, report_match_winner, generate_round_robin, report_match_score, \
+    correct_match_winner, report_match_winners, affected_match_ids, get_match_for_result, get_participant_matches, lock_tournament_matches, count_active_matches, retire_matches
+from match.standings import get_standings, recompute_standings, get_participant_stats
+from match.bracket_document import get_bracket_document, invalidate_bracket
+from match.participant_names import matches_with_names
+from match.projection import get_projection, DEFAULT_SIMULATIONS
+from match.scheduler import schedule_matches
+from match.upcoming import upcoming_page, user_entrants, DEFAULT_PAGE_SIZE
+from match.live import notify_matches_changed, subscribe, unsubscribe
+
+# comment line sent to idle live streams so proxies keep them open
+LIVE_KEEPALIVE_SECONDS = 15
 
 bracket_router = APIRouter(prefix="", tags=["Matches"])
 
 
-@bracket_router.post("/{tournament_id}/generate-matches")
+@bracket_router.post("/{tournament_id}/generate-matches", dependencies=[UNIT_OF_WORK])
 def generate_matches_route(
     tournament_id: int,
     format1: Optional[str] = None,
+    replace: bool = False,
+    grand_final_reset: bool = True,
     db: Session = Depends(get_db)
 ):
     tournament = (
@@ -33,6 +55,15 @@ def generate_matches_route(
     if not participants:
         raise HTTPException(400, "No participants registered")
 
+    # concurrent generate calls for the same tournament queue up here
+    lock_tournament_matches(db, tournament_id)
+
+    replaced = 0
+    if count_active_matches(db, tournament_id):
+        if not replace:
+            raise HTTPException(409, "Matches already generated, use replace=true to regenerate")
+        replaced = retire_matches(db, tournament_id)
+
     if bracket_type == TournamentTypeEnum.singleElimination.value:
         created = generate_single_elimination(
             db=db,
@@ -44,7 +75,8 @@ def generate_matches_route(
         created = generate_double_elimination(
             db=db,
             tournament=tournament,
-            participants=participants
+            participants=participants,
+            grand_final_reset=grand_final_reset
         )
 
     elif bracket_type == TournamentTypeEnum.group.value:
@@ -57,14 +89,47 @@ def generate_matches_route(
     else:
         raise HTTPException(400, "Unknown bracket type")
 
-    db.commit()
+    match_ids = [m.id for m in created]
 
-    for m in created:
-        db.refresh(m)
+    notify_matches_changed(db, tournament_id, "generated", match_ids)
+    after_commit(db, partial(invalidate_bracket, tournament_id))
 
     return {
-        "created": len(created),
-        "match_ids": [m.id for m in created]
+        "created": len(match_ids),
+        "replaced": replaced,
+        "match_ids": match_ids
+    }
+
+
+@bracket_router.post("/{tournament_id}/schedule", response_model=ScheduleResponse, dependencies=[UNIT_OF_WORK])
+def schedule_matches_route(
+    tournament_id: int,
+    payload: ScheduleRequest,
+    db: Session = Depends(get_db)
+):
+    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    if not tournament:
+        raise HTTPException(404, "Tournament not found")
+
+    assignments = schedule_matches(
+        db,
+        tournament,
+        courts=payload.courts,
+        match_duration=payload.match_duration_minutes,
+        min_rest=payload.min_rest_minutes,
+        day_start=payload.day_start,
+        day_end=payload.day_end,
+    )
+    notify_matches_changed(db, tournament_id, "scheduled", [a["id"] for a in assignments])
+    after_commit(db, partial(invalidate_bracket, tournament_id))
+
+    if not assignments:
+        raise HTTPException(404, "No matches found")
+
+    return {
+        "scheduled": len(assignments),
+        "first_date": min(a["date"] for a in assignments),
+        "last_date": max(a["date"] for a in assignments),
     }
 
 
@@ -78,12 +143,126 @@ def get_matches_route(tournament_id: int, db: Session = Depends(get_db)):
 
     if not matches:
         raise HTTPException(404, "No matches not found")
-    return matches
+    return matches_with_names(db, matches)
+
+
+def tournament_exists(tournament_id: int) -> bool:
+    # short-lived session: a live stream must not hold a pooled connection
+    with SessionLocal(bind=get_engine()) as db:
+        return db.query(Tournament.id).filter(Tournament.id == tournament_id).first() is not None
+
+
+@bracket_router.get("/live/{tournament_id}")
+async def live_matches_route(tournament_id: int):
+    """
+    Server-Sent Events stream of match changes in a tournament. Each event
+    names what happened ("generated", "scheduled", "results") and the
+    affected match ids (null when too many to list); clients re-read the
+    bracket on each event instead of polling. A client that falls too far
+    behind gets a single "resync" event in place of the ones it missed.
+    """
+    if not await run_in_threadpool(tournament_exists, tournament_id):
+        raise HTTPException(404, "Tournament not found")
 
+    queue = subscribe(tournament_id)
 
-@bracket_router.put("/report_winner", response_model=MatchResponse)
+    async def events():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=LIVE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            unsubscribe(tournament_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@bracket_router.get("/bracket/{tournament_id}", response_model=BracketResponse)
+def get_bracket_route(tournament_id: int, db: Session = Depends(get_db)):
+    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    if not tournament:
+        raise HTTPException(404, "Tournament not found")
+
+    return get_bracket_document(db, tournament)
+
+
+@bracket_router.get("/projection/{tournament_id}", response_model=ProjectionResponse)
+def get_projection_route(
+    tournament_id: int,
+    simulations: int = Query(DEFAULT_SIMULATIONS, ge=100, le=100000),
+    db: Session = Depends(get_db)
+):
+    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    if not tournament:
+        raise HTTPException(404, "Tournament not found")
+
+    return get_projection(db, tournament, simulations)
+
+
+@bracket_router.put("/report_winner", response_model=MatchResponse, dependencies=[UNIT_OF_WORK])
 def report_winner_route(payload: ReportWinnerRequest, db: Session = Depends(get_db)):
-    match = db.query(Match).filter(Match.id == payload.match_id).first()
+    match = get_match_for_result(db, payload.match_id)
+    if not match:
+        raise HTTPException(404, "Match not found")
+
+    if payload.winner == 1:
+        winner_id = match.participant1_id
+    elif payload.winner == 2:
+        winner_id = match.participant2_id
+    else:
+        raise HTTPException(400, "Invalid winner")
+
+    if winner_id is None:
+        raise HTTPException(400, "Match slot is empty")
+
+    report_match_winner(db, match, payload.winner)
+    notify_matches_changed(db, match.tournament_id, "results", affected_match_ids(match))
+    after_commit(db, partial(invalidate_bracket, match.tournament_id))
+    return matches_with_names(db, [match])[0]
+
+
+@bracket_router.put("/report_score", response_model=MatchBase, dependencies=[UNIT_OF_WORK])
+def report_score_route(payload: ReportScoreRequest, db: Session = Depends(get_db)):
+    match = get_match_for_result(db, payload.match_id)
+    if not match:
+        raise HTTPException(404, "Match not found")
+
+    sets = [(s.games1, s.games2) for s in payload.sets] if payload.sets else None
+    report_match_score(db, match, payload.score1, payload.score2, sets)
+    notify_matches_changed(db, match.tournament_id, "results", affected_match_ids(match))
+    after_commit(db, partial(invalidate_bracket, match.tournament_id))
+    return matches_with_names(db, [match])[0]
+
+
+@bracket_router.put("/report_winners", response_model=List[ReportWinnerOutcome], dependencies=[UNIT_OF_WORK])
+def report_winners_route(payload: ReportWinnersRequest, db: Session = Depends(get_db)):
+    outcomes = report_match_winners(
+        db, [(item.match_id, item.winner) for item in payload.results]
+    )
+
+    reported = [o["match_id"] for o in outcomes if o["status"] == "ok"]
+    changed = defaultdict(list)
+    if reported:
+        for match in db.query(Match).filter(Match.id.in_(reported)).all():
+            changed[match.tournament_id].extend(affected_match_ids(match))
+    for tournament_id, match_ids in changed.items():
+        notify_matches_changed(db, tournament_id, "results", match_ids)
+        after_commit(db, partial(invalidate_bracket, tournament_id))
+
+    return outcomes
+
+
+@bracket_router.put("/correct_winner", response_model=List[MatchBase], dependencies=[UNIT_OF_WORK])
+def correct_winner_route(payload: ReportWinnerRequest, db: Session = Depends(get_db)):
+    match = get_match_for_result(db, payload.match_id)
     if not match:
         raise HTTPException(404, "Match not found")
 
@@ -94,6 +273,76 @@ def report_winner_route(payload: ReportWinnerRequest, db: Session = Depends(get_
     else:
         raise HTTPException(400, "Invalid winner")
 
-    report_match_winner(db, match, winner_id)
-    db.commit()
-    return match
+    if winner_id is None:
+        raise HTTPException(400, "Match slot is empty")
+
+    changed = correct_match_winner(db, match, payload.winner)
+    notify_matches_changed(db, match.tournament_id, "results", [m.id for m in changed])
+    after_commit(db, partial(invalidate_bracket, match.tournament_id))
+    return matches_with_names(db, changed)
+
+
+@bracket_router.get("/standings/{tournament_id}", response_model=List[StandingResponse])
+def get_standings_route(
+    tournament_id: int,
+    tiebreakers: List[TiebreakerEnum] = Query(None),
+    db: Session = Depends(get_read_db)
+):
+    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    if not tournament:
+        raise HTTPException(404, "Tournament not found")
+
+    return get_standings(db, tournament_id, tiebreakers)
+
+
+@bracket_router.post("/standings/{tournament_id}/recompute", response_model=List[StandingResponse], dependencies=[UNIT_OF_WORK])
+def recompute_standings_route(tournament_id: int, db: Session = Depends(get_db)):
+    tournament = db.query(Tournament).filter(Tournament.id == tournament_id).first()
+    if not tournament:
+        raise HTTPException(404, "Tournament not found")
+
+    recompute_standings(db, tournament_id)
+    db.flush()
+    return get_standings(db, tournament_id)
+
+
+@bracket_router.get("/participant/{participant_type}/{participant_id}", response_model=List[MatchBase])
+def get_participant_matches_route(
+    participant_type: EntrantTypeEnum,
+    participant_id: int,
+    db: Session = Depends(get_db)
+):
+    matches = get_participant_matches(db, participant_type.value, participant_id)
+    return matches_with_names(db, matches)
+
+
+@bracket_router.get("/upcoming/{participant_type}/{participant_id}", response_model=UpcomingMatchesResponse)
+def get_upcoming_matches_route(
+    participant_type: EntrantTypeEnum,
+    participant_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Next matches across all tournaments, by kickoff. For a solo player
+    this includes the matches of their teams.
+    """
+    if participant_type == EntrantTypeEnum.solo:
+        entrants = user_entrants(db, participant_id)
+    else:
+        entrants = [(participant_type.value, participant_id)]
+    return upcoming_page(db, entrants, cursor, limit)
+
+
+@bracket_router.get("/stats/{participant_type}/{participant_id}", response_model=ParticipantStatsResponse)
+def get_participant_stats_route(
+    participant_type: EntrantTypeEnum,
+    participant_id: int,
+    sport: Optional[SportEnum] = None,
+    db: Session = Depends(get_read_db)
+):
+    return get_participant_stats(
+        db, participant_type.value, participant_id,
+        sport.value if sport else None,
+    )
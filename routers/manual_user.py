@@ -10,7 +10,7 @@ from crud import alter_manual_participant, get_active_user
 
 manual_participant_router = APIRouter(tags=["Manual Participants"])
 
-@manual_participant_router.post("/create_manual", response_model=schemas.ParticipantManualResponse)
+@manual_participant_router.post("/create_manual", response_model=schemas.ParticipantManualResponse, dependencies=[database.UNIT_OF_WORK])
 def create_participant_manual_route(participant_: schemas.ParticipantManualCreate, db: Session = Depends(database.get_db)):
     user = get_active_user(db, participant_.created_by)
     if not user:
@@ -25,11 +25,10 @@ def create_participant_manual_route(participant_: schemas.ParticipantManualCreat
     if not new_participant:
         raise ValueError("Something went wrong.")
 
-    user.manual_participants.append(new_participant)
     return new_participant
 
 @manual_participant_router.get("/all_active", response_model=List[schemas.ParticipantManualResponse])
-def get_manual_active_participant_route(db: Session = Depends(database.get_db)):
+def get_manual_active_participant_route(db: Session = Depends(database.get_read_db)):
     manual_participant = crud.get_manual_active_participants(db)
 
     if not manual_participant:
@@ -38,7 +37,7 @@ def get_manual_active_participant_route(db: Session = Depends(database.get_db)):
     return manual_participant
 
 @manual_participant_router.get("/all", response_model=List[schemas.ParticipantManualResponse])
-def get_manual_participant_route(db: Session = Depends(database.get_db)):
+def get_manual_participant_route(db: Session = Depends(database.get_read_db)):
     manual_participant = crud.get_manual_participants(db)
 
     if not manual_participant:
@@ -47,7 +46,7 @@ def get_manual_participant_route(db: Session = Depends(database.get_db)):
     return manual_participant
 
 @manual_participant_router.get("/{manual_participant_id}", response_model=schemas.ParticipantManualResponse)
-def get_manual_participant_route(manual_participant_id: int, db: Session = Depends(database.get_db)):
+def get_manual_participant_route(manual_participant_id: int, db: Session = Depends(database.get_read_db)):
     manual_participant = crud.get_manual_participant_by_id(db, manual_participant_id)
 
     if not manual_participant:
@@ -56,7 +55,7 @@ def get_manual_participant_route(manual_participant_id: int, db: Session = Depen
     return manual_participant
 
 @manual_participant_router.get("/by_name/{manual_participant_name}", response_model=schemas.ParticipantManualResponse)
-def get_manual_participant_by_name_route(manual_participant_name: str, db: Session = Depends(database.get_db)):
+def get_manual_participant_by_name_route(manual_participant_name: str, db: Session = Depends(database.get_read_db)):
     manual_participant = crud.get_manual_participant_by_name(db, manual_participant_name)
 
     if not manual_participant:
@@ -64,7 +63,7 @@ def get_manual_participant_by_name_route(manual_participant_name: str, db: Sessi
 
     return manual_participant
 
-@manual_participant_router.put("/alter/{participant_id}", response_model=schemas.ParticipantManualAlter)
+@manual_participant_router.put("/alter/{participant_id}", response_model=schemas.ParticipantManualAlter, dependencies=[database.UNIT_OF_WORK])
 def alter_manual_participant_route(manual_participant_id: int, update_data: schemas.ParticipantManualAlter, db: Session = Depends(database.get_db)):
     db_participant = alter_manual_participant(db, manual_participant_id, update_data)
 
@@ -73,7 +72,7 @@ def alter_manual_participant_route(manual_participant_id: int, update_data: sche
 
     return db_participant
 
-@manual_participant_router.delete("/delete/{manual_participant_id}", response_model=schemas.ParticipantManualResponse)
+@manual_participant_router.delete("/delete/{manual_participant_id}", response_model=schemas.ParticipantManualResponse, dependencies=[database.UNIT_OF_WORK])
 def delete_participant_route(manual_participant_id: int, db: Session = Depends(database.get_db)):
     db_participant = crud.delete_manual_participant(db, manual_participant_id)
 
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+
+from database import created_engines
+from entity_cache import cache_status
+from pool_metrics import pool_status
+
+metrics_router = APIRouter(prefix="", tags=["Metrics"])
+
+
+@metrics_router.get("/pool")
+def get_pool_metrics():
+    """Connection pool occupancy and checkout wait times of this worker."""
+    return pool_status(created_engines())
+
+
+@metrics_router.get("/cache")
+def get_cache_metrics():
+    """Entity cache size and hit / miss counters of this worker."""
+    return cache_status()
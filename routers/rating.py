@@ -0,0 +1,35 @@
+from typing import Optional, List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from database import UNIT_OF_WORK, get_db, get_read_db
+
+from schemas import SportEnum, EntrantTypeEnum, RatingResponse, RatingRecomputeResponse
+from match.participant_names import get_participant_names
+from match.ratings import get_leaderboard, recompute_ratings
+
+rating_router = APIRouter(prefix="", tags=["Ratings"])
+
+
+@rating_router.get("/leaderboard/{sport}", response_model=List[RatingResponse])
+def get_leaderboard_route(
+    sport: SportEnum,
+    participant_type: EntrantTypeEnum = EntrantTypeEnum.solo,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    leaderboard = get_leaderboard(db, sport.value, participant_type.value, limit)
+
+    names = get_participant_names(
+        db, participant_type.value, [row["participant_id"] for row in leaderboard]
+    )
+    for row in leaderboard:
+        row["name"] = names.get(row["participant_id"])
+
+    return leaderboard
+
+
+@rating_router.post("/recompute", response_model=RatingRecomputeResponse, dependencies=[UNIT_OF_WORK])
+def recompute_ratings_route(sport: Optional[SportEnum] = None, db: Session = Depends(get_db)):
+    rated = recompute_ratings(db, sport.value if sport else None)
+    return {"rated_matches": rated}
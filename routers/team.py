@@ -3,6 +3,7 @@ from venv import create
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import desc, asc
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 from datetime import datetime
 from models import TeamMember
@@ -11,13 +12,14 @@ from crud import create_team, get_active_team, get_teams_by_user_id, delete_team
     leave_team, get_active_user, get_my_active_teams, pagination_params, get_number_of_instances_by_id_active, \
     get_my_all_teams, get_number_of_instances_by_id_all, get_teams_all, get_number_of_instances_all, \
     get_teams_all_active, get_number_of_instances_active, alter_team
-from database import get_db
+from database import UNIT_OF_WORK, get_db, get_read_db, get_async_read_db
+import async_crud
 from models import VisibilityEnum, SortEnum, Team
 from schemas import TeamCreate, TeamResponse, SportEnum, JoinTeamRequest, Pagination, ListTeam, TeamUpdate, \
     TeamMemberResponse, MessageResponse
 team_router = APIRouter(prefix="", tags=["Teams"])
 
-@team_router.post("/create", response_model=TeamResponse)
+@team_router.post("/create", response_model=TeamResponse, dependencies=[UNIT_OF_WORK])
 def create_team_route(data: TeamCreate, db: Session = Depends(get_db)):
     db_user = get_active_user(db, data.created_by)
 
@@ -32,14 +34,12 @@ def create_team_route(data: TeamCreate, db: Session = Depends(get_db)):
             detail="Invalid creator_id or duplicate participant"
         )
     new_team.current_players = db.query(TeamMember).filter(TeamMember.team_id == new_team.id).count()
-    db.commit()
-    db.refresh(new_team)
-    db_user.team_created.append(new_team)
+    db.flush()
 
     return new_team
 
 @team_router.get("/myteams/all_active", response_model=ListTeam)
-def get_active_teams_by_org_id(created_by: int, db: Session = Depends(get_db), pagination: Pagination = Depends(pagination_params)):
+def get_active_teams_by_org_id(created_by: int, db: Session = Depends(get_read_db), pagination: Pagination = Depends(pagination_params)):
     user = get_active_user(db, created_by)
 
     if not user:
@@ -77,7 +77,7 @@ def get_active_teams_by_org_id(created_by: int, db: Session = Depends(get_db), p
     return response
 
 @team_router.get("/myteams/all", response_model=ListTeam)
-def get_all_teams_by_org_id(created_by: int, db: Session = Depends(get_db), pagination: Pagination = Depends(pagination_params)):
+def get_all_teams_by_org_id(created_by: int, db: Session = Depends(get_read_db), pagination: Pagination = Depends(pagination_params)):
     user = get_active_user(db, created_by)
 
     if not user:
@@ -118,7 +118,7 @@ def get_all_teams_by_org_id(created_by: int, db: Session = Depends(get_db), pagi
     return response
 
 @team_router.get("/all", response_model=ListTeam)
-def get_all_teams_route(db: Session = Depends(get_db), pagination: Pagination = Depends(pagination_params)):
+def get_all_teams_route(db: Session = Depends(get_read_db), pagination: Pagination = Depends(pagination_params)):
     order_by = desc if pagination.order == SortEnum.desc else asc
 
     start = 0 if pagination.page == 1 else (pagination.page - 1) * pagination.perPage
@@ -153,14 +153,14 @@ def get_all_teams_route(db: Session = Depends(get_db), pagination: Pagination =
     return response
 
 @team_router.get("/all_active", response_model=ListTeam)
-def get_active_teams_route(db: Session = Depends(get_db), pagination: Pagination = Depends(pagination_params)):
+async def get_active_teams_route(db: AsyncSession = Depends(get_async_read_db), pagination: Pagination = Depends(pagination_params)):
     order_by = desc if pagination.order == SortEnum.desc else asc
 
     start = 0 if pagination.page == 1 else (pagination.page - 1) * pagination.perPage
     end = pagination.perPage + start
 
-    teams = get_teams_all_active(db, pagination, order_by, start)
-    total = get_number_of_instances_active(db, Team)
+    teams = await async_crud.get_teams_all_active(db, pagination, order_by, start)
+    total = await async_crud.get_number_of_instances_active(db, Team)
 
     response = {
         "data": teams,
@@ -188,11 +188,11 @@ def get_active_teams_route(db: Session = Depends(get_db), pagination: Pagination
     return response
 
 @team_router.get("/{team_id}", response_model=TeamResponse)
-def get_team_route(team_id: int, db: Session = Depends(get_db)):
-    team = get_active_team(db, team_id)
+async def get_team_route(team_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    team = await async_crud.get_active_team(db, team_id)
     return team
 
-@team_router.patch("/alter/{team_id}", response_model=TeamResponse)
+@team_router.patch("/alter/{team_id}", response_model=TeamResponse, dependencies=[UNIT_OF_WORK])
 def alter_team_route(team_id: int, updated_data: TeamUpdate, db: Session = Depends(get_db)):
     db_team = get_active_team(db, team_id)
 
@@ -213,18 +213,18 @@ def alter_team_route(team_id: int, updated_data: TeamUpdate, db: Session = Depen
 
     return db_team
 
-@team_router.delete("/delete/{team_id}", response_model=TeamResponse)
+@team_router.delete("/delete/{team_id}", response_model=TeamResponse, dependencies=[UNIT_OF_WORK])
 def delete_team_route(team_id: int, db: Session = Depends(get_db)):
     db_team = delete_team(db, team_id)
     return db_team
 
 @team_router.get("/sport/", response_model=List[TeamResponse])
-def get_teams_by_sport_id(user_id: int, sport: SportEnum, db: Session = Depends(get_db)):
+def get_teams_by_sport_id(user_id: int, sport: SportEnum, db: Session = Depends(get_read_db)):
     teams = get_teams_by_user_and_sport(db, user_id, sport)
     return teams
 
 @team_router.get("/joined_participants/{user_id}", response_model=List[TeamResponse])
-def get_teams_by_joined_user_id(user_id: int, db: Session = Depends(get_db)):
+def get_teams_by_joined_user_id(user_id: int, db: Session = Depends(get_read_db)):
     db_user = get_active_user(db, user_id)
 
     if not db_user:
@@ -240,10 +240,10 @@ def get_teams_by_joined_user_id(user_id: int, db: Session = Depends(get_db)):
     return valid_teams
 
 
-@team_router.post("/join", response_model=TeamMemberResponse)
+@team_router.post("/join", response_model=TeamMemberResponse, dependencies=[UNIT_OF_WORK])
 def join_team_route(request: JoinTeamRequest, db: Session = Depends(get_db)):
     return join_team(db, request.team_id, request.user_id, request.password)
 
-@team_router.post("/leave", response_model=MessageResponse)
+@team_router.post("/leave", response_model=MessageResponse, dependencies=[UNIT_OF_WORK])
 def leave_team_route(request: JoinTeamRequest, db: Session = Depends(get_db)):
     return leave_team(db, request.team_id, request.user_id)
\ No newline at end of file
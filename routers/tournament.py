@@ -1,20 +1,21 @@
 from datetime import datetime
-from sqlalchemy.orm import joinedload
 from typing import List, Union
 from sqlalchemy import desc, asc
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from crud import create_tournament, get_tournament_active, get_tournaments_all, \
     leave_tournament, get_tournaments_by_min_age, get_tournaments_by_visibility, get_tournaments_by_sport, \
     get_tournaments_by_start_date, get_tournaments_by_location, get_tournaments_by_participant_id, \
     get_tournament_detail_by_id_active, get_solo_tournament_by_tournament_id, get_team_tournament_by_tournament_id, \
-    delete_tournament, pagination_params, get_mytournaments_all, alter_tournament, get_active_user, \
+    TOURNAMENT_DETAILS, delete_tournament, pagination_params, get_mytournaments_all, alter_tournament, get_active_user, \
     get_tournaments_all_active, get_number_of_instances_all, get_number_of_instances_active, \
     get_number_of_instances_by_id_all, get_mytournaments_all_active, get_number_of_instances_by_id_active, \
     get_tournament_detail_by_id_include_deleted, get_mytournaments_history, join_tournament_team, join_tournament_solo, \
     leave_tournament_team, leave_tournament_solo, add_detail_filed_all_active
 
-from database import get_db
+from database import UNIT_OF_WORK, get_db, get_read_db, get_async_read_db
+import async_crud
 from models import ParticipantEnum, SortEnum, Tournament
 from schemas import TournamentCreate, TournamentResponse, JoinTournamentRequest, LeaveTournamentRequest, \
     TournamentParticipantResponse, VisibilityEnum, SportEnum, SoloTournamentResponse, TeamTournamentResponse, \
@@ -111,7 +112,7 @@ def add_detail_filed_all(db, tournament: TournamentCreate):
 
     return None
 
-@tournament_router.post("/create", response_model=TournamentResponse, operation_id="create_tournament")
+@tournament_router.post("/create", response_model=TournamentResponse, operation_id="create_tournament", dependencies=[UNIT_OF_WORK])
 def create_tournament_route(data: TournamentCreate, db: Session = Depends(get_db)):
     user = get_active_user(db, data.created_by)
 
@@ -125,26 +126,24 @@ def create_tournament_route(data: TournamentCreate, db: Session = Depends(get_db
     if not tournament:
         raise ValueError("Something went wrong.")
 
-    user.tournaments_created.append(tournament) # relationship work
-
     tournament = add_detail_filed_all_active(db, tournament)
     return tournament
 
 
 """test something to connect with frontend"""
 @tournament_router.get("/all_active", response_model=ListTournament)
-def get_all_active_tournaments_route(db: Session = Depends(get_db), pagination: Pagination = Depends(pagination_params)):
+async def get_all_active_tournaments_route(db: AsyncSession = Depends(get_async_read_db), pagination: Pagination = Depends(pagination_params)):
     order_by = desc if pagination.order == SortEnum.desc else asc
 
     start = 0 if pagination.page == 1 else (pagination.page - 1) * pagination.perPage
     end = pagination.perPage + start
 
-    tournaments = get_tournaments_all_active(db, pagination, order_by, start)
-    total = get_number_of_instances_active(db, Tournament)
+    tournaments = await async_crud.get_tournaments_all_active(db, pagination, order_by, start)
+    total = await async_crud.get_number_of_instances_active(db, Tournament)
 
     tournaments_with_details = []
     for t in tournaments:
-        t_detail = add_detail_filed_all_active(db, t)
+        t_detail = async_crud.add_detail_field(t)
         if t_detail:
             tournaments_with_details.append(t_detail)
 
@@ -165,7 +164,7 @@ def get_all_active_tournaments_route(db: Session = Depends(get_db), pagination:
     return response
 
 @tournament_router.get("/mytournaments/all_active", response_model=ListTournament)
-def get_tournament_by_organization_id_route(created_by: int, db: Session = Depends(get_db), pagination: Pagination = Depends(pagination_params)):
+def get_tournament_by_organization_id_route(created_by: int, db: Session = Depends(get_read_db), pagination: Pagination = Depends(pagination_params)):
     db_user = get_active_user(db, created_by)
 
     if not db_user:
@@ -213,7 +212,7 @@ def get_tournament_by_organization_id_route(created_by: int, db: Session = Depen
     return response
 
 @tournament_router.get("/mytournaments/all", response_model=ListTournament)
-def get_all_mytournaments_route(created_by: int, db: Session = Depends(get_db), pagination: Pagination = Depends(pagination_params)):
+def get_all_mytournaments_route(created_by: int, db: Session = Depends(get_read_db), pagination: Pagination = Depends(pagination_params)):
     db_user = get_active_user(db, created_by)
 
     if not db_user:
@@ -261,7 +260,7 @@ def get_all_mytournaments_route(created_by: int, db: Session = Depends(get_db),
     return response
 
 @tournament_router.get("/mytournaments/history", response_model=ListTournament)
-def get_history_mytournaments_route(created_by: int, db: Session = Depends(get_db), pagination: Pagination = Depends(pagination_params)):
+def get_history_mytournaments_route(created_by: int, db: Session = Depends(get_read_db), pagination: Pagination = Depends(pagination_params)):
     db_user = get_active_user(db, created_by)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -318,7 +317,7 @@ def pagination_params(
 
 @tournament_router.get("/all", response_model=ListTournament)
 def get_all_tournaments_route(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     pagination: Pagination = Depends(pagination_params)
 ):
     order_by = desc if pagination.order == SortEnum.desc else asc
@@ -357,8 +356,8 @@ def get_all_tournaments_route(
 
 
 @tournament_router.get("/details/active/{tournament_id}", response_model=Union[TeamTournamentResponse, SoloTournamentResponse])
-def get_active_tournament_detail_route(tournament_id: int, db: Session = Depends(get_db)):
-    db_detail = get_tournament_detail_by_id_active(db, tournament_id)
+async def get_active_tournament_detail_route(tournament_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    db_detail = await async_crud.get_tournament_detail_by_id_active(db, tournament_id)
 
     if not db_detail:
         raise HTTPException(status_code=404, detail="Not Found")
@@ -366,7 +365,7 @@ def get_active_tournament_detail_route(tournament_id: int, db: Session = Depends
     return db_detail
 
 @tournament_router.get("/details/all/{tournament_id}", response_model=Union[TeamTournamentResponse, SoloTournamentResponse])
-def get_all_active_tournament_detail_route(tournament_id: int, db: Session = Depends(get_db)):
+def get_all_active_tournament_detail_route(tournament_id: int, db: Session = Depends(get_read_db)):
     db_detail = get_tournament_detail_by_id_include_deleted(db, tournament_id)
 
     if not db_detail:
@@ -374,7 +373,7 @@ def get_all_active_tournament_detail_route(tournament_id: int, db: Session = Dep
 
     return db_detail
 
-@tournament_router.delete("/delete/{tournament_id}", response_model=TournamentResponse)
+@tournament_router.delete("/delete/{tournament_id}", response_model=TournamentResponse, dependencies=[UNIT_OF_WORK])
 def delete_tournament_route(tournament_id: int, db: Session = Depends(get_db)):
     tournament = delete_tournament(db, tournament_id)
     if not tournament:
@@ -382,7 +381,7 @@ def delete_tournament_route(tournament_id: int, db: Session = Depends(get_db)):
 
     return tournament
 
-@tournament_router.put("/alter/{tournament_id}", response_model=TournamentResponse)
+@tournament_router.put("/alter/{tournament_id}", response_model=TournamentResponse, dependencies=[UNIT_OF_WORK])
 def alter_tournament_route(tournament_id: int, data: TournamentAlter, db: Session = Depends(get_db)):
     db_tournament = get_tournament_active(db, tournament_id)
     if not db_tournament:
@@ -394,11 +393,11 @@ def alter_tournament_route(tournament_id: int, data: TournamentAlter, db: Sessio
 
     return updated_tournament
 
-@tournament_router.post("/join", response_model=TournamentParticipantResponse)
+@tournament_router.post("/join", response_model=TournamentParticipantResponse, dependencies=[UNIT_OF_WORK])
 def join_tournament_route(request: JoinTournamentRequest, db: Session = Depends(get_db)):
 
     tournament = db.query(Tournament)\
-        .options(joinedload(Tournament.team_tournament))\
+        .options(*TOURNAMENT_DETAILS)\
         .filter(Tournament.id == request.tournament_id)\
         .first()
 
@@ -448,7 +447,7 @@ def join_tournament_route(request: JoinTournamentRequest, db: Session = Depends(
 
         return participant
 
-@tournament_router.post("/leave", response_model=TournamentParticipantResponse)
+@tournament_router.post("/leave", response_model=TournamentParticipantResponse, dependencies=[UNIT_OF_WORK])
 def leave_tournament_route(request: LeaveTournamentRequest, db: Session = Depends(get_db)):
 
     participant = None
@@ -480,36 +479,36 @@ def leave_tournament_route(request: LeaveTournamentRequest, db: Session = Depend
 
 
 @tournament_router.get("/filter/min_age", response_model=List[TournamentResponse])
-def filter_min_age_tournament_route(min_age: int, db: Session = Depends(get_db)):
-    tournaments = get_tournaments_by_min_age(db, min_age)
+async def filter_min_age_tournament_route(min_age: int, db: AsyncSession = Depends(get_async_read_db)):
+    tournaments = await async_crud.get_tournaments_by_min_age(db, min_age)
     if not tournaments:
         raise HTTPException(status_code=404, detail="No tournaments found")
     return tournaments
 
 @tournament_router.get("/filter/visibility", response_model=List[TournamentResponse])
-def filter_visibility_tournament_route(visibility: VisibilityEnum, db: Session = Depends(get_db)):
-    tournaments = get_tournaments_by_visibility(db, visibility.value)
+async def filter_visibility_tournament_route(visibility: VisibilityEnum, db: AsyncSession = Depends(get_async_read_db)):
+    tournaments = await async_crud.get_tournaments_by_visibility(db, visibility.value)
     if not tournaments:
         raise HTTPException(status_code=404, detail="No tournaments found")
     return tournaments
 
 @tournament_router.get("/filter/sport", response_model=List[TournamentResponse])
-def filter_sport_tournament_route(sport: SportEnum, db: Session = Depends(get_db)):
-    tournaments = get_tournaments_by_sport(db, sport.value)
+async def filter_sport_tournament_route(sport: SportEnum, db: AsyncSession = Depends(get_async_read_db)):
+    tournaments = await async_crud.get_tournaments_by_sport(db, sport.value)
     if not tournaments:
         raise HTTPException(status_code=404, detail="No tournaments found")
     return tournaments
 
 @tournament_router.get("/filter/start_date", response_model=List[TournamentResponse])
-def filter_visibility_tournament_route(start_date: datetime, db: Session = Depends(get_db)):
-    tournaments = get_tournaments_by_start_date(db, start_date)
+async def filter_visibility_tournament_route(start_date: datetime, db: AsyncSession = Depends(get_async_read_db)):
+    tournaments = await async_crud.get_tournaments_by_start_date(db, start_date)
     if not tournaments:
         raise HTTPException(status_code=404, detail="No tournaments found")
     return tournaments
 
 @tournament_router.get("/filter/location", response_model=List[TournamentResponse])
-def filter_location_route(location: str, db: Session = Depends(get_db)):
-    tournaments = get_tournaments_by_location(db, location)
+async def filter_location_route(location: str, db: AsyncSession = Depends(get_async_read_db)):
+    tournaments = await async_crud.get_tournaments_by_location(db, location)
     if not tournaments:
         raise HTTPException(status_code=404, detail="No tournaments found")
     return tournaments
@@ -518,7 +517,7 @@ def filter_location_route(location: str, db: Session = Depends(get_db)):
 @tournament_router.get("/filter/joined", response_model=ListTournament)
 def filter_joined_route(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     pagination: Pagination = Depends(pagination_params)
 ):
     order_by = desc if pagination.order == SortEnum.desc else asc
@@ -566,7 +565,7 @@ def filter_joined_route(user_id: int, db: Session = Depends(get_db)):
 """
 
 @tournament_router.get("/{tournament_id}", response_model=TournamentResponse)
-def get_tournament_route(tournament_id: int, db: Session = Depends(get_db)):
+def get_tournament_route(tournament_id: int, db: Session = Depends(get_read_db)):
     db_tournament = get_tournament_active(db, tournament_id)
     if not db_tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
@@ -2,20 +2,23 @@ from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.functions import user
-from database import get_db
+from database import UNIT_OF_WORK, get_db, get_async_read_db
 
 from typing import List
 import crud
+import async_crud
 import database
 import schemas
 from crud import alter_user, delete_manual_participant, delete_tournament, leave_team, get_active_user, \
-    leave_tournament, leave_tournament_solo, leave_tournament_team
-from models import ManualParticipant, Tournament
+    get_active_user_with_belongings, leave_tournament, leave_tournament_solo, leave_tournament_team, invalidate_cached, \
+    invalidate_names_cached
+from models import ManualParticipant, Team, Tournament, User
 from schemas import ParticipantManualResponse, UserCreate, UserAlter, UserResponse
 user_router = APIRouter(prefix="", tags=["Users"])
 
-@user_router.post("/create", response_model=schemas.UserResponse)
+@user_router.post("/create", response_model=schemas.UserResponse, dependencies=[database.UNIT_OF_WORK])
 def create_user_route(user_: schemas.UserCreate, db: Session = Depends(database.get_db)):
     existing_email = crud.get_user_by_email(db, user_.email)
     if existing_email:
@@ -30,15 +33,14 @@ def create_user_route(user_: schemas.UserCreate, db: Session = Depends(database.
     new_user.age = UserResponse.calculate_age(new_user.date_of_birth)
     return new_user
 
-@user_router.put("/users/{user_id}", response_model=UserResponse)
+@user_router.put("/users/{user_id}", response_model=UserResponse, dependencies=[UNIT_OF_WORK])
 def update_user(
     user_id: int,
     user_data: UserAlter,
     db: Session = Depends(get_db)
 ):
     user = db.query(User).filter(
-        User.id == user_id,
-        User.deleted_at.is_(None)
+        User.id == user_id
     ).first()
 
     if not user:
@@ -49,15 +51,17 @@ def update_user(
     for field, value in update_data.items():
         setattr(user, field, value)
 
-    db.commit()
-    db.refresh(user)
+    db.flush()
+    invalidate_cached(db, User, user_id)
+    if "nickname" in update_data:
+        invalidate_names_cached(db)
 
     return user
 
 
 
 @user_router.get("/all", response_model=List[schemas.UserResponse])
-def get_users_route(db: Session = Depends(database.get_db)):
+def get_users_route(db: Session = Depends(database.get_read_db)):
     users = crud.get_user_all(db)
     if not users:
         raise HTTPException(status_code=204, detail="No Content")
@@ -67,8 +71,8 @@ def get_users_route(db: Session = Depends(database.get_db)):
     return users
 
 @user_router.get("/all_active", response_model=List[schemas.UserResponse])
-def get_active_users_route(db: Session = Depends(database.get_db)):
-    users = crud.get_user_all_active(db)
+async def get_active_users_route(db: AsyncSession = Depends(get_async_read_db)):
+    users = await async_crud.get_user_all_active(db)
     if not users:
         raise HTTPException(status_code=204, detail="No Content")
 
@@ -77,8 +81,8 @@ def get_active_users_route(db: Session = Depends(database.get_db)):
     return users
 
 @user_router.get("/{user_id}", response_model=schemas.UserResponse)
-def get_user_route(user_id: int, db: Session = Depends(database.get_db)):
-    user1 = crud.get_active_user(db, user_id)
+async def get_user_route(user_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    user1 = await async_crud.get_active_user(db, user_id)
 
     if not user1:
         raise HTTPException(status_code=404, detail="User not found")
@@ -87,8 +91,8 @@ def get_user_route(user_id: int, db: Session = Depends(database.get_db)):
     return user1
 
 @user_router.get("/email/{email}", response_model=schemas.UserResponse)
-def get_user_by_email_route(email: str, db: Session = Depends(database.get_db)):
-    user1 = crud.get_user_by_email(db, email)
+async def get_user_by_email_route(email: str, db: AsyncSession = Depends(get_async_read_db)):
+    user1 = await async_crud.get_user_by_email(db, email)
     if not user1:
         raise HTTPException(status_code=404, detail="User not found")
     if user1.date_of_birth is not None:
@@ -96,8 +100,8 @@ def get_user_by_email_route(email: str, db: Session = Depends(database.get_db)):
     return user1
 
 @user_router.get("/nickname/{nickname}", response_model=schemas.UserResponse)
-def get_user_by_nickname_route(nickname: str, db: Session = Depends(database.get_db)):
-    user = crud.get_user_by_nickname(db, nickname)
+async def get_user_by_nickname_route(nickname: str, db: AsyncSession = Depends(get_async_read_db)):
+    user = await async_crud.get_user_by_nickname(db, nickname)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -106,7 +110,7 @@ def get_user_by_nickname_route(nickname: str, db: Session = Depends(database.get
         
     return user
 
-@user_router.patch("/alter/{user_id}", response_model=schemas.UserResponse)
+@user_router.patch("/alter/{user_id}", response_model=schemas.UserResponse, dependencies=[database.UNIT_OF_WORK])
 def alter_user_route(user_id: int, update_data: schemas.UserAlter, db: Session = Depends(database.get_db)):
     db_user = crud.get_active_user(db, user_id)
 
@@ -128,9 +132,9 @@ def alter_user_route(user_id: int, update_data: schemas.UserAlter, db: Session =
     response = UserResponse(**updated_user_dict)
     return response
 
-@user_router.delete("/delete/{user_id}", response_model=schemas.UserResponse)
+@user_router.delete("/delete/{user_id}", response_model=schemas.UserResponse, dependencies=[database.UNIT_OF_WORK])
 def delete_user(user_id: int, db: Session = Depends(database.get_db)):
-    db_user = get_active_user(db, user_id)
+    db_user = get_active_user_with_belongings(db, user_id)
 
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -141,32 +145,15 @@ def delete_user(user_id: int, db: Session = Depends(database.get_db)):
     active_joined_teams = db_user.team_memberships
     active_joined_tournaments = db_user.tournament_participations
 
-    if active_created_manual_participants:
-        for participant in active_created_manual_participants:
-            participant.deleted_at = datetime.now(timezone.utc)
-            try:
-                db.commit()
-                db.refresh(participant)
-            except IntegrityError:
-                raise HTTPException(status_code=400, detail="Can't delete the manually entered participant.")
-
-    if active_created_tournaments:
-        for tournament in active_created_tournaments:
-            tournament.deleted_at = datetime.now(timezone.utc)
-            try:
-                db.commit()
-                db.refresh(tournament)
-            except IntegrityError:
-                raise HTTPException(status_code=400, detail="Can't delete the tournament.")
-
-    if active_created_teams:
-        for team in active_created_teams:
-            team.deleted_at = datetime.now(timezone.utc)
-            try:
-                db.commit()
-                db.refresh(team)
-            except IntegrityError:
-                raise HTTPException(status_code=400, detail="Can't delete the team.")
+    deleted_at = datetime.now(timezone.utc)
+    for instance in [*active_created_manual_participants, *active_created_tournaments, *active_created_teams]:
+        instance.deleted_at = deleted_at
+    try:
+        db.flush()
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Can't delete the user's participants, tournaments and teams.")
+    invalidate_cached(db, Tournament, *(tournament.id for tournament in active_created_tournaments))
+    invalidate_cached(db, Team, *(team.id for team in active_created_teams))
 
     if active_joined_teams:
         for team_member in active_joined_teams:
@@ -4,7 +4,8 @@ from pydantic import BaseModel, EmailStr, conint, PositiveInt, NonNegativeInt, c
 from typing_extensions import Annotated
 from typing import Optional, List
 from datetime import date, time, datetime
-from models import SportEnum, ParticipantEnum, TournamentTypeEnum, VisibilityEnum, SortEnum
+from models import SportEnum, ParticipantEnum, TournamentTypeEnum, VisibilityEnum, SortEnum, TiebreakerEnum, \
+    EntrantTypeEnum
 from pydantic import BaseModel, Field
 from typing import Optional
 
@@ -419,24 +420,212 @@ class MatchBase(BaseModel):
     tournament_id: int
     participant_type: ParticipantEnum
 
+    participant1_type: Optional[EntrantTypeEnum] = None
     participant1_id: Optional[int] = None
+    participant2_type: Optional[EntrantTypeEnum] = None
     participant2_id: Optional[int] = None
+    participant1_name: Optional[str] = None
+    participant2_name: Optional[str] = None
 
+    winner_type: Optional[EntrantTypeEnum] = None
     winner_id: Optional[int] = None
+    score1: Optional[int] = None
+    score2: Optional[int] = None
+    is_draw: bool = False
+
+    stage: Optional[str] = None
+    round: Optional[int] = None
 
     date: Optional[date] = None
     time: Optional[time] = None
+    court: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class UpcomingMatch(BaseModel):
+    id: int
+    tournament_id: int
+    tournament_name: Optional[str] = None
+    participant_type: ParticipantEnum
+
+    participant1_type: Optional[EntrantTypeEnum] = None
+    participant1_id: Optional[int] = None
+    participant2_type: Optional[EntrantTypeEnum] = None
+    participant2_id: Optional[int] = None
+    participant1_name: Optional[str] = None
+    participant2_name: Optional[str] = None
+
+    stage: Optional[str] = None
+    round: Optional[int] = None
+
+    date: date
+    time: time
+    court: Optional[int] = None
+
+
+class UpcomingMatchesResponse(BaseModel):
+    matches: List[UpcomingMatch]
+    # pass back as ?cursor= for the next page; null on the last one
+    next_cursor: Optional[str] = None
+
+
 class MatchResponse(BaseModel):
     id: int
     date: Optional[date] = None
     time: Optional[time] = None
 
+    participant1_type: Optional[EntrantTypeEnum] = None
+    participant1_id: Optional[int] = None
+    participant2_type: Optional[EntrantTypeEnum] = None
+    participant2_id: Optional[int] = None
+    participant1_name: Optional[str] = None
+    participant2_name: Optional[str] = None
+    winner_type: Optional[EntrantTypeEnum] = None
+    winner_id: Optional[int] = None
+
     model_config = ConfigDict(from_attributes=True)
 
 class ReportWinnerRequest(BaseModel):
     match_id: int
-    winner: int
\ No newline at end of file
+    winner: int
+
+class SetScore(BaseModel):
+    games1: int = Field(..., ge=0, le=100)
+    games2: int = Field(..., ge=0, le=100)
+
+class ReportScoreRequest(BaseModel):
+    match_id: int
+    score1: Optional[int] = Field(None, ge=0, le=1000)
+    score2: Optional[int] = Field(None, ge=0, le=1000)
+    sets: Optional[List[SetScore]] = Field(None, max_length=5)
+
+class ReportWinnersRequest(BaseModel):
+    results: List[ReportWinnerRequest] = Field(..., min_length=1, max_length=1000)
+
+class ReportWinnerOutcome(BaseModel):
+    match_id: int
+    status: str
+    detail: Optional[str] = None
+
+class ScheduleRequest(BaseModel):
+    courts: int = Field(1, ge=1, le=100)
+    match_duration_minutes: int = Field(60, ge=5, le=600)
+    min_rest_minutes: int = Field(30, ge=0, le=1440)
+    day_start: Optional[time] = None
+    day_end: Optional[time] = None
+
+class ScheduleResponse(BaseModel):
+    scheduled: int
+    first_date: Optional[date] = None
+    last_date: Optional[date] = None
+
+class BracketSlot(BaseModel):
+    participant_type: Optional[EntrantTypeEnum] = None
+    participant_id: Optional[int] = None
+    name: Optional[str] = None
+
+class BracketMatch(BaseModel):
+    id: int
+    slots: List[BracketSlot]
+    winner_type: Optional[EntrantTypeEnum] = None
+    winner_id: Optional[int] = None
+    score1: Optional[int] = None
+    score2: Optional[int] = None
+    is_draw: bool = False
+
+    winner_to_match_id: Optional[int] = None
+    winner_to_slot: Optional[int] = None
+    loser_to_match_id: Optional[int] = None
+    loser_to_slot: Optional[int] = None
+
+    date: Optional[date] = None
+    time: Optional[time] = None
+    court: Optional[int] = None
+
+class BracketRound(BaseModel):
+    stage: str
+    round: int
+    matches: List[BracketMatch]
+
+class BracketResponse(BaseModel):
+    tournament_id: int
+    participant_type: ParticipantEnum
+    rounds: List[BracketRound]
+
+# ==========================
+# STANDINGS SCHEMA
+# ==========================
+
+class StandingResponse(BaseModel):
+    position: int
+    participant_type: EntrantTypeEnum
+    participant_id: int
+
+    played: int
+    wins: int
+    draws: int
+    losses: int
+    points: int
+
+    score_for: int
+    score_against: int
+    score_difference: int
+    games_for: int
+    games_against: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ParticipantStatsResponse(BaseModel):
+    participant_type: EntrantTypeEnum
+    participant_id: int
+    sport: Optional[SportEnum] = None
+
+    tournaments: int
+    played: int
+    wins: int
+    draws: int
+    losses: int
+
+    score_for: int
+    score_against: int
+    games_for: int
+    games_against: int
+
+# ==========================
+# RATINGS SCHEMA
+# ==========================
+
+class RatingResponse(BaseModel):
+    position: int
+    participant_type: EntrantTypeEnum
+    participant_id: int
+    name: Optional[str] = None
+
+    rating: float
+    games: int
+
+class RatingRecomputeResponse(BaseModel):
+    rated_matches: int
+
+# ==========================
+# PROJECTION SCHEMA
+# ==========================
+
+class ProjectedRound(BaseModel):
+    stage: str
+    round: int
+    probability: float
+
+class ProjectedEntrant(BaseModel):
+    participant_type: EntrantTypeEnum
+    participant_id: int
+    name: Optional[str] = None
+    rating: float
+    win_probability: float
+    rounds: List[ProjectedRound]
+
+class ProjectionResponse(BaseModel):
+    tournament_id: int
+    simulations: int
+    entrants: List[ProjectedEntrant]
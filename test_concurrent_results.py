@@ -0,0 +1,114 @@
+"""
+Reports of matches that share entrants, run in parallel sessions, must
+add up to the same standings and ratings as running them one by one.
+
+Needs a scratch Postgres database: set TEST_DATABASE_URL to run it.
+"""
+import os
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if not TEST_DATABASE_URL:
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import main
+from bootstrap import bootstrap
+from database import SessionLocal, get_engine
+from match.match_handler import get_match_for_result, report_match_winner
+from match.ratings import INITIAL_RATING
+from match.standings import TOTALS, recompute_standings
+from models import Rating, Standing
+
+PLAYERS = 4
+
+
+@pytest.fixture(scope="module")
+def client():
+    bootstrap(get_engine())
+    with TestClient(main.app, base_url="https://testserver") as c:
+        yield c
+
+
+def group_tournament(client, users) -> int:
+    body = dict(
+        name="Parallel Cup", organizer_contact="12345", bracket_type="Group", visibility="visible",
+        sport="football", participant_type="solo", start_date=str(date.today() + timedelta(days=3)),
+        location="Lviv", created_by=users[0], solo_details={"max_players": PLAYERS},
+    )
+    tournament_id = client.post("/tournaments/create", json=body).json()["id"]
+    for user_id in users:
+        assert client.post("/tournaments/join", json={"tournament_id": tournament_id, "user_id": user_id}).status_code == 200
+    assert client.post(f"/matches/{tournament_id}/generate-matches").status_code == 200
+    return tournament_id
+
+
+def report_in_parallel(match_ids):
+    barrier = threading.Barrier(len(match_ids))
+    errors = []
+
+    def report(match_id):
+        db = SessionLocal(bind=get_engine())
+        try:
+            barrier.wait()
+            match = get_match_for_result(db, match_id)
+            report_match_winner(db, match, 1)
+            db.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=report, args=(match_id,)) for match_id in match_ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+
+def test_parallel_reports_add_up(client):
+    suffix = os.urandom(4).hex()
+    users = [
+        client.post("/users/create", json={
+            "name": f"Player{i}", "nickname": f"p{i}{suffix}", "email": f"p{i}{suffix}@b.com", "password": "secret12",
+        }).json()["id"]
+        for i in range(PLAYERS)
+    ]
+    # the same players in two tournaments: their ratings are shared by both
+    tournaments = [group_tournament(client, users), group_tournament(client, users)]
+
+    with get_engine().connect() as conn:
+        match_ids = [row[0] for row in conn.execute(
+            text("select id from matches where tournament_id = any(:ids) and deleted_at is null"),
+            {"ids": tournaments},
+        )]
+    report_in_parallel(match_ids)
+
+    db = SessionLocal(bind=get_engine())
+    try:
+        for tournament_id in tournaments:
+            saved = {
+                (s.participant_type, s.participant_id): tuple(getattr(s, name) for name in TOTALS)
+                for s in db.query(Standing).filter(Standing.tournament_id == tournament_id)
+            }
+            expected = {
+                (s.participant_type, s.participant_id): tuple(getattr(s, name) for name in TOTALS)
+                for s in recompute_standings(db, tournament_id)
+            }
+            db.rollback()
+            assert saved == expected
+
+        ratings = db.query(Rating).filter(Rating.sport == "football", Rating.participant_id.in_(users)).all()
+        # every player plays everyone else once per tournament
+        assert sorted(r.games for r in ratings) == [2 * (PLAYERS - 1)] * PLAYERS
+        # whatever order the reports ran in, points only move between players
+        assert sum(r.rating for r in ratings) == pytest.approx(PLAYERS * INITIAL_RATING)
+    finally:
+        db.close()